@@ -1,589 +1,1204 @@
 # ProductInformation/analyze_cli.py
+import os
 import sys
 import json
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, parse_qs, urljoin, unquote_plus
 import re
-import html
-import unicodedata
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-# ---------- 文字工具 ----------
-def clean_text(s):
-    if not s:
-        return None
-    return re.sub(r"\s+", " ", s).strip()
+import threading
+import time
+# requests / urllib3 / bs4 / concurrent.futures 只在真的要用的路徑才 import：
+# 用法錯誤、結果快取命中時不必付這些成本（bench/import_budget.py 會檢查）
+from lazy_re import lazy_compile
+from page_index import PageIndex, PARSER_BACKENDS, build_page, resolve_backend
+import vendors
+import timings
+import deadline
+from politeness import HostScheduler, RETRY_STATUSES, parse_retry_after
+
+# parser 行為有改動時請調整，讓結果快取中的舊資料失效
+PARSER_VERSION = "5"
+
+# ---------- 連線 ----------
+def make_session(pool_size: int = 10, status_retries: bool = True):
+    """
+    pool_size：每個 host 保留的連線數；常駐模式下多執行緒共用同一個 session
+    status_retries：由 urllib3 重試 429/5xx；交給 HostScheduler 處理時關掉，只保留連線層的重試
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 
-DIM_PATTERNS = [
-    (re.compile(r'(\d)\s*"\b'), r'\1″'),  # 1" -> 1″
-    (re.compile(r'(\d)\s*\'\b'), r'\1′'), # 1' -> 1′
-    (re.compile(r'\\"'), '″'),
-]
+    class DeadlineRetry(Retry):
+        # 連線層重試也不超過查詢時限（thread-local，urllib3 在呼叫端執行緒重試）
+        def is_exhausted(self) -> bool:
+            d = deadline.current()
+            return super().is_exhausted() or (d is not None and d.fetch_remaining() <= 0)
 
-def normalize_for_output(text):
-    """避免 JSON 轉義問題並做簡單排版正規化"""
-    if text is None:
-        return None
-    t = html.unescape(text)
-    t = unicodedata.normalize("NFC", t)
-    for pat, repl in DIM_PATTERNS:
-        t = pat.sub(repl, t)
-    t = t.replace("\\", "")      # 移除多餘反斜線
-    t = t.replace('"', '”')      # 排版引號
-    t = re.sub(r"\s+", " ", t).strip()
-    return t
-
-def to_float_maybe(x):
-    if x is None:
-        return None
-    try:
-        return float(x)
-    except Exception:
-        try:
-            return float(re.sub(r"[^\d.]", "", str(x)))
-        except Exception:
-            return None
-
-def make_session():
     s = requests.Session()
-    retries = Retry(
+    retries = DeadlineRetry(
         total=3, backoff_factor=0.3,
-        status_forcelist=(429, 500, 502, 503, 504),
+        status_forcelist=RETRY_STATUSES if status_retries else (),
+        respect_retry_after_header=status_retries,
         allowed_methods=frozenset(["GET"])
     )
-    s.mount("https://", HTTPAdapter(max_retries=retries))
-    s.mount("http://", HTTPAdapter(max_retries=retries))
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
     s.headers.update({
         "User-Agent": "Mozilla/5.0 (compatible; ProductMCP/1.2)",
         "Accept-Language": "en-US,en;q=0.8,zh-TW;q=0.7"
     })
     return s
 
-# ---------- 抓價格（通用） ----------
-def find_price_generic(soup: BeautifulSoup):
-    # JSON-LD offers.price
-    for tag in soup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(tag.string or "")
-        except Exception:
-            continue
-        items = data if isinstance(data, list) else [data]
-        for item in items:
-            if isinstance(item, dict):
-                offers = item.get("offers")
-                if isinstance(offers, dict):
-                    price = offers.get("price") or (offers.get("priceSpecification") or {}).get("price")
-                    f = to_float_maybe(price)
-                    if f is not None:
-                        return f
-                if isinstance(offers, list):
-                    for o in offers:
-                        if isinstance(o, dict):
-                            price = o.get("price") or (o.get("priceSpecification") or {}).get("price")
-                            f = to_float_maybe(price)
-                            if f is not None:
-                                return f
-    # Meta
-    meta_price = soup.find("meta", {"property": "product:price:amount"}) or soup.find("meta", {"name": "price"})
-    if meta_price and meta_price.get("content"):
-        f = to_float_maybe(meta_price["content"])
-        if f is not None:
-            return f
-    # 純文字備援
-    text = soup.get_text(" ", strip=True)
-    for pat in [
-        r"\bUSD\s*\$?\s*([\d,]+(?:\.\d{1,2})?)",
-        r"\$\s*([\d,]+(?:\.\d{1,2})?)",
-        r"\bNT\$?\s*([\d,]+(?:\.\d{1,2})?)",
-        r"\bTWD\s*([\d,]+(?:\.\d{1,2})?)",
-        r"\bEUR\s*\€?\s*([\d\.]+)",
-    ]:
-        m = re.search(pat, text, flags=re.IGNORECASE)
-        if m:
-            try:
-                return float(m.group(1).replace(",", ""))
-            except Exception:
-                continue
-    return None
-
-# ---------- 抓主圖（通用） ----------
-def _looks_like_logo(u: str) -> bool:
-    if not u:
-        return False
-    low = u.lower()
-    return any(k in low for k in ("logo", "sprite", "favicon", "icon", "social"))
-
-def find_image_generic(soup: BeautifulSoup, base_url: str):
-    """盡量找出產品主圖的絕對網址。避免回傳 logo。"""
-    # 1) OpenGraph / Twitter，但過濾 logo
-    for key in (("property", "og:image"), ("name", "og:image"),
-                ("property", "twitter:image"), ("name", "twitter:image")):
-        tag = soup.find("meta", {key[0]: key[1]})
-        if tag and tag.get("content"):
-            u = urljoin(base_url, tag["content"].strip())
-            if not _looks_like_logo(u):
-                return u
-
-    # 2) JSON-LD Product.image
-    for tag in soup.find_all("script", type="application/ld+json"):
+# 429/5xx 的重試次數與退避基數（沒有 Retry-After 時用 0.3s、0.6s、1.2s）
+STATUS_RETRIES = 3
+STATUS_BACKOFF = 0.3
+
+# ---------- 串流讀取 ----------
+# 預設內文上限；超過就停止下載，用已收到的部分解析（_truncated）
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+# 有時限的擷取在背景執行緒跑；逾時沒跑完的仍佔著名額，同時最多這麼多個（至少要容得下併發查詢數）
+MIN_EXTRACT_WORKERS = 4
+
+# head-first：</head> 到達時先用 head 解析，這些欄位都有了就不再下載 body
+HEAD_REQUIRED_FIELDS = ("name", "model", "price", "imagelink")
+
+_HEAD_END = lazy_compile(rb"</head\s*>", re.I)
+_META_CHARSET = lazy_compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w\-]+)""", re.I)
+
+def _response_encoding(resp, head: bytes) -> str:
+    return _body_encoding(resp.headers.get("Content-Type"), resp.encoding, head)
+
+def _body_encoding(ctype: str | None, encoding: str | None, head: bytes) -> str:
+    """Content-Type 有 charset 就用；否則看 <meta charset>；都沒有用 utf-8"""
+    if "charset=" in (ctype or "").lower() and encoding:
+        return encoding
+    m = _META_CHARSET.search(head[:4096])
+    if m:
+        enc = m.group(1).decode("ascii", "ignore")
         try:
-            data = json.loads(tag.string or "")
-        except Exception:
-            continue
-        items = data if isinstance(data, list) else [data]
-        for item in items:
-            if not isinstance(item, dict):
-                continue
-            t = item.get("@type") or item.get("type")
-            t = [t] if isinstance(t, str) else (t or [])
-            t = [str(x).lower() for x in t]
-            if "product" in t:
-                img = item.get("image")
-                candidates = []
-                if isinstance(img, str):
-                    candidates = [img]
-                elif isinstance(img, list):
-                    candidates = [x for x in img if isinstance(x, str)]
-                elif isinstance(img, dict):
-                    u = img.get("url") or img.get("@id")
-                    if isinstance(u, str) and u.strip():
-                        candidates = [u]
-                for c in candidates:
-                    absu = urljoin(base_url, c.strip())
-                    if not _looks_like_logo(absu):
-                        return absu
-
-    # 3) Heuristic: product-like <img>
-    for img in soup.find_all("img"):
-        src = img.get("src") or img.get("data-src") or img.get("data-original")
-        if not src:
-            continue
-        src = src.strip()
-        if not src or src.startswith("data:"):
-            continue
-        cls = " ".join(img.get("class", [])).lower()
-        iid = (img.get("id") or "").lower()
-        if any(k in (cls + " " + iid) for k in ["product", "main", "detail", "primary", "gallery"]):
-            absu = urljoin(base_url, src)
-            if not _looks_like_logo(absu):
-                return absu
-
-    return None
-
-# ---------- Thorlabs 圖片 ----------
-LOGO_BLOCKLIST = {
-    "https://www.thorlabs.com/images/thorlabs-logo.png"
-}
+            "".encode(enc)
+            return enc
+        except LookupError:
+            pass
+    return "utf-8"
 
-def _is_good_img_url(u: str) -> bool:
-    if not u:
-        return False
-    s = u.lower().strip()
-    if s in (x.lower() for x in LOGO_BLOCKLIST):
-        return False
-    bad = ("logo", "sprite", "icon", "banner", "social", "favicon")
-    return (not any(b in s for b in bad)) and s.endswith((".jpg", ".jpeg", ".png", ".webp"))
-
-def _to_large_from_small(u: str) -> str:
-    # small/tabimages -> large，且 -sml/-small -> -lrg
-    v = u
-    v = re.sub(r"/images/small/", "/images/large/", v, flags=re.IGNORECASE)
-    v = re.sub(r"/images/tabimages/", "/images/large/", v, flags=re.IGNORECASE)
-    v = re.sub(r"[-_](?:sml|small)(\.(?:jpe?g|png|webp))$", r"-lrg\1", v, flags=re.IGNORECASE)
-    return v
-
-def _host_is_thorlabs(host: str) -> bool:
-    # 支援 thorlabs.com / .us / .de / .cn / .jp / .uk / .fr / .it / .es 等
-    parts = host.lower().split(".")
-    return len(parts) >= 2 and parts[-2] == "thorlabs"
-
-def find_image_thorlabs(soup: BeautifulSoup, base_url: str, model: str | None = None) -> str | None:
-    html_text = str(soup)
-
-    # A) 直接 regex 掃大圖（先偏好 -lrg，其次任何 /images/(large|highres)/*.{jpg,png,webp}）
-    pat_lrg_abs = re.compile(r"https?://[^\"'\s>]+/images/(?:large|highres)/[^\"'\s>]*?[-_]lrg\.(?:jpe?g|png|webp)", re.I)
-    pat_lrg_rel = re.compile(r"/images/(?:large|highres)/[^\"'\s>]*?[-_]lrg\.(?:jpe?g|png|webp)", re.I)
-    m = pat_lrg_abs.search(html_text)
-    if m and _is_good_img_url(m.group(0)):
-        return m.group(0)
-    m = pat_lrg_rel.search(html_text)
-    if m and _is_good_img_url(m.group(0)):
-        return urljoin(base_url, m.group(0))
-
-    # 沒有 -lrg 就抓 large/highres 任意圖
-    pat_any_abs = re.compile(r"https?://[^\"'\s>]+/images/(?:large|highres)/[^\"'\s>]+\.(?:jpe?g|png|webp)", re.I)
-    pat_any_rel = re.compile(r"/images/(?:large|highres)/[^\"'\s>]+\.(?:jpe?g|png|webp)", re.I)
-
-    candidates = []
-    for pat in (pat_any_abs, pat_any_rel):
-        for m in pat.finditer(html_text):
-            u = m.group(0)
-            u = urljoin(base_url, u)
-            if _is_good_img_url(u):
-                candidates.append(u)
-
-    # B) 從屬性收集候選（含 data-*），並將 small/tabimages 轉 large
-    attrs = ("href","src","data-src","data-original","data-large","data-zoom-image","data-image","data-full")
-    for tag in soup.find_all(["a","img","source","link"]):
-        for a in attrs:
-            val = tag.get(a)
-            if not val:
-                continue
-            val = val.strip()
-            if not val or val.startswith("data:"):
+def read_response(resp, max_bytes: int = DEFAULT_MAX_BYTES, on_head=None, stop_at: float | None = None):
+    """
+    以串流方式讀取 body，最多 max_bytes。
+    on_head(head_bytes) 在 </head> 第一次出現時呼叫；回傳 True 表示不需要再讀。
+    stop_at：time.monotonic() 的時間點，到了就停止下載（查詢時限）。
+    回傳 (body_bytes, state)，state 為 "complete" / "head" / "truncated" / "deadline"。
+    """
+    buf = bytearray()
+    head_checked = on_head is None
+    try:
+        for chunk in resp.iter_content(chunk_size=16 * 1024):
+            if not chunk:
                 continue
-            low = val.lower()
-            if "/images/large/" in low or "/images/highres/" in low:
-                absu = urljoin(base_url, val)
-                if _is_good_img_url(absu):
-                    candidates.append(absu)
-            if "/images/small/" in low or "/images/tabimages/" in low:
-                absu = urljoin(base_url, _to_large_from_small(val))
-                if _is_good_img_url(absu):
-                    candidates.append(absu)
-
-    # C) 「Zoom / Click to Enlarge」連結
-    zoom = soup.find(lambda t: t.name == "a" and t.get_text(strip=True) and re.search(r"\b(zoom|click to enlarge)\b", t.get_text(strip=True), re.I))
-    if zoom and zoom.get("href"):
-        u = urljoin(base_url, zoom["href"].strip())
-        if _is_good_img_url(u):
-            candidates.append(u)
-
-    # 排序
-    def rank(u: str):
-        ul = u.lower()
-        is_lrg = 0 if re.search(r"[-_]lrg\.(?:jpe?g|png|webp)$", ul) else 1
-        in_large = 0 if "/images/large/" in ul else (1 if "/images/highres/" in ul else 2)
-        has_model = 0
-        if model:
-            fn = ul.rsplit("/", 1)[-1]
-            if re.search(re.escape(model.lower()), fn):
-                has_model = -1
-        return (is_lrg, in_large, has_model, len(ul))
-
-    uniq = []
-    seen = set()
-    for c in candidates:
-        if c not in seen:
-            uniq.append(c)
-            seen.add(c)
-
-    if uniq:
-        uniq.sort(key=rank)
-        return uniq[0]
-
-    # D) 備援 meta
-    for key in (("property","og:image"),("name","og:image"),
-                ("property","twitter:image"),("name","twitter:image")):
-        tag = soup.find("meta", {key[0]: key[1]})
-        if tag and tag.get("content"):
-            u = urljoin(base_url, tag["content"].strip())
-            if _is_good_img_url(u):
-                return u
-
-    return None
-
-# ---------- Thorlabs 解析 ----------
-def parse_thorlabs(url, soup: BeautifulSoup):
-    host = urlparse(url).netloc
-    if not _host_is_thorlabs(host):
-        return None
-
-    path = urlparse(url).path.lower()
-    if not (("thorproduct.cfm" in path) or ("newgrouppage" in path)):
-        # 只針對產品/群組頁
+            scan_from = max(0, len(buf) - 8)
+            buf += chunk
+            if not head_checked:
+                m = _HEAD_END.search(buf, scan_from)
+                if m:
+                    head_checked = True
+                    if on_head(bytes(buf[:m.end()])):
+                        return bytes(buf), "head"
+            if len(buf) >= max_bytes:
+                return bytes(buf[:max_bytes]), "truncated"
+            if stop_at is not None and time.monotonic() >= stop_at:
+                return bytes(buf), "deadline"
+    except Exception:
+        # 讀取逾時已依時限縮短：時間到時手上有資料就用，沒有才算失敗
+        if stop_at is not None and buf and time.monotonic() >= stop_at:
+            return bytes(buf), "deadline"
+        raise
+    return bytes(buf), "complete"
+
+# ---------- 分析流程 ----------
+def canonical_identity(url: str) -> str | None:
+    """
+    廠商 + 正規化型號，例如 "thorlabs:LA1951-A"、"minicircuits:FW-15A+"。
+    同一料號的不同網址寫法會得到同一個鍵；無法從網址判定料號時回傳 None。
+    """
+    try:
+        return vendors.canonical_identity(url)
+    except Exception:
         return None
 
-    brand = "Thorlabs"
-    qs = parse_qs(urlparse(url).query)
-
-    # part number: partnumber= 或 pn=
-    model = (qs.get("partnumber", [None])[0] or qs.get("pn", [None])[0] or "")
-    model = (model or "").strip() or None
-
-    # Title → name/spec
-    title_tag = soup.find("title")
-    title_text = clean_text(title_tag.get_text()) if title_tag else None
-    if not title_text:
-        og = soup.find("meta", property="og:title")
-        if og and og.get("content"):
-            title_text = clean_text(og["content"])
-
-    name = None
-    spec = None
-    if title_text:
-        title_text = re.sub(r"^\s*Thorlabs\s*-\s*", "", title_text, flags=re.IGNORECASE).strip()
-        tail = title_text
-        if model and title_text.upper().startswith(model.upper()):
-            tail = title_text[len(model):].strip()
-            tail = re.sub(r'^[\s\-–—:,]+', '', tail)
-        if not model:
-            m = re.search(r"\b([A-Z0-9]{1,10}(?:-[A-Z0-9]+)*)\b", title_text)
-            if m:
-                model = m.group(1)
-                tail = re.sub(rf"\b{re.escape(model)}\b", "", title_text).strip()
-                tail = re.sub(r'^[\s\-–—:,]+', '', tail)
-        parts = [p.strip() for p in tail.split(",")]
-        if parts:
-            name = parts[0] or None
-            spec = ", ".join(parts[1:]) if len(parts) > 1 else None
-
-    price = find_price_generic(soup)
-
-    # 主圖（先 Thorlabs 專用，再通用）
-    imagelink = find_image_thorlabs(soup, url, model=model)
-    if not imagelink:
-        imagelink = find_image_generic(soup, url)
-
-    # URL 正規化（強制 https 絕對位址）
-    def norm_url(u):
-        if not u:
-            return None
-        absu = urljoin(url, str(u).strip())
-        if absu.startswith("//"):
-            absu = "https:" + absu
-        if absu.startswith("http://"):
-            absu = "https://" + absu[len("http://"):]
-        return absu
-
-    return {
-        "name": normalize_for_output(name),
-        "brand": normalize_for_output(brand),
-        "model": normalize_for_output(model),
-        "price": price,
-        "spec": normalize_for_output(spec),
-        "imagelink": norm_url(imagelink),
-    }
-
-# ---------- Mini-Circuits 解析 ----------
-# ---------- Mini-Circuits 解析（修正版） ----------
-def _host_is_minicircuits(host: str) -> bool:
-    parts = host.lower().split(".")
-    return len(parts) >= 2 and parts[-2] == "minicircuits"
-
-def _grab_table_value_by_label(soup: BeautifulSoup, label_regex: str):
+def cache_key(url: str) -> str | None:
     """
-    在「label 在左、值在右」的表格或區塊抓取值。僅抓同一列/兄弟節點，避免越界誤抓（例如 VSWR）。
+    結果快取 / single-flight 的鍵：canonical_identity 加上地區（"thorlabs:LA1951-A@de"）。
+    thorlabs.com 與 thorlabs.de 的同一料號價格、幣別不同，不能共用同一筆結果。
     """
-    node = soup.find(lambda t: t.get_text(strip=True) and re.search(label_regex, t.get_text(strip=True), re.I))
-    if not node:
+    identity = canonical_identity(url)
+    if not identity:
         return None
+    region = vendors.region(url)
+    return f"{identity}@{region}" if region else identity
 
-    # 1) <th>Label</th><td>Value</td>
-    if node.name in ("th", "td"):
-        tr = node.find_parent("tr")
-        if tr:
-            cells = tr.find_all(["td", "th"])
-            # 找到 label cell，取其右側第一個 td/th
-            for i, c in enumerate(cells):
-                if c is node:
-                    # 右側下一格
-                    for j in range(i + 1, len(cells)):
-                        vtxt = clean_text(cells[j].get_text(" ", strip=True))
-                        if vtxt:
-                            return vtxt
-                    break
-
-    # 2) <div>Label</div><div>Value</div>
-    sib = node.find_next_sibling()
-    if sib and sib.get_text(strip=True):
-        return clean_text(sib.get_text(" ", strip=True))
-
-    # 3) 退而求其次：同層下一個 td
-    td = node.find_next("td")
-    if td and td.get_text(strip=True):
-        return clean_text(td.get_text(" ", strip=True))
-
-    return None
-
-def _minicircuits_pick_image(soup: BeautifulSoup, base_url: str) -> str | None:
-    # 1) 優先 /images/case_style/*.png
-    for tag in soup.find_all(["img", "source", "a", "link", "meta"]):
-        for attr in ("src", "data-src", "href", "data-original", "content"):
-            v = tag.get(attr)
-            if not v:
-                continue
-            v = v.strip()
-            if "/images/case_style/" in v and v.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
-                return urljoin(base_url, v)
-
-    # 2) OpenGraph / Twitter
-    for key in (("property", "og:image"), ("name", "og:image"),
-                ("property", "twitter:image"), ("name", "twitter:image")):
-        tag = soup.find("meta", {key[0]: key[1]})
-        if tag and tag.get("content"):
-            return urljoin(base_url, tag["content"].strip())
-
-    # 3) Heuristic
-    for img in soup.find_all("img"):
-        src = img.get("src") or img.get("data-src") or img.get("data-original")
-        if not src:
-            continue
-        cls = " ".join(img.get("class", [])).lower()
-        iid = (img.get("id") or "").lower()
-        if any(k in (cls + " " + iid) for k in ["product", "main", "detail", "primary"]):
-            return urljoin(base_url, src.strip())
-
-    return None
-
-def parse_minicircuits(url: str, soup: BeautifulSoup):
-    from urllib.parse import unquote_plus
-
-    host = urlparse(url).netloc
-    if not _host_is_minicircuits(host):
-        return None
+def analyze_page(url: str, page: PageIndex) -> dict:
+    # 依 host 查註冊表，直接交給對應的廠商解析器
+    hit = vendors.parse(url, page)
+    if hit:
+        return hit
 
-    brand = "Mini-Circuits"
-
-    # ---- 模型（型號）優先用 URL query 的 model（保留 +）----
-    qs = parse_qs(urlparse(url).query)
-    model = (qs.get("model", [None])[0] or "").strip() or None
-    if model:
-        model = unquote_plus(model)  # FW-15A%2B -> FW-15A+
-    # 從 <title> 右側的「| 型號」作為備援/修正（保留 +）
-    if True:
-        _title = clean_text((soup.find("title") or {}).get_text() if soup.find("title") else None) or ""
-        # 例：「15 dB Fixed Attenuator, DC - 12000 MHz, 50Ω | FW-15A+」
-        m = re.search(r"\|\s*([A-Z0-9][A-Z0-9+\-]+)\s*$", _title, re.I)
-        if m:
-            title_model = m.group(1).strip()
-            # 若 URL 沒帶 + 或不一致，偏好 title 的版本（常含 +）
-            if not model or (len(title_model) >= len(model) and "+" in title_model and "+" not in (model or "")):
-                model = title_model
-
-    # ---- 名稱與規格：先把「| 型號」切掉，再用逗號拆 name/spec ----
-    title_tag = soup.find("title")
-    title_text = clean_text(title_tag.get_text()) if title_tag else None
-    if not title_text:
-        og = soup.find("meta", property="og:title")
-        if og and og.get("content"):
-            title_text = clean_text(og["content"])
-
-    name = None
-    spec = None
-    if title_text:
-        # 切掉站名與型號尾巴
-        t = re.sub(r"\s*\|\s*Mini[-\s]?Circuits\s*$", "", title_text, flags=re.I)
-        t = re.sub(r"\s*\|\s*[A-Z0-9][A-Z0-9+\-]+\s*$", "", t, flags=re.I)  # 去掉「| FW-15A+」
-        # 現在 t 應該像「15 dB Fixed Attenuator, DC - 12000 MHz, 50Ω」
-        parts = [p.strip(" -–—,:") for p in t.split(",") if p.strip()]
-        if parts:
-            name = parts[0] or None
-            if len(parts) > 1:
-                # 其餘合併為 spec（通常包含頻寬與阻抗）
-                spec = ", ".join(parts[1:])
-
-    # 若還沒拿到頻寬/阻抗，補抓一遍（避免把 VSWR 當阻抗）
-    # 頻寬
-    if not spec or "MHz" not in spec:
-        freq = _grab_table_value_by_label(soup, r"\b(Frequency\s*Range|Frequency\s*Band)\b")
-        if not freq:
-            m = re.search(r"\bDC\s*-\s*[\d,]+(?:\.\d+)?\s*MHz\b", soup.get_text(" ", strip=True), re.I)
-            if m:
-                freq = m.group(0).replace(",", "")
-    else:
-        # 從 spec 裡切出第一段 MHz 片段
-        m = re.search(r"\b(?:DC|[\d\.]+)\s*-\s*[\d,]+(?:\.\d+)?\s*MHz\b", spec, re.I)
-        freq = m.group(0).replace(",", "") if m else None
-
-    # 阻抗（只接受含 ohm/Ω 字樣的數字，避免抓到 VSWR 1.4）
-    imp = None
-    # 先試表格的「Impedance」
-    imp_raw = _grab_table_value_by_label(soup, r"\bImpedance\b")
-    txt_pool = [imp_raw or "", spec or "", soup.get_text(" ", strip=True)]
-    for blob in txt_pool:
-        m = re.search(r"\b(\d+(?:\.\d+)?)\s*(?:ohms?|Ω|Ω)\b", blob, re.I)
-        if m:
-            imp = f"{m.group(1)}Ω"
-            break
-    if not imp:
-        # 常見 50 ohm
-        if re.search(r"\b50\s*(?:ohms?|Ω|Ω)\b", soup.get_text(" ", strip=True), re.I):
-            imp = "50Ω"
-
-    # 重建 spec：freq 與 imp 有就用這兩個，否則保留前面拆到的 spec
-    if freq or imp:
-        spec = ", ".join([x for x in [freq, imp] if x])
-    spec = normalize_for_output(spec)
-
-    # 主圖
-    imagelink = _minicircuits_pick_image(soup, url)
-    if not imagelink:
-        imagelink = find_image_generic(soup, url)
-
-    # 價格（先通用）
-    price = find_price_generic(soup)
-    if price is None:
-        # 再掃「Price $…」
-        txt = soup.get_text(" ", strip=True)
-        m = re.search(r"\bPrice\b[^$]*\$\s*([\d,]+(?:\.\d{1,2})?)", txt, re.I)
-        if m:
+    # 沒有對應廠商：通用/或告知未匹配
+    from extractors import find_image_generic
+    generic_img = find_image_generic(page, url)
+    if generic_img:
+        return {
+            "name": None, "brand": None, "model": None, "price": None, "currency": None,
+            "spec": None, "imagelink": generic_img
+        }
+
+    return {"error": "No parser matched"}
+
+def diff_results(a: dict, b: dict) -> dict:
+    """兩份解析結果逐欄比較，回傳 {欄位: [a 的值, b 的值]}（只列出不同的欄位）"""
+    keys = [k for k in dict.fromkeys([*a, *b]) if not k.startswith("_")]
+    return {k: [a.get(k), b.get(k)] for k in keys if a.get(k) != b.get(k)}
+
+def _mark_read_state(result: dict, state: str) -> dict:
+    """下載沒讀完（超過上限 / 時限到了）時在結果上註記；時限的 "_partial" 以擷取階段的為準"""
+    if "error" in result:
+        return result
+    if state == "truncated":
+        result["_truncated"] = True
+    elif state == "deadline":
+        d = deadline.current()
+        result.setdefault("_partial", d.info("read") if d is not None else {"stage": "read"})
+    return result
+
+def _shareable(result) -> bool:
+    """錯誤（可能只是暫時的）與時限內沒做完的部分結果不分享給同時查詢的其他呼叫端"""
+    return isinstance(result, dict) and "error" not in result and "_partial" not in result
+
+class Analyzer:
+    """
+    一個暖機的 session 加上可選的快取；serve/batch 模式下多執行緒共用同一個實例。
+    parser：BeautifulSoup backend（"auto" / "lxml" / "html.parser"）
+    compare_parsers：另外用其他 backend 各跑一次，把差異放進 "_parser_diff"
+    max_bytes：內文下載上限
+    head_first：</head> 到達時先試著只用 head 解析，欄位齊全就提早結束下載
+    timings：在輸出加上 "_timings"（抓取各階段、重試次數、位元組數、解析與各擷取器耗時）
+    timings_log：每筆查詢的計時以一行 JSON 附加到這個檔案
+    profile_path：以 cProfile 記錄每筆查詢，close() 時合併寫成 pstats 檔
+    scheduler：每個 host 的併發/速率上限、Retry-After 與斷路器（HostScheduler）
+    verify_images：> 0 時同時驗證前 N 個主圖候選（只讀檔頭），改用能下載且尺寸最大的那張
+    archive：CaptureArchive；把抓到的原始內容附加進封存，之後可用 replay 離線重跑擷取
+    group_parts：群組頁（例如 Thorlabs newgrouppage）另外把所有料號表解析成 "parts" 清單
+    singleflight：SingleFlight；多個行程同時查同一個網址時只有一個真的去抓，其他等著沿用結果
+    model_index：ModelIndex；網址的料號已在索引（庫存匯出 / 分析過的結果）裡就直接回傳該筆，不連網
+    deadline：每筆查詢的整體秒數預算（連線、排隊、重試、下載、擷取共用）；時間到時回傳已取得的欄位，
+      並標上 "_partial"（見 deadline.py）。None 表示不設時限
+    """
+    def __init__(self, pool_size: int = 10, http_cache=None, result_cache=None,
+                 parser: str = "auto", compare_parsers: bool = False,
+                 max_bytes: int = DEFAULT_MAX_BYTES, head_first: bool = False,
+                 timings: bool = False, timings_log: str | None = None, profile_path: str | None = None,
+                 scheduler: HostScheduler | None = None, verify_images: int = 0, archive=None,
+                 group_parts: bool = False, singleflight=None, model_index=None,
+                 deadline: float | None = None):
+        self.deadline = deadline
+        self.scheduler = scheduler or HostScheduler()
+        self.verify_images = verify_images
+        self.archive = archive
+        self.group_parts = group_parts
+        self.singleflight = singleflight
+        self.model_index = model_index
+        self._probe_pool = None
+        self._extract_pool = None
+        self._extract_slots = None
+        # 每個 host 的連線池至少要容得下該 host 的併發上限，連線才能重用
+        self._pool_size = max(pool_size, self.scheduler.concurrency)
+        self._sess = None
+        self.http_cache = http_cache
+        self.result_cache = result_cache
+        self.parser = resolve_backend(parser)
+        self.compare_parsers = compare_parsers
+        self.max_bytes = max_bytes
+        self.head_first = head_first
+        self.timings = timings
+        self.timings_log = timings_log
+        self.profile_path = profile_path
+        self._stats = None
+        self._instr_lock = threading.Lock()
+
+    @property
+    def sess(self):
+        """第一次真的要連網時才建立 session（連帶 import requests）；結果快取命中不必付這個成本"""
+        if self._sess is None:
+            with self._instr_lock:
+                if self._sess is None:
+                    self._sess = make_session(pool_size=self._pool_size, status_retries=False)
+        return self._sess
+
+    def _get(self, url: str):
+        d = deadline.current()
+        timeout = d.request_timeout() if d is not None else 25
+        if self.http_cache is None:
+            return self.sess.get(url, timeout=timeout, stream=True)
+        from http_cache import cached_get
+        return cached_get(self.sess, url, self.http_cache, timeout=timeout, stream=True)
+
+    def fetch(self, url: str, host: str):
+        """
+        在 scheduler.slot() 內呼叫。每次送出前依 host 的 token bucket 排隊；
+        429/5xx 有 Retry-After 就暫停整個 host，否則指數退避。
+        一個網址的最終成敗只算一次進斷路器。
+        有查詢時限時，排隊與退避都不會超過抓取預算：等不及下一次嘗試就用這次的回應。
+        """
+        d = deadline.current()
+        waited = 0.0
+        for attempt in range(STATUS_RETRIES + 1):
+            waited += self.scheduler.wait_turn(host, limit=d.fetch_remaining() if d is not None else None)
             try:
-                price = float(m.group(1).replace(",", ""))
+                resp = self._get(url)
             except Exception:
-                price = None
-
-    # URL 正規化
-    def norm_url(u):
-        if not u:
+                self.scheduler.record(host, ok=False)
+                raise
+            if resp.status_code not in RETRY_STATUSES or attempt == STATUS_RETRIES:
+                break
+            delay = parse_retry_after(resp.headers.get("Retry-After"))
+            backoff = delay if delay is not None else STATUS_BACKOFF * (2 ** attempt)
+            if d is not None and backoff >= d.fetch_remaining():
+                break
+            resp.close()
+            if delay is not None:
+                self.scheduler.pause(host, delay)
+            else:
+                time.sleep(backoff)
+
+        self.scheduler.record(host, ok=resp.status_code not in RETRY_STATUSES)
+        t = timings.current()
+        if t is not None:
+            t.fetch.update(status_retries=attempt, wait_ms=round(waited * 1000, 3))
+        return resp
+
+    def _read_body(self, url: str, resp, on_head=None):
+        """串流讀取 body；順便記錄計時、寫入封存與 HTTP 快取。回傳 (body, state)"""
+        t0 = time.perf_counter()
+        d = deadline.current()
+        body, state = read_response(resp, self.max_bytes, on_head, d.fetch_expires if d is not None else None)
+        t = timings.current()
+        if t is not None:
+            t.fetch.update(download_ms=round((time.perf_counter() - t0) * 1000, 3),
+                           bytes=len(body), read_state=state)
+        if self.archive is not None:
+            self.archive.append(url, resp, body, state)
+        if state == "complete" and self.http_cache is not None and not getattr(resp, "from_cache", False):
+            self.http_cache.store(url, resp, body)
+        return body, state
+
+    def _read(self, url: str, resp):
+        """
+        讀 body 並解析；回傳 (result, markup, page)。
+        head-first 命中時 markup 只有 head，且不寫入 HTTP 快取（內容不完整）。
+        """
+        early = {}
+
+        def on_head(head: bytes) -> bool:
+            markup = head.decode(_response_encoding(resp, head), errors="replace")
+            result, page = self._parse(url, markup)
+            if "error" not in result and all(result.get(k) is not None for k in HEAD_REQUIRED_FIELDS):
+                early["result"], early["markup"], early["page"] = result, markup, page
+                return True
+            return False
+
+        # 料號表在 body 裡，群組頁不能只看 head
+        head_first = self.head_first and not self._wants_parts(url)
+        body, state = self._read_body(url, resp, on_head if head_first else None)
+        if state == "head":
+            return early["result"], early["markup"], early["page"]
+
+        markup = body.decode(_response_encoding(resp, body), errors="replace")
+        result, page = self._parse(url, markup)
+        return _mark_read_state(result, state), markup, page
+
+    def _parse(self, url: str, markup: str):
+        with timings.span("parse"):
+            page = build_page(markup, self.parser)
+        with timings.span("extract"):
+            d = deadline.current()
+            if d is None:
+                return self._extract(url, page), page
+            return self._extract_within(url, page, d), page
+
+    def _extract_within(self, url: str, page: PageIndex, d) -> dict:
+        """
+        有時限的擷取：先取便宜的欄位（title / meta / JSON-LD，見 extractors.quick_fields），
+        完整擷取（廠商解析、全文價格掃描、群組料號表）放到有上限的執行緒池，剩餘時間內做完就用完整結果，
+        否則回傳前者（brand 由網址的廠商補上）並標上 "_partial"。逾時的工作不會被中斷，會繼續佔著名額
+        直到跑完；名額用完時不再送出新工作，直接回傳部分結果（"saturated": true）。
+        """
+        from concurrent.futures import TimeoutError as FutureTimeout
+        from extractors import quick_fields
+
+        quick = quick_fields(page, url)
+        quick["brand"] = vendors.brand(url)
+        identity = canonical_identity(url)
+        if identity:
+            quick["model"] = identity.partition(":")[2]
+
+        t = timings.current()
+
+        def run():
+            try:
+                if t is None:
+                    return self._extract(url, page), None
+                with timings.recording() as wt:
+                    return self._extract(url, page), wt
+            finally:
+                slots.release()
+
+        extra = {}
+        left = d.remaining()
+        if left > 0:
+            pool, slots = self._extract_executor()
+            # 名額全被逾時還沒跑完的擷取佔住：不再排隊，直接回傳部分結果
+            if slots.acquire(blocking=False):
+                fut = pool.submit(run)
+                try:
+                    result, wt = fut.result(timeout=left)
+                except FutureTimeout:
+                    pass
+                else:
+                    if wt is not None:
+                        t.merge(wt)
+                    return result
+            else:
+                extra["saturated"] = True
+
+        if not any(v is not None for v in quick.values()):
+            return {"error": f"Deadline exceeded ({d.budget:.1f}s budget) before any field was extracted"}
+        return {**quick, "_partial": d.info("extract", missing=[k for k, v in quick.items() if v is None], **extra)}
+
+    def _extract_executor(self):
+        """有時限擷取用的執行緒池與名額（第一次用到才建）；名額數 = 執行緒數，工作不會在池裡排隊"""
+        with self._instr_lock:
+            if self._extract_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                n = max(MIN_EXTRACT_WORKERS, self._pool_size)
+                self._extract_pool = ThreadPoolExecutor(max_workers=n, thread_name_prefix="extract")
+                self._extract_slots = threading.BoundedSemaphore(n)
+            return self._extract_pool, self._extract_slots
+
+    def _extract(self, url: str, page: PageIndex) -> dict:
+        result = analyze_page(url, page)
+        if self._wants_parts(url) and "error" not in result:
+            parts = vendors.parse_group(url, page)
+            if parts is not None:
+                result = {**result, "parts": parts}
+        return result
+
+    def _wants_parts(self, url: str) -> bool:
+        return self.group_parts and vendors.is_group_page(url)
+
+    def _identity(self, url: str) -> str | None:
+        """結果快取的鍵（見 cache_key）；群組頁帶 parts 的結果與單一料號的不同，不共用快取"""
+        if self.result_cache is None or self._wants_parts(url):
+            return None
+        return cache_key(url)
+
+    def _verify_image(self, url: str, page: PageIndex, result: dict) -> dict:
+        """探測主圖候選；找到可用的就換成尺寸最大的那張，並附上 _image（格式/尺寸）"""
+        from concurrent.futures import ThreadPoolExecutor
+        from extractors import image_candidates_generic
+        from image_probe import pick_best
+
+        candidates = vendors.image_candidates(url, page, result)
+        if candidates is None:
+            candidates = image_candidates_generic(page, url)
+        current = result.get("imagelink")
+        candidates = [current, *candidates] if current else candidates
+        if not candidates:
+            return result
+
+        with self._instr_lock:
+            if self._probe_pool is None:
+                self._probe_pool = ThreadPoolExecutor(max_workers=max(4, self.verify_images * 2))
+        d = deadline.current()
+        with timings.span("image_probe"):
+            best = pick_best(self.sess, candidates, limit=self.verify_images,
+                             scheduler=self.scheduler, pool=self._probe_pool,
+                             stop_at=d.expires if d is not None else None)
+        if best is None:
+            return {**result, "_image": {"verified": False}}
+        return {
+            **result,
+            "imagelink": best["url"],
+            "_image": {"verified": True, "format": best["format"], "width": best["width"],
+                       "height": best["height"], "probed": best["probed"]},
+        }
+
+    def analyze(self, url: str, budget: float | None = None) -> dict:
+        """
+        抓取 + 解析單一網址；錯誤一律以 {"error": ...} 回傳，不丟例外。
+        budget：這筆查詢的秒數預算，預設用 self.deadline（serve 會扣掉排隊時間後傳入）
+        """
+        with deadline.budget(self.deadline if budget is None else budget):
+            return self._instrumented(url)
+
+    def _instrumented(self, url: str) -> dict:
+        if not (self.timings or self.timings_log or self.profile_path):
+            return self._analyze(url)
+
+        prof = None
+        if self.profile_path:
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+        try:
+            with timings.recording() as t:
+                result = self._analyze(url)
+        finally:
+            if prof is not None:
+                prof.disable()
+                self._merge_profile(prof)
+
+        report = t.as_dict()
+        if self.timings_log:
+            self._log_timings(url, result, report)
+        if self.timings:
+            result = {**result, "_timings": report}
+        return result
+
+    def _merge_profile(self, prof):
+        import pstats
+        with self._instr_lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(prof)
+            else:
+                self._stats.add(prof)
+
+    def _log_timings(self, url: str, result: dict, report: dict):
+        line = json.dumps({
+            "ts": time.time(), "url": url, "ok": "error" not in result,
+            "error": result.get("error"), "_timings": report,
+        }, ensure_ascii=False)
+        with self._instr_lock, open(self.timings_log, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def close(self):
+        """寫出累積的 cProfile 統計（有開 --profile 時），並關閉圖片探測與有時限擷取用的執行緒池"""
+        with self._instr_lock:
+            if self._stats is not None and self.profile_path:
+                self._stats.dump_stats(self.profile_path)
+            if self._probe_pool is not None:
+                self._probe_pool.shutdown(wait=False)
+                self._probe_pool = None
+            if self._extract_pool is not None:
+                self._extract_pool.shutdown(wait=False)
+                self._extract_pool = None
+
+    def _analyze(self, url: str) -> dict:
+        if self.model_index is not None and not self._wants_parts(url):
+            known = self._indexed(url)
+            if known is not None:
+                return known
+
+        identity = self._identity(url)
+        if identity:
+            with timings.span("result_cache"):
+                hit = self.result_cache.get(identity)
+            if hit is not None:
+                t = timings.current()
+                if t is not None:
+                    t.fetch["result_cache"] = "hit"
+                return hit
+
+        if self.singleflight is None:
+            return self._fetch_and_parse(url, identity)
+        d = deadline.current()
+        with timings.span("single_flight"):
+            result, role = self.singleflight.do(self._flight_key(url, identity),
+                                                lambda: self._fetch_and_parse(url, identity),
+                                                wait=max(0.0, d.fetch_remaining()) if d is not None else None,
+                                                share=_shareable)
+        t = timings.current()
+        if t is not None:
+            t.fetch["single_flight"] = role
+        return result
+
+    def _indexed(self, url: str) -> dict | None:
+        identity = canonical_identity(url)
+        # index build 重建了索引檔就換新的（常駐的 serve 行程不必重啟）
+        self.model_index = index = self.model_index.refreshed()
+        entry = index.get(identity) if identity else None
+        if entry is None:
             return None
-        absu = urljoin(url, str(u).strip())
-        if absu.startswith("//"):
-            absu = "https:" + absu
-        if absu.startswith("http://"):
-            absu = "https://" + absu[len("http://"):]
-        return absu
-
-    return {
-        "name": normalize_for_output(name),
-        "brand": normalize_for_output(brand),
-        "model": normalize_for_output(model),   # 會保留 '+'
-        "price": price,
-        "spec": spec,
-        "imagelink": norm_url(imagelink),
-    }
+        t = timings.current()
+        if t is not None:
+            t.fetch["model_index"] = "hit"
+        ref = {k: entry[k] for k in ("identity", "source", "id", "url") if entry.get(k) is not None}
+        return {**entry["record"], "_indexed": ref}
+
+    def _flight_key(self, url: str, identity: str | None) -> str:
+        # 會改變輸出的選項不同就不共用結果
+        return "|".join(map(str, (identity or url.strip(), PARSER_VERSION, self.parser, self.compare_parsers,
+                                  self.group_parts, self.verify_images, self.max_bytes, self.head_first)))
+
+    def _fetch_and_parse(self, url: str, identity: str | None) -> dict:
+        d = deadline.current()
+        try:
+            with self.scheduler.slot(url, timeout=d.fetch_remaining() if d is not None else None) as host:
+                with timings.span("connect_and_headers"):
+                    resp = self.fetch(url, host)
+                t = timings.current()
+                if t is not None:
+                    retries = getattr(getattr(resp, "raw", None), "retries", None)
+                    t.fetch.update(
+                        status=resp.status_code,
+                        headers_ms=round(resp.elapsed.total_seconds() * 1000, 3),
+                        retries=len(retries.history) if retries is not None else 0,
+                        from_cache=bool(getattr(resp, "from_cache", False)),
+                    )
+                try:
+                    resp.raise_for_status()
+                    result, markup, page = self._read(url, resp)
+                finally:
+                    resp.close()
+        except Exception as e:
+            # 排隊/節流等不到（TimeoutError）或抓取預算已用完，都算時限到了
+            if d is not None and (isinstance(e, (TimeoutError, deadline.DeadlineExceeded)) or d.fetch_remaining() <= 0):
+                return {"error": f"Deadline exceeded ({d.budget:.1f}s budget) while fetching page: {e}"}
+            return {"error": f"Failed to fetch page: {e}"}
+
+        # 部分結果：探測圖片、parser 比對都省了，也不寫進結果快取
+        if "_partial" in result:
+            return result
+
+        # 頁面的 host 名額已釋放才探測圖片（圖片常在同一個 host，避免自己卡住自己）
+        if self.verify_images > 0 and "error" not in result and (d is None or d.remaining() > 0):
+            result = self._verify_image(url, page, result)
+
+        if self.compare_parsers:
+            result = self._compare(url, markup, result)
+        elif identity and "error" not in result:
+            self.result_cache.put(identity, result, url=url)
+        return result
+
+    def fetch_markup(self, url: str):
+        """只抓取不解析（經過 scheduler / HTTP 快取 / 封存）；回傳 (markup, state)，失敗丟例外"""
+        with self.scheduler.slot(url) as host:
+            resp = self.fetch(url, host)
+            try:
+                resp.raise_for_status()
+                body, state = self._read_body(url, resp)
+            finally:
+                resp.close()
+        return body.decode(_response_encoding(resp, body), errors="replace"), state
+
+    def extract(self, url: str, markup: str) -> dict:
+        """解析已經抓到的 markup（crawl 用來處理群組頁，不必再抓一次）"""
+        return self._parse(url, markup)[0]
+
+    def refresh(self, url: str, known_fingerprint: str | None = None):
+        """
+        增量更新用：抓取後先算相關區域的指紋，與 known_fingerprint 相同就不解析。
+        回傳 (fingerprint, result)；指紋未變時 result 為 None，抓取失敗時 fingerprint 為 None。
+        """
+        from refresh_state import page_fingerprint
 
-# ---------- Main ----------
-def main():
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "Usage: python analyze_cli.py <url>"}, ensure_ascii=False))
-        sys.exit(1)
+        try:
+            markup, state = self.fetch_markup(url)
+        except Exception as e:
+            return None, {"error": f"Failed to fetch page: {e}"}
+
+        fingerprint = page_fingerprint(markup)
+        if fingerprint == known_fingerprint:
+            return fingerprint, None
+
+        result, page = self._parse(url, markup)
+        result = _mark_read_state(result, state)
+        if "_partial" in result:
+            return fingerprint, result
+        if self.verify_images > 0 and "error" not in result:
+            result = self._verify_image(url, page, result)
+        identity = self._identity(url)
+        if identity and "error" not in result:
+            self.result_cache.put(identity, result, url=url)
+        return fingerprint, result
+
+    def _compare(self, url: str, markup: str, result: dict) -> dict:
+        diffs = {}
+        for other in PARSER_BACKENDS:
+            if other == self.parser or resolve_backend(other) != other:
+                continue
+            d = diff_results(result, self._extract(url, build_page(markup, other)))
+            if d:
+                diffs[other] = d
+        return {**result, "_parser": self.parser, "_parser_diff": diffs}
+
+# ---------- 常駐模式（JSON lines over stdin/stdout） ----------
+def serve(analyzer: Analyzer, workers: int = 8):
+    """
+    每行輸入一個請求：{"id": ..., "url": "...", "deadline": 秒數（可省略，預設 --deadline）}
+    每行輸出一個回應：{"id": ..., "result": {...}}（完成順序，不保證與輸入同序）
+    整個行程共用一個 session（連線池），避免每次查詢都重新啟動直譯器與 TLS 握手。
+    時限從讀到請求那一刻起算，在執行緒池排隊的時間也算在內。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    out_lock = threading.Lock()
+
+    def emit(obj):
+        line = json.dumps(obj, ensure_ascii=False)
+        with out_lock:
+            sys.stdout.write(line + "\n")
+            sys.stdout.flush()
+
+    def handle(req_id, url, budget, received):
+        if budget is not None:
+            budget = max(0.001, budget - (time.monotonic() - received))
+        try:
+            result = analyzer.analyze(url, budget)
+        except Exception as e:  # 解析器意外錯誤不能拖垮整個常駐行程
+            result = {"error": f"Analyzer crashed: {e}"}
+        emit({"id": req_id, "result": result})
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                req = json.loads(line)
+            except Exception:
+                emit({"id": None, "result": {"error": "Invalid JSON request"}})
+                continue
+            req_id = req.get("id") if isinstance(req, dict) else None
+            url = req.get("url") if isinstance(req, dict) else None
+            if not isinstance(url, str) or not url.strip():
+                emit({"id": req_id, "result": {"error": "Missing 'url' in request"}})
+                continue
+            budget = req.get("deadline", analyzer.deadline)
+            if not isinstance(budget, (int, float)) or isinstance(budget, bool) or budget <= 0:
+                budget = analyzer.deadline
+            pool.submit(handle, req_id, url.strip(), budget, time.monotonic())
+
+# ---------- 批次模式（NDJSON 串流輸出） ----------
+def _iter_urls(stream):
+    """一行一個網址；略過空行與 # 註解，重複網址只處理一次"""
+    seen = set()
+    for line in stream:
+        u = line.strip()
+        if not u or u.startswith("#") or u in seen:
+            continue
+        seen.add(u)
+        yield u
 
-    url = sys.argv[1]
+def run_batch(urls, analyzer: Analyzer, workers: int = 16, out=None, err=None) -> dict:
+    """
+    以有上限的執行緒池同時抓取/解析；每完成一筆就輸出一行
+    {"url": <輸入網址>, "result": {...}}（完成順序）。
+    結束時把統計摘要寫到 err（預設 stderr），stdout 只保留逐筆結果。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    out = out or sys.stdout
+    err = err or sys.stderr
+    out_lock = threading.Lock()
+    # 限制排隊中的工作數，避免大量輸入一次塞滿記憶體
+    slots = threading.BoundedSemaphore(workers * 4)
+    stats = {"total": 0, "ok": 0, "failed": 0, "failures": []}
+    t0 = time.monotonic()
+
+    def done(url, fut):
+        try:
+            result = fut.result()
+        except Exception as e:
+            result = {"error": f"Analyzer crashed: {e}"}
+        line = json.dumps({"url": url, "result": result}, ensure_ascii=False)
+        with out_lock:
+            out.write(line + "\n")
+            out.flush()
+            if "error" in result:
+                stats["failed"] += 1
+                stats["failures"].append({"url": url, "error": result["error"]})
+            else:
+                stats["ok"] += 1
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for url in urls:
+            slots.acquire()
+            stats["total"] += 1
+            fut = pool.submit(analyzer.analyze, url)
+            fut.add_done_callback(lambda f, u=url: done(u, f))
+
+    stats["elapsed_s"] = round(time.monotonic() - t0, 3)
+    err.write(json.dumps({"summary": stats}, ensure_ascii=False) + "\n")
+    err.flush()
+    return stats
+
+# ---------- 增量更新 ----------
+def run_refresh(urls, analyzer: Analyzer, state, workers: int = 16, emit_new: bool = False,
+                out=None, err=None) -> dict:
+    """
+    對每個網址：抓取 → 算指紋 → 指紋沒變就略過擷取；有變才解析，
+    並且只在 price / spec / imagelink 真的改變時輸出
+    {"url","identity","changes": {欄位: [舊, 新]},"result"}。
+    第一次看到的網址只記錄狀態（emit_new 時也輸出，帶 "new": true）。
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from refresh_state import WATCHED_FIELDS
+
+    out = out or sys.stdout
+    err = err or sys.stderr
+    out_lock = threading.Lock()
+    slots = threading.BoundedSemaphore(workers * 4)
+    stats = {"total": 0, "unchanged": 0, "reextracted": 0, "changed": 0, "new": 0, "failed": 0, "failures": []}
+    t0 = time.monotonic()
+
+    def handle(url):
+        known_fp, before = state.get(url)
+        fingerprint, result = analyzer.refresh(url, known_fp)
+        if fingerprint is None or (result is not None and "error" in result):
+            with out_lock:
+                stats["failed"] += 1
+                stats["failures"].append({"url": url, "error": result["error"]})
+            return
+        if result is None:
+            state.touch(url)
+            with out_lock:
+                stats["unchanged"] += 1
+            return
+
+        identity = canonical_identity(url)
+        changes = {k: v for k, v in diff_results(before or {}, result).items() if k in WATCHED_FIELDS}
+        state.put(url, identity, fingerprint, result, changed=bool(changes) or before is None)
+        rec = None
+        with out_lock:
+            stats["reextracted"] += 1
+            if before is None:
+                stats["new"] += 1
+                if emit_new:
+                    rec = {"url": url, "identity": identity, "new": True, "result": result}
+            elif changes:
+                stats["changed"] += 1
+                rec = {"url": url, "identity": identity, "changes": changes, "result": result}
+            if rec is not None:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                out.flush()
+
+    def done(fut):
+        try:
+            fut.result()
+        except Exception as e:
+            with out_lock:
+                stats["failed"] += 1
+                stats["failures"].append({"error": f"Analyzer crashed: {e}"})
+        slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for url in urls:
+            slots.acquire()
+            stats["total"] += 1
+            pool.submit(handle, url).add_done_callback(done)
+
+    stats["elapsed_s"] = round(time.monotonic() - t0, 3)
+    err.write(json.dumps({"summary": stats}, ensure_ascii=False) + "\n")
+    err.flush()
+    return stats
+
+# ---------- 離線重跑（capture archive） ----------
+def _replay_worker(job):
+    """在子行程中執行：解壓一筆封存、解碼、建樹、擷取；不碰網路"""
+    blob, parser = job
+    from capture_archive import decode_member
+    header, body = decode_member(blob)
+    url = header["url"]
+    if header.get("status") and header["status"] >= 400:
+        return url, {"error": f"Archived HTTP status {header['status']}"}
+    ctype = next((v for k, v in (header.get("headers") or {}).items() if k.lower() == "content-type"), None)
+    markup = body.decode(_body_encoding(ctype, header.get("encoding"), body), errors="replace")
     try:
-        sess = make_session()
-        resp = sess.get(url, timeout=25)
-        resp.raise_for_status()
+        result = analyze_page(url, build_page(markup, parser))
     except Exception as e:
-        print(json.dumps({"error": f"Failed to fetch page: {e}"}, ensure_ascii=False))
-        sys.exit(0)
+        result = {"error": f"Analyzer crashed: {e}"}
+    return url, _mark_read_state(result, header.get("state"))
+
+def _load_baseline(path: str) -> dict:
+    """batch / replay 的輸出（每行 {"url","result"}）-> {識別鍵或網址: result}"""
+    base = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(rec, dict) or "url" not in rec or not isinstance(rec.get("result"), dict):
+                continue
+            base[canonical_identity(rec["url"]) or rec["url"]] = rec["result"]
+    return base
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+def run_replay(path: str, workers: int | None = None, parser: str = "auto", baseline: dict | None = None,
+               changed_only: bool = False, out=None, err=None) -> dict:
+    """
+    以 ProcessPoolExecutor 對封存中每個網址（最新一筆）重跑擷取，BeautifulSoup 的 CPU 成本分散到各核心。
+    每筆輸出 {"url","identity","result"}；有 baseline 時加上 "changes": {欄位: [舊, 新]}。
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from capture_archive import latest_by_url, read_member
+
+    out = out or sys.stdout
+    err = err or sys.stderr
+    parser = resolve_backend(parser)
+    stats = {"total": 0, "ok": 0, "failed": 0, "changed": 0, "new": 0}
+    t0 = time.monotonic()
+
+    entries = list(latest_by_url(path).values())
+    # 一次只把一個視窗的壓縮內容讀進記憶體
+    window = (workers or os.cpu_count() or 1) * 16
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i in range(0, len(entries), window):
+            jobs = [(read_member(path, off, length), parser) for off, length, _ in entries[i:i + window]]
+            for url, result in pool.map(_replay_worker, jobs, chunksize=4):
+                stats["total"] += 1
+                stats["failed" if "error" in result else "ok"] += 1
+                identity = canonical_identity(url)
+                rec = {"url": url, "identity": identity, "result": result}
+                if baseline is not None:
+                    before = baseline.get(identity or url)
+                    if before is None:
+                        stats["new"] += 1
+                    else:
+                        changes = diff_results(before, result)
+                        if changes:
+                            stats["changed"] += 1
+                            rec["changes"] = changes
+                    if changed_only and "changes" not in rec:
+                        continue
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    out.flush()
+    stats["elapsed_s"] = round(time.monotonic() - t0, 3)
+    err.write(json.dumps({"summary": stats}, ensure_ascii=False) + "\n")
+    err.flush()
+    return stats
 
-    # Mini-Circuits 優先
-    hit = parse_minicircuits(url, soup)
-    if hit:
-        print(json.dumps(hit, ensure_ascii=False))
+# ---------- Main ----------
+USAGE = (
+    "Usage: python analyze_cli.py <url> [cache flags]\n"
+    "       python analyze_cli.py serve [--workers N] [cache flags]\n"
+    "       python analyze_cli.py batch [FILE|-] [--workers N] [cache flags]\n"
+    "       python analyze_cli.py invalidate [URL|IDENTITY ...] [--all|--purge]\n"
+    "       python analyze_cli.py images [FILE|-] [--out DIR] [--workers N] [--gc]\n"
+    "       python analyze_cli.py refresh [FILE|-] [--state PATH] [--emit-new] [cache flags]\n"
+    "       python analyze_cli.py replay [ARCHIVE] [--workers N] [--baseline FILE] [--changed-only]\n"
+    "       python analyze_cli.py crawl SEED_URL ... [--max-depth N] [--max-pages N] [--max-products N] [cache flags]\n"
+    "       python analyze_cli.py index build [--export FILE ...] [--result-cache [PATH]] | index lookup QUERY ...\n"
+    "Cache flags: --http-cache [DIR] --result-cache [PATH] --single-flight [DIR] --model-index [PATH]\n"
+    "Parser flags: --parser {auto,lxml,html.parser} --compare-parsers --group-parts\n"
+    "Fetch flags: --max-bytes N --head-first --verify-images [N] --archive [PATH] --deadline SEC\n"
+    "Politeness: --host-concurrency N --host-rate R --host-burst N --breaker-failures N --breaker-cooldown SEC\n"
+    "Instrumentation: --timings --timings-log PATH --profile PATH"
+)
+
+def _add_common_args(ap):
+    g = ap.add_argument_group("cache")
+    g.add_argument("--http-cache", nargs="?", const="", default=None, metavar="DIR",
+                   help="啟用 HTTP 回應磁碟快取（預設目錄 ProductInformation/.http_cache）")
+    g.add_argument("--http-cache-ttl", type=float, default=7 * 86400, metavar="SEC",
+                   help="快取項目未重新驗證的存活秒數")
+    g.add_argument("--http-cache-max-mb", type=float, default=512, metavar="MB",
+                   help="快取總大小上限，超過依 LRU 淘汰")
+    g.add_argument("--result-cache", nargs="?", const="", default=None, metavar="PATH",
+                   help="啟用解析結果快取（SQLite，預設 ProductInformation/.result_cache.sqlite）")
+    g.add_argument("--single-flight", nargs="?", const="", default=None, metavar="DIR",
+                   help="跨行程合併同一網址的同時查詢：只有一個行程抓取，其他等它的結果"
+                        "（OS 檔案鎖，預設目錄 ProductInformation/.inflight）")
+    g.add_argument("--model-index", nargs="?", const="", default=None, metavar="PATH",
+                   help="先查本地型號索引（analyze_cli.py index build 產生，預設 ProductInformation/.model_index.json），"
+                        "料號已存在就直接回傳該筆、不連網")
+    g.add_argument("--result-cache-ttl", type=float, default=86400, metavar="SEC",
+                   help="解析結果的存活秒數")
+    g = ap.add_argument_group("parsing")
+    g.add_argument("--parser", choices=("auto", *PARSER_BACKENDS), default="auto",
+                   help="HTML tree builder；auto = 有 lxml 用 lxml，否則 html.parser")
+    g.add_argument("--group-parts", action="store_true",
+                   help="群組頁一次解析所有料號表，輸出加上 parts: [{model, name, spec, price, currency, imagelink, url}]")
+    g.add_argument("--compare-parsers", action="store_true",
+                   help="同時用其他 backend 解析並輸出欄位差異（_parser_diff）")
+    g = ap.add_argument_group("fetching")
+    g.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, metavar="N",
+                   help="內文下載上限（bytes），超過就用已收到的部分解析")
+    g.add_argument("--head-first", action="store_true",
+                   help="</head> 到達時先用 head 解析，必要欄位齊全就不下載其餘內文")
+    g.add_argument("--verify-images", nargs="?", type=int, const=4, default=0, metavar="N",
+                   help="同時探測前 N 個主圖候選（只讀檔頭，預設 4），改用能下載且尺寸最大的圖")
+    g.add_argument("--archive", nargs="?", const="", default=None, metavar="PATH",
+                   help="把抓到的原始 HTML 與標頭附加到封存檔（預設 ProductInformation/.capture_archive.gz）")
+    g.add_argument("--deadline", type=float, default=None, metavar="SEC",
+                   help="每筆查詢的整體時間預算（連線、重試、下載、擷取共用）；時間到時回傳已取得的欄位並標上 _partial")
+    g = ap.add_argument_group("politeness")
+    g.add_argument("--host-concurrency", type=int, default=4, metavar="N",
+                   help="每個 host 同時進行的請求數上限")
+    g.add_argument("--host-rate", type=float, default=2.0, metavar="R",
+                   help="每個 host 平均每秒請求數；0 = 不限速")
+    g.add_argument("--host-burst", type=float, default=4.0, metavar="N",
+                   help="每個 host 可累積的突發請求數")
+    g.add_argument("--breaker-failures", type=int, default=5, metavar="N",
+                   help="同一 host 連續失敗幾個網址就暫時停止抓取（斷路器）")
+    g.add_argument("--breaker-cooldown", type=float, default=60.0, metavar="SEC",
+                   help="斷路器跳脫後的冷卻秒數，期間該 host 的網址直接失敗")
+    g = ap.add_argument_group("instrumentation")
+    g.add_argument("--timings", action="store_true",
+                   help="在輸出加上 _timings（抓取階段、重試次數、位元組數、解析與各擷取器耗時）")
+    g.add_argument("--timings-log", metavar="PATH",
+                   help="每筆查詢的計時以 JSON lines 附加到此檔（可做延遲儀表板）")
+    g.add_argument("--profile", metavar="PATH",
+                   help="以 cProfile 記錄並在結束時寫出 pstats 檔")
+
+def _open_result_cache(path: str, ttl: float = 86400):
+    from result_cache import ResultCache, DEFAULT_PATH
+    return ResultCache(path or DEFAULT_PATH, version=PARSER_VERSION, ttl=ttl)
+
+def _build_analyzer(args, pool_size: int = 10) -> Analyzer:
+    http_cache = None
+    if args.http_cache is not None:
+        from http_cache import HttpCache, DEFAULT_DIR
+        http_cache = HttpCache(
+            args.http_cache or DEFAULT_DIR,
+            ttl=args.http_cache_ttl,
+            max_bytes=int(args.http_cache_max_mb * 1024 * 1024),
+        )
+    result_cache = None
+    if args.result_cache is not None:
+        result_cache = _open_result_cache(args.result_cache, ttl=args.result_cache_ttl)
+    scheduler = HostScheduler(
+        concurrency=args.host_concurrency, rate=args.host_rate, burst=args.host_burst,
+        failures=args.breaker_failures, cooldown=args.breaker_cooldown,
+    )
+    archive = None
+    if args.archive is not None:
+        from capture_archive import CaptureArchive, DEFAULT_PATH
+        archive = CaptureArchive(args.archive or DEFAULT_PATH)
+    singleflight = None
+    if args.single_flight is not None:
+        from singleflight import SingleFlight, DEFAULT_DIR
+        singleflight = SingleFlight(args.single_flight or DEFAULT_DIR)
+    model_index = None
+    if args.model_index is not None:
+        from model_index import ModelIndex, DEFAULT_PATH
+        model_index = ModelIndex.load(args.model_index or DEFAULT_PATH)
+    return Analyzer(pool_size=pool_size, http_cache=http_cache, result_cache=result_cache,
+                    parser=args.parser, compare_parsers=args.compare_parsers,
+                    max_bytes=max(1024, args.max_bytes), head_first=args.head_first,
+                    timings=args.timings, timings_log=args.timings_log, profile_path=args.profile,
+                    scheduler=scheduler, verify_images=max(0, args.verify_images), archive=archive,
+                    group_parts=args.group_parts, singleflight=singleflight, model_index=model_index,
+                    deadline=args.deadline if args.deadline and args.deadline > 0 else None)
+
+def _cmd_serve(argv):
+    import argparse
+    ap = argparse.ArgumentParser(prog="analyze_cli.py serve")
+    ap.add_argument("--workers", type=int, default=8, help="同時處理的查詢數")
+    _add_common_args(ap)
+    args = ap.parse_args(argv)
+    workers = max(1, args.workers)
+    analyzer = _build_analyzer(args, pool_size=max(workers, 10))
+    try:
+        serve(analyzer, workers=workers)
+    finally:
+        analyzer.close()
+
+def _cmd_batch(argv):
+    import argparse
+    ap = argparse.ArgumentParser(prog="analyze_cli.py batch")
+    ap.add_argument("file", nargs="?", default="-", help="網址清單檔，'-' 代表 stdin")
+    ap.add_argument("--workers", type=int, default=16, help="同時抓取的網址數")
+    _add_common_args(ap)
+    args = ap.parse_args(argv)
+    workers = max(1, args.workers)
+    analyzer = _build_analyzer(args, pool_size=max(workers, 10))
+    try:
+        if args.file == "-":
+            stats = run_batch(_iter_urls(sys.stdin), analyzer, workers=workers)
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                stats = run_batch(_iter_urls(f), analyzer, workers=workers)
+    finally:
+        analyzer.close()
+    sys.exit(0 if stats["failed"] == 0 else 2)
+
+def _cmd_invalidate(argv):
+    import argparse
+    ap = argparse.ArgumentParser(prog="analyze_cli.py invalidate")
+    ap.add_argument("targets", nargs="*", help="網址或識別鍵（如 thorlabs:LA1951-A，清掉所有地區的結果）")
+    ap.add_argument("--all", action="store_true", help="清空整個結果快取")
+    ap.add_argument("--purge", action="store_true", help="只清掉過期或舊 parser 版本的項目")
+    ap.add_argument("--result-cache", default="", metavar="PATH")
+    args = ap.parse_args(argv)
+    cache = _open_result_cache(args.result_cache)
+    removed = 0
+    if args.all:
+        removed += cache.clear()
+    elif args.purge:
+        removed += cache.purge()
+    for t in args.targets:
+        identity = canonical_identity(t) if "://" in t else t
+        if identity:
+            removed += cache.invalidate(identity)
+    print(json.dumps({"removed": removed}, ensure_ascii=False))
+
+def _cmd_index(argv):
+    import argparse
+    from model_index import ModelIndex, DEFAULT_PATH
+    ap = argparse.ArgumentParser(prog="analyze_cli.py index")
+    sub = ap.add_subparsers(dest="action", required=True)
+    b = sub.add_parser("build", help="由匯出資料與結果快取重建型號索引")
+    b.add_argument("--export", action="append", default=[], metavar="FILE",
+                   help="/api/data/export 匯出的 export.json 或 zip（可重複）")
+    b.add_argument("--result-cache", nargs="?", const="", default=None, metavar="PATH",
+                   help="一併收錄結果快取中分析過的結果")
+    b.add_argument("--out", default=DEFAULT_PATH, metavar="PATH")
+    q = sub.add_parser("lookup", help="查詢型號：網址、vendor:MODEL 或型號（exact -> prefix -> fuzzy）")
+    q.add_argument("queries", nargs="+")
+    q.add_argument("--index", default=DEFAULT_PATH, metavar="PATH")
+    q.add_argument("--limit", type=int, default=10)
+    args = ap.parse_args(argv)
+
+    if args.action == "build":
+        cache = _open_result_cache(args.result_cache) if args.result_cache is not None else None
+        index = ModelIndex.build(args.export, cache)
+        index.save(args.out)
+        sources = {}
+        for e in index.entries:
+            sources[e["source"]] = sources.get(e["source"], 0) + 1
+        print(json.dumps({"entries": len(index), "sources": sources, "path": args.out}, ensure_ascii=False))
         return
 
-    # Thorlabs
-    hit = parse_thorlabs(url, soup)
-    if hit:
-        print(json.dumps(hit, ensure_ascii=False))
-        return
+    index = ModelIndex.load(args.index)
+    for query in args.queries:
+        t0 = time.perf_counter()
+        hits = index.lookup(query, limit=max(1, args.limit))
+        print(json.dumps({"query": query, "hits": hits,
+                          "lookup_us": round((time.perf_counter() - t0) * 1e6, 1)}, ensure_ascii=False))
+
+def _cmd_images(argv):
+    import argparse
+    from bulk_images import ImageStore, iter_jobs, run_images, DEFAULT_OUT, DEFAULT_MANIFEST, DEFAULT_PREFIX, THUMB_SIZE
+    ap = argparse.ArgumentParser(prog="analyze_cli.py images")
+    ap.add_argument("file", nargs="?", default="-", help='產品圖片清單（每行 {"id","url"}），\'-\' 代表 stdin')
+    ap.add_argument("--out", default=DEFAULT_OUT, help="圖片根目錄（預設 public/product_images）")
+    ap.add_argument("--manifest", default=DEFAULT_MANIFEST, help="續傳用的 manifest（JSON lines）")
+    ap.add_argument("--prefix", default=DEFAULT_PREFIX, help="輸出 localImage 的 URL 前綴")
+    ap.add_argument("--workers", type=int, default=8, help="同時下載的圖片數")
+    ap.add_argument("--thumb-size", type=int, default=THUMB_SIZE, metavar="PX",
+                    help="縮圖最長邊（需要 Pillow；0 = 不產生）")
+    ap.add_argument("--fresh", action="store_true",
+                    help="開始新的一次重建：清空 manifest、所有網址都重新下載（預設接續上次中斷的進度）")
+    ap.add_argument("--gc", action="store_true", help="完成且沒有失敗時，刪除這次沒用到的 blob")
+    g = ap.add_argument_group("politeness")
+    g.add_argument("--host-concurrency", type=int, default=4, metavar="N")
+    g.add_argument("--host-rate", type=float, default=4.0, metavar="R")
+    g.add_argument("--host-burst", type=float, default=8.0, metavar="N")
+    args = ap.parse_args(argv)
+
+    workers = max(1, args.workers)
+    scheduler = HostScheduler(concurrency=args.host_concurrency, rate=args.host_rate, burst=args.host_burst)
+    sess = make_session(pool_size=max(workers, scheduler.concurrency, 10), status_retries=False)
+    store = ImageStore(args.out, manifest=args.manifest, prefix=args.prefix, thumb_size=args.thumb_size,
+                       fresh=args.fresh)
+    if args.file == "-":
+        stats = run_images(iter_jobs(sys.stdin), store, sess, scheduler=scheduler, workers=workers, gc=args.gc)
+    else:
+        with open(args.file, encoding="utf-8") as f:
+            stats = run_images(iter_jobs(f), store, sess, scheduler=scheduler, workers=workers, gc=args.gc)
+    sys.exit(0 if stats["failed"] == 0 else 2)
+
+def _cmd_refresh(argv):
+    import argparse
+    from refresh_state import RefreshState, DEFAULT_PATH
+    ap = argparse.ArgumentParser(prog="analyze_cli.py refresh")
+    ap.add_argument("file", nargs="?", default="-", help="網址清單檔，'-' 代表 stdin")
+    ap.add_argument("--state", default=DEFAULT_PATH, metavar="PATH",
+                    help="指紋與上次結果（SQLite，預設 ProductInformation/.refresh_state.sqlite）")
+    ap.add_argument("--workers", type=int, default=16, help="同時抓取的網址數")
+    ap.add_argument("--emit-new", action="store_true", help="第一次看到的網址也輸出")
+    _add_common_args(ap)
+    args = ap.parse_args(argv)
+    workers = max(1, args.workers)
+    analyzer = _build_analyzer(args, pool_size=max(workers, 10))
+    state = RefreshState(args.state, version=PARSER_VERSION)
+    try:
+        if args.file == "-":
+            stats = run_refresh(_iter_urls(sys.stdin), analyzer, state, workers=workers, emit_new=args.emit_new)
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                stats = run_refresh(_iter_urls(f), analyzer, state, workers=workers, emit_new=args.emit_new)
+    finally:
+        analyzer.close()
+    sys.exit(0 if stats["failed"] == 0 else 2)
+
+def _cmd_crawl(argv):
+    import argparse
+    from crawl import run_crawl
+    ap = argparse.ArgumentParser(prog="analyze_cli.py crawl")
+    ap.add_argument("seeds", nargs="+", help="起點：Thorlabs 導覽/群組頁或 Mini-Circuits 分類清單網址")
+    ap.add_argument("--workers", type=int, default=8, help="同時展開/擷取的網址數")
+    ap.add_argument("--max-depth", type=int, default=2, help="從起點往下展開幾層")
+    ap.add_argument("--max-pages", type=int, default=50, help="最多展開幾個清單/群組頁")
+    ap.add_argument("--max-products", type=int, default=500, help="最多擷取幾個產品（以料號去重後）")
+    ap.add_argument("--max-frontier", type=int, default=1000, help="待展開佇列長度上限")
+    _add_common_args(ap)
+    args = ap.parse_args(argv)
+    workers = max(1, args.workers)
+    analyzer = _build_analyzer(args, pool_size=max(workers * 2, 10))
+    try:
+        stats = run_crawl(args.seeds, analyzer, workers=workers, max_depth=max(0, args.max_depth),
+                          max_pages=max(0, args.max_pages), max_products=max(0, args.max_products),
+                          max_frontier=max(1, args.max_frontier))
+    finally:
+        analyzer.close()
+    sys.exit(0 if stats["failed"] == 0 and stats["page_errors"] == 0 else 2)
+
+def _cmd_replay(argv):
+    import argparse
+    from capture_archive import DEFAULT_PATH
+    ap = argparse.ArgumentParser(prog="analyze_cli.py replay")
+    ap.add_argument("archive", nargs="?", default=DEFAULT_PATH, help="封存檔（預設 ProductInformation/.capture_archive.gz）")
+    ap.add_argument("--workers", type=int, default=None, help="子行程數（預設 = CPU 核心數）")
+    ap.add_argument("--parser", choices=("auto", *PARSER_BACKENDS), default="auto")
+    ap.add_argument("--baseline", metavar="FILE", help="先前 batch/replay 的輸出，用來比對欄位差異")
+    ap.add_argument("--changed-only", action="store_true", help="只輸出欄位有變動的產品（需要 --baseline）")
+    args = ap.parse_args(argv)
+    baseline = _load_baseline(args.baseline) if args.baseline else None
+    stats = run_replay(args.archive, workers=args.workers, parser=args.parser, baseline=baseline,
+                       changed_only=args.changed_only)
+    sys.exit(0 if stats["failed"] == 0 else 2)
+
+SUBCOMMANDS = {
+    "serve": _cmd_serve,
+    "batch": _cmd_batch,
+    "invalidate": _cmd_invalidate,
+    "images": _cmd_images,
+    "replay": _cmd_replay,
+    "refresh": _cmd_refresh,
+    "index": _cmd_index,
+    "crawl": _cmd_crawl,
+}
 
-    # 之後可擴充其他站台解析器；目前先通用/或告知未匹配
-    generic_img = find_image_generic(soup, url)
-    if generic_img:
-        print(json.dumps({
-            "name": None, "brand": None, "model": None, "price": None,
-            "spec": None, "imagelink": generic_img
-        }, ensure_ascii=False))
+def main():
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": USAGE}, ensure_ascii=False))
+        sys.exit(1)
+
+    cmd = SUBCOMMANDS.get(sys.argv[1])
+    if cmd:
+        cmd(sys.argv[2:])
         return
 
-    print(json.dumps({"error": "No parser matched"}, ensure_ascii=False))
+    import argparse
+    ap = argparse.ArgumentParser(prog="analyze_cli.py")
+    ap.add_argument("url")
+    _add_common_args(ap)
+    args = ap.parse_args()
+    analyzer = _build_analyzer(args)
+    result = analyzer.analyze(args.url)
+    analyzer.close()
+    print(json.dumps(result, ensure_ascii=False))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+# ProductInformation/bench/bench.py
+"""
+離線效能基準：對 fixtures/ 內存好的廠商頁面（不連網）逐階段計時。
+
+    python ProductInformation/bench/bench.py                  # 計時 + 比對 golden + 比對 baseline
+    python ProductInformation/bench/bench.py --update-golden  # 解析行為「刻意」改變後更新 golden
+    python ProductInformation/bench/bench.py --update-baseline
+    python ProductInformation/bench/bench.py --record URL NAME  # 抓一個新頁面存成 fixture
+
+輸出每個 case × 階段的 p50/p95/p99（ms）、end-to-end 吞吐量（pages/s）與峰值記憶體；
+任一階段 p50 比 baseline 慢超過 --threshold，或解析結果與 golden 不同，結束碼為 1。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from page_index import build_page, resolve_backend  # noqa: E402
+from extractors import find_price_generic, find_image_generic, normalize_for_output  # noqa: E402
+import analyze_cli  # noqa: E402
+
+FIXTURES = os.path.join(HERE, "fixtures")
+GOLDEN = os.path.join(HERE, "golden")
+BASELINE = os.path.join(HERE, "baseline.json")
+
+# 低於這個差距（ms）的退步視為量測雜訊
+NOISE_FLOOR_MS = 0.05
+
+def load_cases() -> dict:
+    with open(os.path.join(FIXTURES, "cases.json"), encoding="utf-8") as f:
+        cases = json.load(f)
+    for name, c in cases.items():
+        with open(os.path.join(FIXTURES, c["file"]), encoding="utf-8") as f:
+            c["markup"] = f.read()
+        c["vendor"] = name.split("_", 1)[0]
+    return cases
+
+# ---------- 階段 ----------
+# (名稱, 適用的 vendor（None = 全部）, fn(case, page))；page 為 None 代表該階段自己建頁
+def _stage_build(case, page, parser):
+    build_page(case["markup"], parser)
+
+def _stage_thorlabs_image(case, page, parser):
+    from vendors.thorlabs import find_image_thorlabs
+    find_image_thorlabs(page, case["url"], model=None)
+
+def _stage_table_label(case, page, parser):
+    # 原本是兩次 _grab_table_value_by_label（各自走訪整份文件）；現在一次 spec_map + 兩次查表
+    from vendors.minicircuits import spec_map, _spec_lookup
+    specs = spec_map(page)
+    _spec_lookup(specs, "Frequency Range", "Frequency Band")
+    _spec_lookup(specs, "Impedance")
+
+def _stage_normalize(case, page, parser):
+    normalize_for_output(page.title_text)
+
+def _stage_end_to_end(case, page, parser):
+    analyze_cli.analyze_page(case["url"], build_page(case["markup"], parser))
+
+STAGES = [
+    ("soup_build", None, False, _stage_build),
+    ("find_price_generic", None, True, lambda c, p, b: find_price_generic(p)),
+    ("find_image_generic", None, True, lambda c, p, b: find_image_generic(p, c["url"])),
+    ("find_image_thorlabs", "thorlabs", True, _stage_thorlabs_image),
+    ("_grab_table_value_by_label", "minicircuits", True, _stage_table_label),
+    ("normalize_for_output", None, True, _stage_normalize),
+    ("end_to_end", None, False, _stage_end_to_end),
+]
+
+def percentile(sorted_vals, q):
+    if not sorted_vals:
+        return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+def run_stages(cases, iterations: int, parser: str) -> dict:
+    report = {}
+    for name, case in cases.items():
+        report[name] = {}
+        for stage, vendor, needs_page, fn in STAGES:
+            if vendor and case["vendor"] != vendor:
+                continue
+            samples = []
+            for _ in range(iterations):
+                # 每次都用新建的 PageIndex，量到的是冷的成本（不吃前一次的快取）
+                page = build_page(case["markup"], parser) if needs_page else None
+                t0 = time.perf_counter()
+                fn(case, page, parser)
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            report[name][stage] = {
+                "p50": round(percentile(samples, 50), 4),
+                "p95": round(percentile(samples, 95), 4),
+                "p99": round(percentile(samples, 99), 4),
+            }
+        e2e = report[name]["end_to_end"]["p50"]
+        report[name]["throughput_pages_s"] = round(1000 / e2e, 1) if e2e else None
+    return report
+
+def measure_memory(cases, parser: str) -> dict:
+    out = {}
+    for name, case in cases.items():
+        tracemalloc.start()
+        _stage_end_to_end(case, None, parser)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out[name] = round(peak / 1024, 1)
+    return out
+
+def check_golden(cases, parser: str, update: bool) -> list:
+    os.makedirs(GOLDEN, exist_ok=True)
+    problems = []
+    for name, case in cases.items():
+        result = analyze_cli.analyze_page(case["url"], build_page(case["markup"], parser))
+        path = os.path.join(GOLDEN, name + ".json")
+        if update or not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2, sort_keys=True)
+                f.write("\n")
+            continue
+        with open(path, encoding="utf-8") as f:
+            expected = json.load(f)
+        diff = analyze_cli.diff_results(expected, result)
+        if diff:
+            problems.append({"case": name, "diff": diff})
+    return problems
+
+def compare_baseline(report, threshold: float) -> list:
+    if not os.path.exists(BASELINE):
+        return []
+    with open(BASELINE, encoding="utf-8") as f:
+        base = json.load(f).get("stages", {})
+    regressions = []
+    for name, stages in report.items():
+        for stage, stats in stages.items():
+            if not isinstance(stats, dict):
+                continue
+            b = (base.get(name) or {}).get(stage)
+            if not b:
+                continue
+            cur, old = stats["p50"], b["p50"]
+            if cur > old * (1 + threshold) and cur - old > NOISE_FLOOR_MS:
+                regressions.append({"case": name, "stage": stage, "baseline_p50": old, "p50": cur,
+                                    "ratio": round(cur / old, 2) if old else None})
+    return regressions
+
+def record(url: str, name: str):
+    """抓取一個實際頁面存成 fixture，並登記到 cases.json"""
+    sess = analyze_cli.make_session()
+    resp = sess.get(url, timeout=25)
+    resp.raise_for_status()
+    fname = name + ".html"
+    with open(os.path.join(FIXTURES, fname), "w", encoding="utf-8") as f:
+        f.write(resp.text)
+    path = os.path.join(FIXTURES, "cases.json")
+    with open(path, encoding="utf-8") as f:
+        cases = json.load(f)
+    cases[name] = {"file": fname, "url": url}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cases, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(json.dumps({"recorded": name, "bytes": len(resp.content)}, ensure_ascii=False))
+
+def main():
+    ap = argparse.ArgumentParser(prog="bench.py")
+    ap.add_argument("--iterations", type=int, default=30)
+    ap.add_argument("--parser", default="auto", help="auto / lxml / html.parser")
+    ap.add_argument("--threshold", type=float, default=0.25, help="p50 可接受的退步比例")
+    ap.add_argument("--case", action="append", help="只跑指定 case（可重複）")
+    ap.add_argument("--update-golden", action="store_true")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--record", nargs=2, metavar=("URL", "NAME"))
+    args = ap.parse_args()
+
+    if args.record:
+        record(*args.record)
+        return
+
+    parser = resolve_backend(args.parser)
+    cases = load_cases()
+    if args.case:
+        cases = {k: v for k, v in cases.items() if k in args.case}
+
+    golden_problems = check_golden(cases, parser, args.update_golden)
+    report = run_stages(cases, max(1, args.iterations), parser)
+    memory = measure_memory(cases, parser)
+
+    if args.update_baseline:
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({"parser": parser, "iterations": args.iterations, "stages": report},
+                      f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        regressions = []
+    else:
+        regressions = compare_baseline(report, args.threshold)
+
+    print(json.dumps({
+        "parser": parser,
+        "iterations": args.iterations,
+        "stages_ms": report,
+        "peak_memory_kb": memory,
+        "golden_mismatches": golden_problems,
+        "regressions": regressions,
+    }, ensure_ascii=False, indent=2))
+    sys.exit(1 if golden_problems or regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# ProductInformation/bench/import_budget.py
+"""
+冷啟動 import 成本檢查：以 python -X importtime 跑 analyze_cli.py 的幾個冷啟動情境，
+統計 import 總耗時（扣掉空直譯器 `python -c pass` 的基準），並檢查不該被載入的模組。
+
+    python ProductInformation/bench/import_budget.py                  # 檢查 import_budget.json
+    python ProductInformation/bench/import_budget.py --update-budget  # 以本次量測 × --headroom 重寫預算
+
+情境：
+- usage：不帶參數（只印用法）——不該載入 requests / bs4 / concurrent.futures 等
+- cache_hit：結果快取命中的單筆查詢——不抓網頁、不解析，也就不該載入 requests / bs4
+
+任一情境超過 max_ms 或載入了 forbidden 內的模組，結束碼為 1。
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BUDGET = os.path.join(HERE, "import_budget.json")
+
+CACHE_HIT_URL = "https://www.thorlabs.com/thorproduct.cfm?partnumber=BENCH-IMPORT"
+
+# 每個情境：argv（相對 analyze_cli.py）與不該出現的頂層模組
+SCENARIOS = {
+    "usage": {
+        "argv": [],
+        "forbidden": ["requests", "urllib3", "bs4", "lxml", "concurrent.futures", "email.utils", "extractors"],
+    },
+    "cache_hit": {
+        "argv": [CACHE_HIT_URL, "--result-cache", "{cache}"],
+        "forbidden": ["requests", "urllib3", "bs4", "lxml"],
+    },
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def _importtime(argv: list) -> tuple:
+    """回傳 (頂層 cumulative 總和 ms, 載入的模組集合)"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], cwd=ROOT,
+                          capture_output=True, text=True)
+    total_us, modules = 0, set()
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        modules.add(m.group(4))
+        # 縮排只有一格的是頂層 import；cumulative 已含其子模組
+        if len(m.group(3)) == 1:
+            total_us += int(m.group(2))
+    return total_us / 1000, modules
+
+def _prepare_cache(path: str):
+    sys.path.insert(0, ROOT)
+    from analyze_cli import _open_result_cache, cache_key
+    cache = _open_result_cache(path)
+    cache.put(cache_key(CACHE_HIT_URL), {"name": "bench", "model": "BENCH-IMPORT"},
+              url=CACHE_HIT_URL)
+
+def measure(runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "result_cache.sqlite")
+        _prepare_cache(cache)
+        base = statistics.median(_importtime(["-c", "pass"])[0] for _ in range(runs))
+        report = {}
+        for name, sc in SCENARIOS.items():
+            argv = ["analyze_cli.py", *(a.format(cache=cache) for a in sc["argv"])]
+            samples, modules = [], set()
+            for _ in range(runs):
+                ms, mods = _importtime(argv)
+                samples.append(ms)
+                modules |= mods
+            loaded = sorted(m for m in sc["forbidden"] if m in modules)
+            report[name] = {"ms": round(max(0.0, statistics.median(samples) - base), 2), "forbidden_loaded": loaded}
+    return report
+
+def main():
+    ap = argparse.ArgumentParser(description="analyze_cli.py 冷啟動 import 成本檢查")
+    ap.add_argument("--runs", type=int, default=5, help="每個情境重複次數，取中位數")
+    ap.add_argument("--update-budget", action="store_true", help="以本次量測重寫 import_budget.json")
+    ap.add_argument("--headroom", type=float, default=1.5, help="--update-budget 時預算 = 量測值 × headroom")
+    args = ap.parse_args()
+
+    report = measure(max(1, args.runs))
+
+    if args.update_budget:
+        budget = {name: {"max_ms": round(r["ms"] * args.headroom + 1, 1)} for name, r in report.items()}
+        with open(BUDGET, "w", encoding="utf-8") as f:
+            json.dump(budget, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(json.dumps({"report": report, "budget": budget}, ensure_ascii=False, indent=2))
+        return 0
+
+    try:
+        with open(BUDGET, encoding="utf-8") as f:
+            budget = json.load(f)
+    except OSError:
+        budget = {}
+
+    violations = []
+    for name, r in report.items():
+        limit = budget.get(name, {}).get("max_ms")
+        if limit is not None and r["ms"] > limit:
+            violations.append({"scenario": name, "ms": r["ms"], "max_ms": limit})
+        if r["forbidden_loaded"]:
+            violations.append({"scenario": name, "forbidden_loaded": r["forbidden_loaded"]})
+
+    print(json.dumps({"report": report, "violations": violations}, ensure_ascii=False, indent=2))
+    return 1 if violations else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
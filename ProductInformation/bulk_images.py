@@ -0,0 +1,303 @@
+# ProductInformation/bulk_images.py
+"""
+產品圖片大量下載（analyze_cli.py images）：
+- 輸入：一行一筆 {"id": 產品 id, "url": 圖片網址}（也接受 "id<TAB>url"）
+- 有上限的併發下載，邊下載邊寫入暫存檔並計算 sha256，不把整張圖放在記憶體
+- 以內容雜湊去重：blobs/<前兩碼>/<sha256>.<ext> 只存一份，多個產品共用同一個檔案；
+  每個產品的對應（localImage）逐行輸出，由呼叫端寫回資料庫
+- 同一網址只下載一次；不同網址但內容相同也只留一份
+- 有裝 Pillow 時在旁邊產生縮圖 <sha256>.thumb.webp；沒裝就略過
+- 可續傳：每張完成的圖都立即寫進 manifest（網址 -> blob），中斷後重跑會跳過已完成的網址；
+  續傳只限同一次重建，開始新的重建時以 fresh=True（--fresh）清掉 manifest，廠商換圖才會重新下載
+  （內容沒變的圖仍會對到同一個 blob，不會多存一份）
+- gc 只在整批沒有失敗時執行：中斷或有失敗的那一輪沒引用到的 blob 可能仍然有效
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from image_probe import sniff_image
+
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "public", "product_images")
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".image_manifest.jsonl")
+DEFAULT_PREFIX = "/product_images"
+
+THUMB_SIZE = 256
+MAX_IMAGE_BYTES = 50 * 1024 * 1024
+
+_FORMAT_EXT = {"jpeg": "jpg", "png": "png", "gif": "gif", "webp": "webp"}
+
+class UnsupportedImage(Exception):
+    """格式不是 PNG/JPEG/GIF/WebP（例如 HEIC、AVIF、TIFF），交給呼叫端轉檔"""
+
+def _load_pillow():
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+def iter_jobs(stream):
+    """一行一筆 {"id","url"} 或 "id<TAB>url"；略過空行與 # 註解"""
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                continue
+            pid, url = obj.get("id"), obj.get("url")
+        else:
+            parts = line.split(None, 1)
+            if len(parts) != 2:
+                continue
+            pid, url = parts
+        if pid is not None and isinstance(url, str) and url.strip():
+            yield str(pid), url.strip()
+
+class ImageStore:
+    """
+    out：blob 根目錄（預設 public/product_images）
+    manifest：網址 -> blob 的 JSON lines 紀錄，用來續傳
+    prefix：輸出給前端的 URL 前綴（localImage = prefix + "/blobs/..."）
+    fresh：開始新的一次重建——忽略並清空既有 manifest，所有網址都重新下載
+    """
+    def __init__(self, out: str = DEFAULT_OUT, manifest: str = DEFAULT_MANIFEST,
+                 prefix: str = DEFAULT_PREFIX, thumb_size: int = THUMB_SIZE, fresh: bool = False):
+        self.out = out
+        self.blobs = os.path.join(out, "blobs")
+        self.tmp = os.path.join(out, ".tmp")
+        self.manifest_path = manifest
+        self.prefix = prefix.rstrip("/")
+        self.thumb_size = thumb_size
+        self.pillow = _load_pillow() if thumb_size > 0 else None
+        # 上次中斷留下的半成品直接丟掉
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp, exist_ok=True)
+        os.makedirs(self.blobs, exist_ok=True)
+        self._lock = threading.Lock()
+        if fresh:
+            _remove(self.manifest_path)
+        self._by_url = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        entries = {}
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        e = json.loads(line)
+                    except ValueError:
+                        continue  # 中斷時寫到一半的最後一行
+                    if isinstance(e, dict) and e.get("url") and e.get("blob"):
+                        entries[e["url"]] = e
+        except OSError:
+            pass
+        return entries
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.out, *rel.split("/"))
+
+    def cached(self, url: str) -> dict | None:
+        """manifest 有紀錄且 blob 還在 → 不必重新下載"""
+        e = self._by_url.get(url)
+        if e and os.path.exists(self._abs(e["blob"])):
+            if e.get("thumb") or not self.pillow:
+                return e
+            # 上次沒有 Pillow：補產生縮圖
+            e = {**e, "thumb": self._make_thumb(self._abs(e["blob"]), e["sha256"])}
+            self._record(e)
+            return e
+        return None
+
+    def _record(self, entry: dict):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._by_url[entry["url"]] = entry
+            with open(self.manifest_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+
+    def _make_thumb(self, path: str, sha: str) -> str | None:
+        if not self.pillow:
+            return None
+        rel = f"blobs/{sha[:2]}/{sha}.thumb.webp"
+        dest = self._abs(rel)
+        if os.path.exists(dest):
+            return rel
+        try:
+            with self.pillow.open(path) as im:
+                im.thumbnail((self.thumb_size, self.thumb_size))
+                if im.mode not in ("RGB", "RGBA"):
+                    im = im.convert("RGBA" if "A" in im.getbands() else "RGB")
+                tmp = f"{dest}.{threading.get_ident()}.tmp"
+                im.save(tmp, "WEBP", quality=80)
+            os.replace(tmp, dest)
+            return rel
+        except Exception:
+            return None
+
+    def fetch(self, sess, url: str, scheduler=None, timeout: float = 30) -> dict:
+        """下載一張圖（串流寫檔 + sha256），放進對應的 blob；回傳 manifest 項目"""
+        if scheduler is None:
+            return self._download(sess, url, timeout)
+        with scheduler.slot(url) as host:
+            scheduler.wait_turn(host)
+            try:
+                entry = self._download(sess, url, timeout)
+            except UnsupportedImage:
+                scheduler.record(host, ok=True)
+                raise
+            except Exception as e:
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                scheduler.record(host, ok=status is not None and status < 500 and status != 429)
+                raise
+            scheduler.record(host, ok=True)
+            return entry
+
+    def _download(self, sess, url: str, timeout: float) -> dict:
+        tmp = os.path.join(self.tmp, f"{threading.get_ident()}.{time.monotonic_ns()}")
+        h = hashlib.sha256()
+        head = bytearray()
+        size = 0
+        resp = sess.get(url, timeout=timeout, stream=True)
+        try:
+            resp.raise_for_status()
+            with open(tmp, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=64 * 1024):
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > MAX_IMAGE_BYTES:
+                        raise ValueError(f"image larger than {MAX_IMAGE_BYTES} bytes")
+                    if len(head) < 64 * 1024:
+                        head += chunk[:64 * 1024 - len(head)]
+                    h.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            _remove(tmp)
+            raise
+        finally:
+            resp.close()
+
+        sniffed = sniff_image(bytes(head))
+        if not sniffed:
+            _remove(tmp)
+            raise UnsupportedImage(f"unsupported image format ({resp.headers.get('Content-Type') or 'unknown'})")
+        fmt, width, height = sniffed
+
+        sha = h.hexdigest()
+        rel = f"blobs/{sha[:2]}/{sha}.{_FORMAT_EXT[fmt]}"
+        dest = self._abs(rel)
+        deduped = os.path.exists(dest)
+        if deduped:
+            _remove(tmp)
+        else:
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            os.replace(tmp, dest)
+
+        entry = {
+            "url": url, "sha256": sha, "blob": rel, "thumb": self._make_thumb(dest, sha),
+            "format": fmt, "width": width, "height": height, "bytes": size, "deduped": deduped,
+        }
+        self._record(entry)
+        return entry
+
+    def public_path(self, rel: str | None) -> str | None:
+        return f"{self.prefix}/{rel}" if rel else None
+
+    def gc(self, keep: set) -> int:
+        """刪掉 keep（本次用到的 blob / 縮圖相對路徑）以外的 blob；回傳刪除數"""
+        removed = 0
+        for root, _, files in os.walk(self.blobs):
+            for name in files:
+                rel = os.path.relpath(os.path.join(root, name), self.out).replace(os.sep, "/")
+                if rel not in keep:
+                    _remove(os.path.join(root, name))
+                    removed += 1
+        return removed
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def run_images(jobs, store: ImageStore, sess, scheduler=None, workers: int = 8, gc: bool = False,
+               out=None, err=None) -> dict:
+    """
+    每個產品輸出一行 {"id","url","localImage","thumb","sha256","status"}，
+    失敗時 {"id","url","error"}；格式需要轉檔時另帶 "unsupported": true。
+    status：cached（manifest 已有）/ downloaded / deduped（內容和已有的 blob 相同）。
+    同一網址的多個產品共用一次下載；摘要中的計數以網址為單位。
+    """
+    out = out or sys.stdout
+    err = err or sys.stderr
+    out_lock = threading.Lock()
+    stats = {"products": 0, "urls": 0, "cached": 0, "downloaded": 0, "deduped": 0, "failed": 0,
+             "bytes": 0, "thumbnails": bool(store.pillow)}
+    keep = set()
+    t0 = time.monotonic()
+
+    by_url = {}
+    for pid, url in jobs:
+        stats["products"] += 1
+        by_url.setdefault(url, []).append(pid)
+    stats["urls"] = len(by_url)
+
+    def emit(obj):
+        line = json.dumps(obj, ensure_ascii=False)
+        with out_lock:
+            out.write(line + "\n")
+            out.flush()
+
+    def handle(url, pids):
+        entry, status, error, unsupported = store.cached(url), "cached", None, False
+        if entry is None:
+            try:
+                entry = store.fetch(sess, url, scheduler=scheduler)
+                status = "deduped" if entry["deduped"] else "downloaded"
+            except UnsupportedImage as e:
+                error, unsupported = str(e), True
+            except Exception as e:
+                error = str(e)
+
+        with out_lock:
+            if entry is None:
+                stats["failed"] += 1
+            else:
+                stats[status] += 1
+                if status != "cached":
+                    stats["bytes"] += entry["bytes"]
+                keep.add(entry["blob"])
+                if entry.get("thumb"):
+                    keep.add(entry["thumb"])
+        for pid in pids:
+            if entry is None:
+                rec = {"id": pid, "url": url, "error": error}
+                if unsupported:
+                    rec["unsupported"] = True
+            else:
+                rec = {"id": pid, "url": url, "localImage": store.public_path(entry["blob"]),
+                       "thumb": store.public_path(entry.get("thumb")), "sha256": entry["sha256"],
+                       "status": status}
+            emit(rec)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(lambda kv: handle(*kv), by_url.items()))
+
+    if gc and stats["failed"] == 0:
+        stats["gc_removed"] = store.gc(keep)
+    elif gc:
+        stats["gc_skipped"] = "failures"
+    stats["elapsed_s"] = round(time.monotonic() - t0, 3)
+    err.write(json.dumps({"summary": stats}, ensure_ascii=False) + "\n")
+    err.flush()
+    return stats
@@ -0,0 +1,100 @@
+# ProductInformation/capture_archive.py
+"""
+抓取封存（類 WARC）：把抓到的原始 HTML 連同標頭、抓取時間存成只會附加的壓縮檔，
+之後修正解析規則時可以離線重跑擷取（analyze_cli.py replay），不必重新抓網頁。
+
+檔案格式：一連串 gzip member，每筆紀錄一個 member（整個檔案仍是合法的 .gz）。
+member 解壓後 = 一行 JSON 標頭 + "\n" + 原始 body（bytes）。
+標頭欄位：url, fetched_at, status, headers, encoding, state, length
+"""
+import json
+import mmap
+import os
+import threading
+import time
+import zlib
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".capture_archive.gz")
+
+def _gzip_member(data: bytes, level: int = 6) -> bytes:
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return c.compress(data) + c.flush()
+
+class CaptureArchive:
+    def __init__(self, path: str = DEFAULT_PATH, level: int = 6):
+        self.path = path
+        self.level = level
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def append(self, url: str, resp, body: bytes, state: str = "complete"):
+        header = {
+            "url": url,
+            "fetched_at": time.time(),
+            "status": resp.status_code,
+            "headers": dict(resp.headers),
+            "encoding": resp.encoding,
+            "state": state,
+            "length": len(body),
+        }
+        blob = _gzip_member(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n" + body, self.level)
+        # O_APPEND + 一次 write：多個行程同時寫也不會交錯
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+            try:
+                view = memoryview(blob)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
+
+def decode_member(blob: bytes):
+    """單一 member 的壓縮 bytes -> (header dict, body bytes)"""
+    data = zlib.decompress(blob, 31)
+    line, _, body = data.partition(b"\n")
+    return json.loads(line), body
+
+def iter_members(path: str):
+    """
+    依序產生 (offset, length, header)；length 為壓縮後大小，可用 read_member 取回。
+    最後一筆若是中斷時寫到一半的不完整 member 會被略過。
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos, n = 0, len(mm)
+        while pos < n:
+            d = zlib.decompressobj(31)
+            cur = pos
+            head = bytearray()
+            while not d.eof and cur < n:
+                chunk = mm[cur:cur + 256 * 1024]
+                cur += len(chunk)
+                out = d.decompress(chunk)
+                if len(head) < 64 * 1024:
+                    head += out[:64 * 1024 - len(head)]
+            if not d.eof:
+                return
+            end = cur - len(d.unused_data)
+            line = bytes(head).partition(b"\n")[0]
+            try:
+                header = json.loads(line)
+            except ValueError:
+                header = None
+            if header is not None:
+                yield pos, end - pos, header
+            pos = end
+
+def read_member(path: str, offset: int, length: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(length)
+
+def latest_by_url(path: str) -> dict:
+    """url -> (offset, length, header)，同一網址只留最新一筆"""
+    latest = {}
+    for offset, length, header in iter_members(path):
+        prev = latest.get(header["url"])
+        if prev is None or header.get("fetched_at", 0) >= prev[2].get("fetched_at", 0):
+            latest[header["url"]] = (offset, length, header)
+    return latest
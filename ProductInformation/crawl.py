@@ -0,0 +1,169 @@
+# ProductInformation/crawl.py
+"""
+分類/清單爬取（analyze_cli.py crawl）：從導覽頁、群組頁或分類清單出發，找出產品頁並擷取。
+
+- 連結分類交給各廠商模組的 classify_link（與 parse_* 使用相同的 host / 路徑規則）：
+  product（擷取）、group（展開；--group-parts 時也輸出 parts）、listing（只展開）
+- 只跟隨與起點同一廠商的連結；產品以 canonical_identity（廠商 + 正規化料號）去重，
+  同一料號的不同網址寫法只擷取一次
+- 有上限：展開深度（max_depth）、展開頁數（max_pages）、產品數（max_products）、
+  待展開佇列長度（max_frontier），超過的連結計入 dropped；產品數到上限後就不再展開新的頁面
+- 展開與擷取共用一個執行緒池同時進行；每個 host 的節流由 Analyzer 的 scheduler 負責
+"""
+import html
+import json
+import re
+import sys
+import threading
+import time
+from collections import deque
+from urllib.parse import urljoin, urldefrag, urlparse
+
+import vendors
+
+_HREF = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.I)
+
+def extract_links(markup: str, base_url: str) -> list:
+    """頁面中所有 http(s) 連結（絕對網址、去掉 #fragment、保留順序去重）"""
+    out = {}
+    for m in _HREF.finditer(markup):
+        href = html.unescape(m.group(1) or m.group(2) or m.group(3) or "").strip()
+        if not href or href.startswith(("javascript:", "mailto:", "tel:", "#")):
+            continue
+        u = urldefrag(urljoin(base_url, href))[0]
+        if u.startswith(("http://", "https://")):
+            out.setdefault(u, None)
+    return list(out)
+
+def _page_key(url: str) -> str:
+    u = urlparse(url)
+    return f"{(u.hostname or '').lower()}{u.path}?{u.query}"
+
+def run_crawl(seeds, analyzer, workers: int = 8, max_depth: int = 2, max_pages: int = 50,
+              max_products: int = 500, max_frontier: int = 1000, out=None, err=None) -> dict:
+    """
+    每個產品輸出一行 {"url","identity","depth","result"}（完成順序）；
+    --group-parts 時群組頁也輸出一行 {"url","depth","group": true,"result"}。
+    結束時把統計摘要寫到 err（預設 stderr）。
+    """
+    from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+    out = out or sys.stdout
+    err = err or sys.stderr
+    out_lock = threading.Lock()
+    stats = {"pages": 0, "page_errors": 0, "products": 0, "ok": 0, "failed": 0,
+             "duplicates": 0, "dropped": 0, "failures": []}
+    t0 = time.monotonic()
+
+    seen_pages, seen_products = set(), set()
+    frontier = deque()   # 待展開：(url, depth, kind)
+    products = deque()   # 待擷取：(url, identity, depth)
+    scopes = set()       # 起點的廠商（註冊表的鍵）
+
+    def emit(obj):
+        line = json.dumps(obj, ensure_ascii=False)
+        with out_lock:
+            out.write(line + "\n")
+            out.flush()
+
+    def add_page(url, depth, kind):
+        key = _page_key(url)
+        if key in seen_pages or depth > max_depth:
+            return
+        seen_pages.add(key)
+        if len(frontier) >= max_frontier:
+            stats["dropped"] += 1
+            return
+        frontier.append((url, depth, kind))
+
+    def add_product(url, depth):
+        identity = vendors.canonical_identity(url) or _page_key(url)
+        if identity in seen_products:
+            stats["duplicates"] += 1
+            return
+        if len(seen_products) >= max_products:
+            stats["dropped"] += 1
+            return
+        seen_products.add(identity)
+        products.append((url, identity, depth))
+
+    def add_link(url, depth):
+        key = vendors.registrable_key(urlparse(url).hostname)
+        if key not in scopes:
+            return
+        kind = vendors.classify_link(url)
+        if kind == "product":
+            add_product(url, depth)
+        elif kind in ("group", "listing"):
+            add_page(url, depth, kind)
+
+    def expand(url, kind):
+        markup, _ = analyzer.fetch_markup(url)
+        result = analyzer.extract(url, markup) if kind == "group" and analyzer.group_parts else None
+        return extract_links(markup, url), result
+
+    for seed in seeds:
+        scopes.add(vendors.registrable_key(urlparse(seed).hostname))
+        kind = vendors.classify_link(seed)
+        if kind == "product":
+            add_product(seed, 0)
+        else:
+            add_page(seed, 0, kind or "listing")
+
+    pending = {}
+    unexpanded = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while True:
+            # 產品數已到上限：再展開清單頁也只會產生被丟掉的連結
+            if frontier and len(seen_products) >= max_products:
+                unexpanded += len(frontier)
+                frontier.clear()
+            # 展開與擷取各自最多 workers 個在跑，其餘留在佇列（記憶體有上限）
+            n_pages = sum(1 for v in pending.values() if v[0] == "page")
+            while (frontier and stats["pages"] < max_pages and n_pages < workers
+                   and len(seen_products) < max_products):
+                url, depth, kind = frontier.popleft()
+                stats["pages"] += 1
+                n_pages += 1
+                pending[pool.submit(expand, url, kind)] = ("page", url, depth, kind)
+            n_products = len(pending) - n_pages
+            while products and n_products < workers:
+                url, identity, depth = products.popleft()
+                stats["products"] += 1
+                n_products += 1
+                pending[pool.submit(analyzer.analyze, url)] = ("product", url, depth, identity)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                what, url, depth, extra = pending.pop(fut)
+                if what == "page":
+                    try:
+                        links, result = fut.result()
+                    except Exception as e:
+                        stats["page_errors"] += 1
+                        stats["failures"].append({"url": url, "error": f"Failed to fetch page: {e}"})
+                        continue
+                    if result is not None:
+                        emit({"url": url, "depth": depth, "group": True, "result": result})
+                    for link in links:
+                        add_link(link, depth + 1)
+                    continue
+
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    result = {"error": f"Analyzer crashed: {e}"}
+                emit({"url": url, "identity": extra, "depth": depth, "result": result})
+                if "error" in result:
+                    stats["failed"] += 1
+                    stats["failures"].append({"url": url, "error": result["error"]})
+                else:
+                    stats["ok"] += 1
+
+    stats["unexpanded"] = len(frontier) + unexpanded
+    stats["elapsed_s"] = round(time.monotonic() - t0, 3)
+    err.write(json.dumps({"summary": stats}, ensure_ascii=False) + "\n")
+    err.flush()
+    return stats
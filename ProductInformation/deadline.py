@@ -0,0 +1,88 @@
+# ProductInformation/deadline.py
+"""
+單筆查詢的整體時間預算（--deadline）：與其讓呼叫端（route.ts 30 秒）直接砍掉行程、什麼都拿不到，
+不如在時間內把已經拿到的欄位交出去，並標上 "_partial"。
+
+預算分成兩段：
+- 抓取（連線、等待節流、重試、下載）：預算扣掉保留給擷取的部分（extract_reserve）
+- 擷取：剩下的時間；先做便宜的 head/meta/結構化資料欄位，完整的廠商解析在時限內沒做完就用前者
+
+用法與 timings 相同，以執行緒為單位：
+    with deadline.budget(25):
+        ...            # 期間 deadline.current() 回傳 Deadline；沒有設定時為 None
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+# 保留給擷取的比例與上下限（秒）
+EXTRACT_SHARE = 0.2
+EXTRACT_MIN = 0.5
+EXTRACT_MAX = 3.0
+
+# 單次請求的連線逾時上限（讀取逾時仍為 25 秒）
+CONNECT_TIMEOUT = 10.0
+READ_TIMEOUT = 25.0
+
+_local = threading.local()
+
+class DeadlineExceeded(Exception):
+    pass
+
+class Deadline:
+    __slots__ = ("budget", "started", "expires", "fetch_expires")
+
+    def __init__(self, budget: float, reserve: float | None = None):
+        self.budget = budget
+        self.started = time.monotonic()
+        self.expires = self.started + budget
+        if reserve is None:
+            reserve = min(EXTRACT_MAX, max(EXTRACT_MIN, budget * EXTRACT_SHARE))
+        # 預算比保留量還小時，抓取至少分到一半
+        self.fetch_expires = self.started + max(budget - reserve, budget / 2)
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def fetch_remaining(self) -> float:
+        return self.fetch_expires - time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def request_timeout(self, what: str = "request"):
+        """這次請求可用的 (connect, read) 逾時；抓取預算已用完就丟 DeadlineExceeded"""
+        left = self.fetch_remaining()
+        if left <= 0:
+            raise DeadlineExceeded(f"deadline exceeded ({self.budget:.1f}s budget) before {what}")
+        return min(CONNECT_TIMEOUT, left), min(READ_TIMEOUT, left)
+
+    def info(self, stage: str, **extra) -> dict:
+        """結果上的 "_partial"：在哪個階段用完預算、預算與實際耗時"""
+        return {"stage": stage, "budget_s": round(self.budget, 3), "elapsed_s": round(self.elapsed(), 3), **extra}
+
+def current() -> Deadline | None:
+    return getattr(_local, "deadline", None)
+
+@contextmanager
+def until(stop_at: float | None):
+    """
+    以 time.monotonic() 的時間點設定時限、不保留擷取時間；給在其他執行緒跑的子工作
+    （例如圖片探測），讓共用 session 的連線層重試也看得到時限。stop_at 為 None 時不設時限。
+    """
+    prev = current()
+    _local.deadline = Deadline(stop_at - time.monotonic(), reserve=0.0) if stop_at is not None else None
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = prev
+
+@contextmanager
+def budget(seconds: float | None):
+    """seconds 為 None 或 <= 0 時不設時限"""
+    prev = current()
+    _local.deadline = Deadline(seconds) if seconds and seconds > 0 else None
+    try:
+        yield _local.deadline
+    finally:
+        _local.deadline = prev
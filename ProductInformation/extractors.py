@@ -0,0 +1,272 @@
+# ProductInformation/extractors.py
+"""共用的文字工具與通用（不分廠商）擷取器；廠商專用解析放在 vendors/ 底下"""
+import re
+from urllib.parse import urljoin
+
+from lazy_re import lazy_compile
+from page_index import PageIndex
+from timings import stage
+
+# ---------- 文字工具 ----------
+def clean_text(s):
+    if not s:
+        return None
+    return re.sub(r"\s+", " ", s).strip()
+
+DIM_PATTERNS = [
+    (lazy_compile(r'(\d)\s*"\b'), r'\1″'),  # 1" -> 1″
+    (lazy_compile(r'(\d)\s*\'\b'), r'\1′'), # 1' -> 1′
+    (lazy_compile(r'\\"'), '″'),
+]
+
+def normalize_for_output(text):
+    """避免 JSON 轉義問題並做簡單排版正規化"""
+    if text is None:
+        return None
+    import html
+    import unicodedata
+    t = html.unescape(text)
+    t = unicodedata.normalize("NFC", t)
+    for pat, repl in DIM_PATTERNS:
+        t = pat.sub(repl, t)
+    t = t.replace("\\", "")      # 移除多餘反斜線
+    t = t.replace('"', '”')      # 排版引號
+    t = re.sub(r"\s+", " ", t).strip()
+    return t
+
+def to_float_maybe(x):
+    if x is None:
+        return None
+    try:
+        return float(x)
+    except Exception:
+        try:
+            return float(re.sub(r"[^\d.]", "", str(x)))
+        except Exception:
+            return None
+
+# ---------- URL 工具 ----------
+def _https_url(base: str, u) -> str | None:
+    """相對網址轉絕對位址並強制 https"""
+    if not u:
+        return None
+    absu = urljoin(base, str(u).strip())
+    if absu.startswith("//"):
+        absu = "https:" + absu
+    if absu.startswith("http://"):
+        absu = "https://" + absu[len("http://"):]
+    return absu
+
+def _raw_query_param(query: str, *names: str) -> str | None:
+    """
+    不經 parse_qs 解碼地取 query 參數（保留字面上的 '+'）。
+    names 依優先順序：前面的參數有值就用它，不管在 query 中出現的位置（與解析器的取法一致）。
+    """
+    pairs = [pair.partition("=") for pair in query.split("&")]
+    for name in names:
+        for k, _, v in pairs:
+            if k.lower() == name and v:
+                return v
+    return None
+
+# ---------- 抓價格（通用） ----------
+# 一次掃過全文即可找出所有價格候選與其幣別（取代原本依序跑五個 regex）
+_PRICE_SCAN = lazy_compile(
+    r"(?:\b(?P<code>USD|US|NTD|NT|TWD|EUR)\s*(?P<codesym>[$€])?|(?P<sym>[$€]))"
+    r"\s*(?P<amount>\d[\d,]*(?:\.\d{1,2})?)",
+    re.IGNORECASE,
+)
+_CURRENCY_CODES = {"USD": "USD", "US": "USD", "NTD": "TWD", "NT": "TWD", "TWD": "TWD", "EUR": "EUR"}
+_CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR"}
+_PRICE_LABEL = lazy_compile(r"\bprice\b", re.IGNORECASE)
+
+# 來源排序：結構化資料優先，其次是緊接在「Price」標籤後的文字，最後才是任意文字
+PRICE_SOURCES = ("jsonld", "meta", "text-labeled", "text")
+
+def _currency_of(m) -> str | None:
+    code = m.group("code")
+    if code:
+        # 「US」「NT」單獨出現太常見（例如 "US Patent"），必須搭配 $ 才算幣別
+        if code.upper() in ("US", "NT") and not m.group("codesym"):
+            return None
+        return _CURRENCY_CODES[code.upper()]
+    return _CURRENCY_SYMBOLS.get(m.group("sym"))
+
+def _normalize_currency(c) -> str | None:
+    c = str(c or "").strip().upper()
+    return _CURRENCY_CODES.get(c, c or None)
+
+def _structured_prices(page: PageIndex):
+    # JSON-LD offers.price / priceSpecification.price
+    for item in page.jsonld_items:
+        if not isinstance(item, dict):
+            continue
+        offers = item.get("offers")
+        for o in (offers if isinstance(offers, list) else [offers]):
+            if not isinstance(o, dict):
+                continue
+            spec = o.get("priceSpecification") or {}
+            price = o.get("price") or spec.get("price")
+            f = to_float_maybe(price)
+            if f is not None:
+                yield {"amount": f, "currency": _normalize_currency(o.get("priceCurrency") or spec.get("priceCurrency")),
+                       "source": "jsonld"}
+    # Meta
+    meta_price = page.meta_content(("property", "product:price:amount"), ("name", "price"))
+    f = to_float_maybe(meta_price) if meta_price else None
+    if f is not None:
+        currency = page.meta_content(("property", "product:price:currency"), ("name", "priceCurrency"))
+        yield {"amount": f, "currency": _normalize_currency(currency), "source": "meta"}
+
+def scan_text_prices(text: str, anchor: int | None = None) -> list:
+    """
+    單次掃描文字，回傳所有價格候選：{amount, currency, source, pos, distance}。
+    distance 為與 anchor（產品標題在文字中的位置）的距離；沒有 anchor 時等於出現位置。
+    """
+    out = []
+    for m in _PRICE_SCAN.finditer(text):
+        currency = _currency_of(m)
+        if currency is None:
+            continue
+        try:
+            amount = float(m.group("amount").replace(",", ""))
+        except ValueError:
+            continue
+        labeled = bool(_PRICE_LABEL.search(text, max(0, m.start() - 40), m.start()))
+        out.append({
+            "amount": amount,
+            "currency": currency,
+            "source": "text-labeled" if labeled else "text",
+            "pos": m.start(),
+            "distance": m.start() if anchor is None else abs(m.start() - anchor),
+        })
+    return out
+
+def _anchor_pos(page: PageIndex, hints) -> int | None:
+    """產品標題（或型號）在扁平文字中的位置，作為「鄰近度」排序的基準"""
+    text = page.text
+    h1 = page.first("h1")
+    for hint in (*hints, h1.get_text(" ", strip=True) if h1 else None):
+        if hint:
+            i = text.find(hint)
+            if i >= 0:
+                return i
+    return None
+
+def price_candidates(page: PageIndex, *hints: str) -> list:
+    """
+    所有價格候選，依（來源, 與標題距離, 出現位置）做確定性排序。
+    hints：產品名稱/型號等，用來定位標題在文字中的位置。
+    結構化來源已有結果時不掃全文。
+    """
+    page = PageIndex.of(page)
+    found = [{**c, "pos": i, "distance": 0} for i, c in enumerate(_structured_prices(page))]
+    if not found:
+        found = scan_text_prices(page.text, _anchor_pos(page, hints))
+    found.sort(key=lambda c: (PRICE_SOURCES.index(c["source"]), c["distance"], c["pos"]))
+    return found
+
+@stage("find_price")
+def find_price(page: PageIndex, *hints: str) -> dict | None:
+    """最可能的產品價格：{"amount": float, "currency": "USD" | "TWD" | "EUR" | None}"""
+    cands = price_candidates(page, *hints)
+    if not cands:
+        return None
+    return {"amount": cands[0]["amount"], "currency": cands[0]["currency"]}
+
+def find_price_generic(page: PageIndex):
+    """相容舊介面：只回傳金額（float）"""
+    best = find_price(page)
+    return best["amount"] if best else None
+
+# ---------- 抓主圖（通用） ----------
+def _looks_like_logo(u: str) -> bool:
+    if not u:
+        return False
+    low = u.lower()
+    return any(k in low for k in ("logo", "sprite", "favicon", "icon", "social"))
+
+# OpenGraph / Twitter 圖片 meta（依優先順序）
+IMAGE_META_KEYS = (("property", "og:image"), ("name", "og:image"),
+                   ("property", "twitter:image"), ("name", "twitter:image"))
+
+def _meta_images(page: PageIndex, base_url: str):
+    for key in IMAGE_META_KEYS:
+        content = page.meta.get(key)
+        if content:
+            yield urljoin(base_url, content.strip())
+
+def _iter_generic_images(page: PageIndex, base_url: str):
+    """依可信度由高到低產生主圖候選（絕對網址，已排除 logo）"""
+    # 1) OpenGraph / Twitter，但過濾 logo
+    for u in _meta_images(page, base_url):
+        if not _looks_like_logo(u):
+            yield u
+
+    # 2) JSON-LD Product.image
+    for item in page.jsonld_items:
+        if not isinstance(item, dict):
+            continue
+        t = item.get("@type") or item.get("type")
+        t = [t] if isinstance(t, str) else (t or [])
+        t = [str(x).lower() for x in t]
+        if "product" in t:
+            img = item.get("image")
+            candidates = []
+            if isinstance(img, str):
+                candidates = [img]
+            elif isinstance(img, list):
+                candidates = [x for x in img if isinstance(x, str)]
+            elif isinstance(img, dict):
+                u = img.get("url") or img.get("@id")
+                if isinstance(u, str) and u.strip():
+                    candidates = [u]
+            for c in candidates:
+                absu = urljoin(base_url, c.strip())
+                if not _looks_like_logo(absu):
+                    yield absu
+
+    # 3) Heuristic: product-like <img>
+    for img in page.tags("img"):
+        src = img.get("src") or img.get("data-src") or img.get("data-original")
+        if not src:
+            continue
+        src = src.strip()
+        if not src or src.startswith("data:"):
+            continue
+        cls = " ".join(img.get("class", [])).lower()
+        iid = (img.get("id") or "").lower()
+        if any(k in (cls + " " + iid) for k in ["product", "main", "detail", "primary", "gallery"]):
+            absu = urljoin(base_url, src)
+            if not _looks_like_logo(absu):
+                yield absu
+
+@stage("find_image_generic")
+def find_image_generic(page: PageIndex, base_url: str):
+    """盡量找出產品主圖的絕對網址。避免回傳 logo。"""
+    return next(_iter_generic_images(PageIndex.of(page), base_url), None)
+
+def image_candidates_generic(page: PageIndex, base_url: str) -> list:
+    """所有通用規則找得到的主圖候選（去重、保留順序），給 image_probe 驗證用"""
+    return list(dict.fromkeys(_iter_generic_images(PageIndex.of(page), base_url)))
+
+# ---------- 快速欄位（有時限時先做） ----------
+@stage("quick_fields")
+def quick_fields(page: PageIndex, base_url: str) -> dict:
+    """
+    只看 <title> / meta / JSON-LD 的欄位（不掃全文、不走 DOM 啟發式），
+    完整擷取來不及做完時用來回傳部分結果。model 由呼叫端依網址補上。
+    """
+    page = PageIndex.of(page)
+    name = page.meta_content(("property", "og:title"), ("name", "og:title")) or page.title_text
+    price = next(_structured_prices(page), None)
+    image = next((u for u in _meta_images(page, base_url) if not _looks_like_logo(u)), None)
+    return {
+        "name": normalize_for_output(clean_text(name)),
+        "brand": None,
+        "model": None,
+        "price": price["amount"] if price else None,
+        "currency": price["currency"] if price else None,
+        "spec": None,
+        "imagelink": image,
+    }
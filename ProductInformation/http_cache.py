@@ -0,0 +1,196 @@
+# ProductInformation/http_cache.py
+"""
+可選的 HTTP 回應磁碟快取：
+- 內文以 zlib 壓縮存成 bodies/<key>.z，索引放在 index.sqlite
+- 再次抓取時送出 If-None-Match / If-Modified-Since，304 直接用磁碟內容
+- TTL：超過 ttl 秒未重新驗證的項目視為過期刪除
+- 總大小上限：超過 max_bytes 時依最後使用時間（LRU）淘汰
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key           TEXT PRIMARY KEY,
+    url           TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    encoding      TEXT,
+    headers       TEXT,
+    validated_at  REAL NOT NULL,
+    accessed_at   REAL NOT NULL,
+    size          INTEGER NOT NULL
+)
+"""
+
+def _key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+class CacheEntry:
+    __slots__ = ("key", "url", "etag", "last_modified", "encoding", "headers")
+
+    def __init__(self, key, url, etag, last_modified, encoding, headers):
+        self.key = key
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encoding = encoding
+        self.headers = headers
+
+    def conditional_headers(self) -> dict:
+        h = {}
+        if self.etag:
+            h["If-None-Match"] = self.etag
+        if self.last_modified:
+            h["If-Modified-Since"] = self.last_modified
+        return h
+
+class HttpCache:
+    def __init__(self, root: str = DEFAULT_DIR, ttl: float = 7 * 86400, max_bytes: int = 512 * 1024 * 1024):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._bodies = os.path.join(root, "bodies")
+        os.makedirs(self._bodies, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self._bodies, key + ".z")
+
+    def _drop(self, key: str):
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        try:
+            os.remove(self._body_path(key))
+        except OSError:
+            pass
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        key = _key(url)
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT etag, last_modified, encoding, headers, validated_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            if time.time() - row[4] > self.ttl or not os.path.exists(self._body_path(key)):
+                self._drop(key)
+                return None
+        return CacheEntry(key, url, row[0], row[1], row[2], json.loads(row[3] or "{}"))
+
+    def read_body(self, entry: CacheEntry) -> bytes | None:
+        try:
+            with open(self._body_path(entry.key), "rb") as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def touch(self, entry: CacheEntry, revalidated: bool = True):
+        now = time.time()
+        with self._lock, self._db:
+            if revalidated:
+                self._db.execute("UPDATE entries SET validated_at = ?, accessed_at = ? WHERE key = ?", (now, now, entry.key))
+            else:
+                self._db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, entry.key))
+
+    def store(self, url: str, resp, body: bytes | None = None) -> bool:
+        """
+        只快取帶驗證器（ETag / Last-Modified）且未標 no-store 的 200 回應。
+        串流讀取時由呼叫端讀完後傳入 body（resp.content 已無法再讀）。
+        """
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if resp.status_code != 200 or not (etag or last_modified):
+            return False
+        if "no-store" in (resp.headers.get("Cache-Control") or "").lower():
+            return False
+
+        key = _key(url)
+        blob = zlib.compress(resp.content if body is None else body, 6)
+        path = self._body_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)
+
+        keep = {k: v for k, v in resp.headers.items() if k.lower() in ("content-type", "etag", "last-modified")}
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, last_modified, resp.encoding, json.dumps(keep), now, now, len(blob)),
+            )
+        self.evict()
+        return True
+
+    def evict(self):
+        """先清過期，再依 accessed_at 由舊到新淘汰直到總大小低於上限"""
+        with self._lock, self._db:
+            cutoff = time.time() - self.ttl
+            for (key,) in self._db.execute("SELECT key FROM entries WHERE validated_at < ?", (cutoff,)).fetchall():
+                self._drop(key)
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall():
+                self._drop(key)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+    def invalidate(self, url: str):
+        with self._lock, self._db:
+            self._drop(_key(url))
+
+def _response_from_entry(entry: CacheEntry, body: bytes, url: str):
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    r = requests.Response()
+    r.status_code = 200
+    r._content = body
+    r._content_consumed = True  # 讓 iter_content() 直接切片重用內容
+    r.headers = CaseInsensitiveDict(entry.headers)
+    r.encoding = entry.encoding
+    r.url = url
+    r.from_cache = True
+    return r
+
+def cached_get(sess, url: str, cache: HttpCache | None, **kwargs):
+    """
+    sess.get 的快取版本：有快取就帶條件標頭，304 時回傳由磁碟重建的 Response
+    （.from_cache = True）。cache 為 None 時等同 sess.get。
+    stream=True 時不會自動寫入快取，由呼叫端讀完完整內文後自行 cache.store(url, resp, body)。
+    """
+    if cache is None:
+        return sess.get(url, **kwargs)
+
+    entry = cache.lookup(url)
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry:
+        headers.update(entry.conditional_headers())
+    resp = sess.get(url, headers=headers, **kwargs)
+
+    if entry and resp.status_code == 304:
+        resp.close()
+        body = cache.read_body(entry)
+        if body is not None:
+            cache.touch(entry)
+            return _response_from_entry(entry, body, url)
+        # 磁碟內容遺失：丟掉索引，重新完整抓一次
+        cache.invalidate(url)
+        resp = sess.get(url, headers={k: v for k, v in headers.items() if not k.startswith("If-")}, **kwargs)
+
+    if resp.status_code == 200 and not kwargs.get("stream"):
+        cache.store(url, resp)
+    return resp
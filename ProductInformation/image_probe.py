@@ -0,0 +1,161 @@
+# ProductInformation/image_probe.py
+"""
+圖片候選驗證：對前 N 個候選網址同時送出 Range: bytes=0-(PROBE_BYTES-1) 的 GET，
+只讀開頭幾 KB，從檔頭解出格式與像素尺寸（PNG / GIF / JPEG / WebP），
+挑出「能下載、真的是圖片、面積最大」的那一個。
+不必把每張候選圖都完整下載，也避免之後 downloadAndSaveProductImage 才發現是死連結或縮圖。
+"""
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import deadline
+
+# JPEG 的 SOF 區段可能排在 EXIF 之後，多讀一點
+PROBE_BYTES = 32 * 1024
+
+# 比這個小的視為縮圖/圖示，不採用（除非沒有其他可用的候選）
+MIN_SIDE = 64
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def _jpeg_size(data: bytes):
+    i = 2
+    n = len(data)
+    while i + 9 < n:
+        if data[i] != 0xFF:
+            i += 1
+            continue
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        if marker in _JPEG_SOF:
+            h, w = struct.unpack(">HH", data[i + 5:i + 9])
+            return w, h
+        seg_len = struct.unpack(">H", data[i + 2:i + 4])[0]
+        i += 2 + seg_len
+    return None, None
+
+def _webp_size(data: bytes):
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30 and data[23:26] == b"\x9d\x01\x2a":
+        w, h = struct.unpack("<HH", data[26:30])
+        return w & 0x3FFF, h & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25 and data[20] == 0x2F:
+        b0, b1, b2, b3 = data[21:25]
+        w = 1 + (((b1 & 0x3F) << 8) | b0)
+        h = 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        return w, h
+    if chunk == b"VP8X" and len(data) >= 30:
+        w = 1 + int.from_bytes(data[24:27], "little")
+        h = 1 + int.from_bytes(data[27:30], "little")
+        return w, h
+    return None, None
+
+def sniff_image(data: bytes):
+    """
+    由檔頭判斷格式與尺寸；回傳 (format, width, height)，不是圖片回傳 None。
+    格式認得但尺寸不在已讀到的範圍內時，width/height 為 None。
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        if len(data) >= 24 and data[12:16] == b"IHDR":
+            return ("png", *struct.unpack(">II", data[16:24]))
+        return ("png", None, None)
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        if len(data) >= 10:
+            return ("gif", *struct.unpack("<HH", data[6:10]))
+        return ("gif", None, None)
+    if data.startswith(b"\xff\xd8"):
+        return ("jpeg", *_jpeg_size(data))
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ("webp", *_webp_size(data))
+    return None
+
+def probe(sess, url: str, scheduler=None, timeout: float = 10, stop_at: float | None = None) -> dict:
+    """
+    讀取單一候選的開頭 PROBE_BYTES；伺服器不支援 Range 時讀到上限就關閉連線。
+    stop_at：time.monotonic() 的時間點（查詢時限）；排隊、節流等待與逾時都不超過它。
+    回傳 {"url", "ok", "format", "width", "height", "error"}。
+    """
+    info = {"url": url, "ok": False, "format": None, "width": None, "height": None}
+    left = None
+    if stop_at is not None:
+        left = stop_at - time.monotonic()
+        if left <= 0:
+            info["error"] = "deadline exceeded before probe"
+            return info
+        timeout = min(timeout, left)
+    try:
+        with deadline.until(stop_at):
+            data = _probe_head(sess, url, scheduler, timeout, left)
+    except Exception as e:
+        info["error"] = str(e)
+        return info
+
+    sniffed = sniff_image(data)
+    if not sniffed:
+        info["error"] = "not an image"
+        return info
+    info["format"], info["width"], info["height"] = sniffed
+    info["ok"] = True
+    return info
+
+def _probe_head(sess, url: str, scheduler, timeout: float, wait: float | None) -> bytes:
+    if scheduler is None:
+        return _read_head(sess, url, timeout)
+    with scheduler.slot(url, timeout=wait) as host:
+        scheduler.wait_turn(host, limit=wait)
+        try:
+            data = _read_head(sess, url, timeout)
+        except Exception as e:
+            # 圖片 404 不代表 host 有問題；連線錯誤、逾時、5xx 才算進斷路器
+            status = getattr(getattr(e, "response", None), "status_code", None)
+            scheduler.record(host, ok=status is not None and status < 500 and status != 429)
+            raise
+        scheduler.record(host, ok=True)
+        return data
+
+def _read_head(sess, url: str, timeout: float) -> bytes:
+    resp = sess.get(url, headers={"Range": f"bytes=0-{PROBE_BYTES - 1}"}, timeout=timeout, stream=True)
+    try:
+        resp.raise_for_status()
+        buf = bytearray()
+        for chunk in resp.iter_content(chunk_size=8 * 1024):
+            buf += chunk
+            if len(buf) >= PROBE_BYTES:
+                break
+        return bytes(buf[:PROBE_BYTES])
+    finally:
+        resp.close()
+
+def _score(info: dict, rank: int):
+    w, h = info["width"] or 0, info["height"] or 0
+    big_enough = 1 if min(w, h) >= MIN_SIDE else 0
+    # 夠大的優先；同樣夠大時面積大的優先；都一樣時維持原本字串規則的順序
+    return (big_enough, w * h, -rank)
+
+def pick_best(sess, urls: list, limit: int = 4, scheduler=None, pool: ThreadPoolExecutor | None = None,
+              stop_at: float | None = None) -> dict | None:
+    """
+    同時驗證前 limit 個候選，回傳最佳的那一筆 probe 結果（含 "probed" 個數）；全部失敗回傳 None。
+    pool：共用的執行緒池；沒給就臨時開一個。
+    stop_at：查詢時限（time.monotonic() 的時間點），每個探測都不會超過它。
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))[:max(1, limit)]
+    if not urls:
+        return None
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=len(urls)) as own:
+            infos = list(own.map(lambda u: probe(sess, u, scheduler, stop_at=stop_at), urls))
+    else:
+        infos = list(pool.map(lambda u: probe(sess, u, scheduler, stop_at=stop_at), urls))
+
+    valid = [(i, info) for i, info in enumerate(infos) if info["ok"]]
+    if not valid:
+        return None
+    _, best = max(valid, key=lambda x: _score(x[1], x[0]))
+    return {**best, "probed": len(urls)}
@@ -0,0 +1,23 @@
+# ProductInformation/lazy_re.py
+"""
+模組層級的 regex 延後編譯：第一次呼叫 .search / .finditer / .sub ... 時才 re.compile。
+冷啟動路徑（用法錯誤、快取命中）import 模組時不必付編譯成本。
+"""
+import re
+
+class LazyPattern:
+    __slots__ = ("_args", "_compiled")
+
+    def __init__(self, pattern, flags: int = 0):
+        self._args = (pattern, flags)
+        self._compiled = None
+
+    def __getattr__(self, name):
+        compiled = self._compiled
+        if compiled is None:
+            # 多執行緒同時編譯也只是重複做一次，結果相同
+            compiled = self._compiled = re.compile(*self._args)
+        return getattr(compiled, name)
+
+def lazy_compile(pattern, flags: int = 0) -> LazyPattern:
+    return LazyPattern(pattern, flags)
@@ -0,0 +1,203 @@
+# ProductInformation/model_index.py
+"""
+本地型號索引：貼上廠商網址之前就能知道這個料號是不是已經在庫存裡。
+
+- 來源：匯出的產品資料（/api/data/export 的 export.json 或 zip，{meta, data: {products: [...]}}）
+  以及結果快取裡分析過的結果；同一個鍵兩邊都有時以匯出資料（庫存）為準
+- 鍵與 canonical_identity 相同（"thorlabs:LA1951-A"），型號正規化由各廠商模組的 normalize_model 負責
+- 查詢：exact（dict）、prefix（排序好的型號清單 + bisect）、fuzzy（字元 trigram，第一次用到才建）
+- 存成一個 JSON 檔（依型號排序），載入時不必再排序
+- 從檔案載入的索引會記住檔案的 mtime；refreshed() 發現檔案被 index build 重建就重新載入，
+  常駐的 serve 行程不必重啟
+"""
+import bisect
+import json
+import os
+import re
+import time
+
+import vendors
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".model_index.json")
+FORMAT_VERSION = 1
+
+# 匯出的 Product 欄位 -> 分析結果欄位
+_EXPORT_FIELDS = (("name", "name"), ("brand", "brand"), ("model", "model"),
+                  ("specifications", "spec"), ("imageLink", "imagelink"))
+_RESULT_FIELDS = ("name", "brand", "model", "price", "currency", "spec", "imagelink")
+
+def _split(identity: str):
+    vendor, _, model = identity.partition(":")
+    return vendor, model
+
+def _trigrams(s: str) -> set:
+    # 分隔符號不算（"LA1951A" 與 "LA1951-A" 視為相同）
+    s = f"  {re.sub(r'[^0-9A-Z+]', '', s.upper())} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def load_export_products(path: str) -> list:
+    """export.json 或含 export.json 的 zip -> products 清單"""
+    import zipfile
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as z:
+            name = next((n for n in z.namelist() if n.rsplit("/", 1)[-1] == "export.json"), None)
+            if name is None:
+                return []
+            snap = json.loads(z.read(name).decode("utf-8"))
+    else:
+        with open(path, encoding="utf-8") as f:
+            snap = json.load(f)
+    products = (snap.get("data") or {}).get("products") if isinstance(snap, dict) else None
+    return products if isinstance(products, list) else []
+
+def _export_record(p: dict) -> dict:
+    rec = {dst: (p.get(src) or None) for src, dst in _EXPORT_FIELDS}
+    try:
+        rec["price"] = float(p["price"]) if p.get("price") not in (None, "") else None
+    except (TypeError, ValueError):
+        rec["price"] = None
+    rec["currency"] = None
+    return rec
+
+class ModelIndex:
+    def __init__(self, entries: list | None = None, built_at: float | None = None,
+                 path: str | None = None, mtime: int | None = None):
+        # entries：[{"identity", "source", "id"?, "url"?, "record"}]，依 (型號, identity) 排序
+        self.entries = entries or []
+        self.built_at = built_at
+        self.path = path
+        self.mtime = mtime
+        self._exact = {e["identity"]: i for i, e in enumerate(self.entries)}
+        self._models = [_split(e["identity"])[1] for e in self.entries]
+        self._grams = None
+
+    # ---------- 建立 / 存取 ----------
+    @classmethod
+    def build(cls, export_paths=(), result_cache=None) -> "ModelIndex":
+        by_identity = {}
+        if result_cache is not None:
+            for key, url, result in result_cache.entries():
+                identity = key.partition("@")[0]
+                if identity and isinstance(result, dict) and "error" not in result:
+                    rec = {k: result.get(k) for k in _RESULT_FIELDS}
+                    by_identity[identity] = {"identity": identity, "source": "result_cache", "url": url, "record": rec}
+        for path in export_paths:
+            for p in load_export_products(path):
+                if not isinstance(p, dict):
+                    continue
+                identity = vendors.identity_for(p.get("brand"), p.get("model"))
+                if identity:
+                    by_identity[identity] = {"identity": identity, "source": "export", "id": p.get("id"),
+                                             "record": _export_record(p)}
+        entries = sorted(by_identity.values(), key=lambda e: (_split(e["identity"])[1], e["identity"]))
+        return cls(entries, built_at=time.time())
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PATH) -> "ModelIndex":
+        """索引檔不存在或格式不符時回傳空索引（仍記住 path，之後檔案出現時 refreshed() 會載入）"""
+        mtime = _mtime(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path=path, mtime=mtime)
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            return cls(path=path, mtime=mtime)
+        return cls(data.get("entries") or [], built_at=data.get("built_at"), path=path, mtime=mtime)
+
+    def refreshed(self) -> "ModelIndex":
+        """檔案的 mtime 變了就回傳重新載入的索引，否則回傳自己（只多一次 stat）"""
+        if self.path is None or _mtime(self.path) == self.mtime:
+            return self
+        return ModelIndex.load(self.path)
+
+    def save(self, path: str = DEFAULT_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": FORMAT_VERSION, "built_at": self.built_at, "entries": self.entries},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---------- 查詢 ----------
+    def get(self, identity: str) -> dict | None:
+        i = self._exact.get(identity)
+        return self.entries[i] if i is not None else None
+
+    def prefix(self, model: str, vendor: str | None = None, limit: int = 10) -> list:
+        model = " ".join(model.split()).upper()
+        out = []
+        i = bisect.bisect_left(self._models, model)
+        while i < len(self._models) and self._models[i].startswith(model) and len(out) < limit:
+            e = self.entries[i]
+            if vendor is None or _split(e["identity"])[0] == vendor:
+                out.append(e)
+            i += 1
+        return out
+
+    def fuzzy(self, model: str, vendor: str | None = None, limit: int = 5, min_score: float = 0.4) -> list:
+        """trigram Jaccard 相似度；回傳 [(score, entry)]，由高到低"""
+        if self._grams is None:
+            grams = {}
+            for i, m in enumerate(self._models):
+                for g in _trigrams(m):
+                    grams.setdefault(g, []).append(i)
+            self._grams = grams
+        q = _trigrams(model)
+        shared = {}
+        for g in q:
+            for i in self._grams.get(g, ()):
+                shared[i] = shared.get(i, 0) + 1
+        scored = []
+        for i, n in shared.items():
+            e = self.entries[i]
+            if vendor is not None and _split(e["identity"])[0] != vendor:
+                continue
+            score = n / (len(q) + len(_trigrams(self._models[i])) - n)
+            if score >= min_score:
+                scored.append((round(score, 3), e))
+        scored.sort(key=lambda x: (-x[0], x[1]["identity"]))
+        return scored[:limit]
+
+    def lookup(self, query: str, limit: int = 10) -> list:
+        """
+        query：網址、"vendor:MODEL" 或單純型號。依序試 exact -> prefix -> fuzzy，
+        回傳 [{"match": "exact"|"prefix"|"fuzzy", "score", ...entry}]。
+        """
+        query = query.strip()
+        if "://" in query:
+            identity = vendors.canonical_identity(query)
+            if not identity:
+                return []
+            vendor, model = _split(identity)
+        elif ":" in query:
+            vendor, model = _split(query)
+            identity = vendors.identity_for(vendor, model)
+            vendor = vendors.vendor_key(vendor)
+        else:
+            vendor, model, identity = None, query, None
+
+        if identity:
+            hit = self.get(identity)
+            if hit:
+                return [{"match": "exact", "score": 1.0, **hit}]
+        elif model:
+            norm = " ".join(model.split()).upper()
+            exact = [e for e in self.prefix(model, limit=limit) if _split(e["identity"])[1] == norm]
+            if exact:
+                return [{"match": "exact", "score": 1.0, **e} for e in exact]
+
+        hits = self.prefix(model, vendor=vendor, limit=limit) if model else []
+        if hits:
+            return [{"match": "prefix", "score": round(len(model) / max(1, len(_split(e["identity"])[1])), 3), **e}
+                    for e in hits]
+        return [{"match": "fuzzy", "score": score, **e} for score, e in self.fuzzy(model, vendor=vendor, limit=limit)]
@@ -0,0 +1,113 @@
+# ProductInformation/page_index.py
+"""
+PageIndex：每份文件只走訪一次 DOM，預先整理出各解析器共用的資料。
+- jsonld_items：所有 application/ld+json 解析後的頂層物件（list 會攤平）
+- meta：(屬性, 值) -> content，例如 ("property", "og:image")
+- text / html：扁平文字與 HTML 原始碼（第一次用到才計算，之後重用；
+  建構時給了原始 markup 就直接用，不必再把整棵樹序列化）
+- tags(...)：依標籤名分組、保留文件順序的標籤清單
+
+build_page() 負責選擇 BeautifulSoup 的 tree builder：有裝 lxml 就用（C 實作，
+大頁面快很多），沒有就退回純 Python 的 html.parser。
+"""
+import heapq
+import json
+from functools import cached_property, lru_cache
+
+# 由快到慢；"auto" 取第一個可用的
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+_META_KEYS = ("property", "name", "itemprop")
+
+class PageIndex:
+    def __init__(self, soup, markup: str | None = None):
+        self.soup = soup
+        self._markup = markup
+        self._by_name = {}
+        for pos, tag in enumerate(soup.find_all(True)):
+            self._by_name.setdefault(tag.name, []).append((pos, tag))
+
+    @classmethod
+    def of(cls, page_or_soup) -> "PageIndex":
+        """接受 PageIndex 或 BeautifulSoup，讓舊的呼叫方式繼續可用"""
+        if isinstance(page_or_soup, cls):
+            return page_or_soup
+        return cls(page_or_soup)
+
+    def tags(self, *names: str) -> list:
+        """依文件順序回傳指定名稱的標籤（相當於 soup.find_all([...]) 但不重走 DOM）"""
+        if len(names) == 1:
+            return [t for _, t in self._by_name.get(names[0], ())]
+        lists = [self._by_name.get(n, ()) for n in names]
+        return [t for _, t in heapq.merge(*lists, key=lambda x: x[0])]
+
+    def first(self, name: str):
+        lst = self._by_name.get(name)
+        return lst[0][1] if lst else None
+
+    @cached_property
+    def meta(self) -> dict:
+        """(attr, value) -> 第一個符合 meta 的 content（與 soup.find 取第一個的行為一致）"""
+        out = {}
+        for tag in self.tags("meta"):
+            for attr in _META_KEYS:
+                v = tag.get(attr)
+                if v:
+                    out.setdefault((attr, v), tag.get("content"))
+        return out
+
+    def meta_content(self, *keys) -> str | None:
+        """依序找 (attr, value)，回傳第一個非空 content"""
+        for key in keys:
+            v = self.meta.get(key)
+            if v:
+                return v
+        return None
+
+    @cached_property
+    def jsonld_items(self) -> list:
+        items = []
+        for tag in self.tags("script"):
+            if tag.get("type") != "application/ld+json":
+                continue
+            try:
+                data = json.loads(tag.string or "")
+            except Exception:
+                continue
+            items.extend(data if isinstance(data, list) else [data])
+        return items
+
+    @cached_property
+    def title_text(self) -> str | None:
+        t = self.first("title")
+        return t.get_text() if t else None
+
+    @cached_property
+    def text(self) -> str:
+        return self.soup.get_text(" ", strip=True)
+
+    @cached_property
+    def html(self) -> str:
+        return self._markup if self._markup is not None else str(self.soup)
+
+
+@lru_cache(maxsize=None)
+def backend_available(name: str) -> bool:
+    if name == "html.parser":
+        return True
+    # 只查有沒有安裝，不真的 import：快取命中的查詢根本不會解析，不必付 lxml 的載入成本
+    import importlib.util
+    return importlib.util.find_spec(name) is not None
+
+def resolve_backend(name: str = "auto") -> str:
+    """把 "auto" 或未安裝的 backend 換成實際可用的那一個"""
+    if name != "auto" and backend_available(name):
+        return name
+    for b in PARSER_BACKENDS:
+        if backend_available(b):
+            return b
+    return "html.parser"
+
+def build_page(markup: str, backend: str = "auto") -> PageIndex:
+    from bs4 import BeautifulSoup
+    return PageIndex(BeautifulSoup(markup, resolve_backend(backend)), markup=markup)
@@ -0,0 +1,155 @@
+# ProductInformation/politeness.py
+"""
+每個 host 各自的抓取節流：
+- 併發上限：同一 host 同時最多 concurrency 個請求（共用 session 的連線池）
+- 速率上限：token bucket，平均 rate 個請求/秒，最多累積 burst 個
+- Retry-After：429/503 帶 Retry-After 時，整個 host 暫停到指定時間，而不是各執行緒各自重試
+- 斷路器：連續 failures 次失敗就「跳脫」cooldown 秒，期間該 host 的網址直接失敗，
+  不再各自耗掉三次重試與 25 秒逾時；冷卻後放行，下一次成功才完全恢復
+"""
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# 視為「host 出狀況」的狀態碼：會退避重試，也算進斷路器
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class CircuitOpenError(Exception):
+    pass
+
+def parse_retry_after(value) -> float | None:
+    """Retry-After 可以是秒數或 HTTP 日期；回傳距現在的秒數"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def host_of(url: str) -> str:
+    try:
+        return (urlparse(url).hostname or "").lower()
+    except ValueError:
+        return ""
+
+class _Host:
+    __slots__ = ("sem", "lock", "tokens", "refilled_at", "paused_until", "failures", "open_until")
+
+    def __init__(self, concurrency: int, burst: float):
+        self.sem = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.tokens = burst
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0
+        self.failures = 0
+        self.open_until = 0.0
+
+class HostScheduler:
+    """
+    concurrency：每個 host 同時進行的請求數上限
+    rate / burst：每個 host 的平均請求數/秒與可累積的突發量；rate <= 0 表示不限速
+    failures / cooldown：連續失敗幾次跳脫斷路器、跳脫後冷卻幾秒
+    max_wait：Retry-After 超過這個秒數就不在原地等，改成讓斷路器跳脫到該時間
+    """
+    def __init__(self, concurrency: int = 4, rate: float = 2.0, burst: float = 4.0,
+                 failures: int = 5, cooldown: float = 60.0, max_wait: float = 30.0):
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.failure_threshold = max(1, failures)
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, host: str) -> _Host:
+        h = self._hosts.get(host)
+        if h is None:
+            with self._lock:
+                h = self._hosts.setdefault(host, _Host(self.concurrency, self.burst))
+        return h
+
+    def _check_circuit(self, host: str, h: _Host):
+        left = h.open_until - time.monotonic()
+        if left > 0:
+            raise CircuitOpenError(f"circuit open for {host} ({left:.0f}s left)")
+
+    @contextmanager
+    def slot(self, url: str, timeout: float | None = None):
+        """
+        佔用該 host 的一個併發名額；斷路器跳脫中直接丟 CircuitOpenError。
+        timeout：最多排隊幾秒，等不到名額丟 TimeoutError（None 表示一直等）
+        """
+        host = host_of(url)
+        h = self._host(host)
+        self._check_circuit(host, h)
+        if timeout is None:
+            h.sem.acquire()
+        elif not h.sem.acquire(timeout=max(0.0, timeout)):
+            raise TimeoutError(f"no free slot for {host} within {timeout:.1f}s")
+        try:
+            # 排隊期間斷路器可能已經跳脫
+            self._check_circuit(host, h)
+            yield host
+        finally:
+            h.sem.release()
+
+    def wait_turn(self, host: str, limit: float | None = None) -> float:
+        """
+        依 token bucket 與 Retry-After 暫停等到可以送出請求；回傳等待秒數。
+        limit：需要等超過這個秒數就不等了，歸還預約的 token 並丟 TimeoutError
+        """
+        h = self._host(host)
+        with h.lock:
+            now = time.monotonic()
+            wait = max(0.0, h.paused_until - now)
+            if self.rate > 0:
+                h.tokens = min(self.burst, h.tokens + (now - h.refilled_at) * self.rate)
+                h.refilled_at = now
+                # 先預約一個 token（可以變負數），排在後面的人自然等得更久
+                h.tokens -= 1
+                if h.tokens < 0:
+                    wait = max(wait, -h.tokens / self.rate)
+            if limit is not None and wait > limit:
+                if self.rate > 0:
+                    h.tokens += 1
+                raise TimeoutError(f"{host} is throttled for {wait:.1f}s")
+        if wait > 0:
+            time.sleep(wait)
+        self._check_circuit(host, h)
+        return wait
+
+    def pause(self, host: str, seconds: float):
+        """整個 host 暫停 seconds 秒（Retry-After）；太久就直接跳脫斷路器"""
+        h = self._host(host)
+        with h.lock:
+            until = time.monotonic() + seconds
+            if seconds > self.max_wait:
+                h.open_until = max(h.open_until, until)
+            else:
+                h.paused_until = max(h.paused_until, until)
+
+    def record(self, host: str, ok: bool):
+        h = self._host(host)
+        with h.lock:
+            if ok:
+                h.failures = 0
+                return
+            h.failures += 1
+            if h.failures >= self.failure_threshold:
+                h.open_until = max(h.open_until, time.monotonic() + self.cooldown)
+
+    def snapshot(self) -> dict:
+        """各 host 目前的狀態（除錯/摘要用）"""
+        now = time.monotonic()
+        with self._lock:
+            items = list(self._hosts.items())
+        return {
+            host: {"failures": h.failures, "open_for_s": round(max(0.0, h.open_until - now), 1)}
+            for host, h in items
+        }
@@ -0,0 +1,122 @@
+# ProductInformation/refresh_state.py
+"""
+增量更新（analyze_cli.py refresh）用的狀態：
+- page_fingerprint()：只對「會影響擷取結果的區域」做雜湊——<title>、產品相關 meta、
+  JSON-LD、可見文字、圖片網址；inline script/style、註解、隱藏欄位等每次載入都會變的
+  token（CSRF、nonce、追蹤參數）不算在內
+- RefreshState：每個網址上次的指紋與擷取結果（SQLite），指紋沒變就不必重新解析
+"""
+import hashlib
+import html
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".refresh_state.sqlite")
+
+# 會被回報的欄位；其他欄位（name、brand…）變了只更新狀態，不輸出
+WATCHED_FIELDS = ("price", "spec", "imagelink")
+
+# ---------- 指紋 ----------
+_DROP_BLOCKS = re.compile(
+    r"<(script|style|noscript|template|svg)\b[^>]*>.*?</\1\s*>|<!--.*?-->|<input\b[^>]*>", re.I | re.S)
+_JSONLD = re.compile(
+    r"""<script\b[^>]*type\s*=\s*["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""", re.I | re.S)
+_TITLE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.I | re.S)
+_META = re.compile(r"<meta\b[^>]*>", re.I)
+_ATTR = re.compile(r"""([\w:-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)""")
+_IMG_URL = re.compile(
+    r"""\b(?:src|data-src|data-original|data-large|data-zoom-image|data-image|data-full|href|content)\s*=\s*["']?"""
+    r"""([^"'\s>]+\.(?:jpe?g|png|webp|gif))\b""", re.I)
+_TAG = re.compile(r"<[^>]+>")
+_WS = re.compile(r"\s+")
+
+# 只保留跟產品有關的 meta；csrf-token、request-id 之類每次都會變的略過
+_META_KEEP = re.compile(r"^(?:og:|twitter:image|twitter:title|product:|description$)", re.I)
+
+def _norm(s: str) -> str:
+    return _WS.sub(" ", html.unescape(s)).strip()
+
+def _meta_parts(markup: str):
+    for m in _META.finditer(markup):
+        attrs = {k.lower(): v.strip("\"'") for k, v in _ATTR.findall(m.group(0))}
+        key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+        if key and ("itemprop" in attrs or _META_KEEP.match(key)):
+            yield f"{key}={_norm(attrs.get('content', ''))}"
+
+def _jsonld_parts(markup: str):
+    for m in _JSONLD.finditer(markup):
+        raw = m.group(1)
+        try:
+            yield json.dumps(json.loads(raw), sort_keys=True, ensure_ascii=False)
+        except ValueError:
+            yield _norm(raw)
+
+def page_fingerprint(markup: str) -> str:
+    """對正規化後的相關區域做 sha256；同一頁面只差在 token/廣告腳本時結果相同"""
+    title = _TITLE.search(markup)
+    visible = _TAG.sub(" ", _DROP_BLOCKS.sub(" ", markup))
+    parts = [
+        _norm(title.group(1)) if title else "",
+        *_meta_parts(markup),
+        *_jsonld_parts(markup),
+        *dict.fromkeys(m.group(1) for m in _IMG_URL.finditer(markup)),
+        _norm(visible),
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+# ---------- 狀態 ----------
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url         TEXT PRIMARY KEY,
+    identity    TEXT,
+    version     TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    result      TEXT NOT NULL,
+    checked_at  REAL NOT NULL,
+    changed_at  REAL NOT NULL
+)
+"""
+
+class RefreshState:
+    """
+    version：parser 版本；與上次不同時即使指紋相同也要重新擷取
+    """
+    def __init__(self, path: str = DEFAULT_PATH, version: str = ""):
+        self.version = version
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def get(self, url: str):
+        """回傳 (fingerprint, result)；沒有紀錄或 parser 版本不同時 fingerprint 為 None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fingerprint, result, version FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if not row:
+            return None, None
+        fp = row[0] if row[2] == self.version else None
+        return fp, json.loads(row[1])
+
+    def touch(self, url: str):
+        with self._lock, self._db:
+            self._db.execute("UPDATE pages SET checked_at = ? WHERE url = ?", (time.time(), url))
+
+    def put(self, url: str, identity: str | None, fingerprint: str, result: dict, changed: bool):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                """INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET identity = excluded.identity, version = excluded.version,
+                       fingerprint = excluded.fingerprint, result = excluded.result,
+                       checked_at = excluded.checked_at,
+                       changed_at = CASE WHEN ? THEN excluded.changed_at ELSE pages.changed_at END""",
+                (url, identity, self.version, fingerprint, json.dumps(result, ensure_ascii=False), now, now, changed),
+            )
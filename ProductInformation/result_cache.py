@@ -0,0 +1,81 @@
+# ProductInformation/result_cache.py
+"""
+解析結果快取：以「廠商 + 正規化型號 @ 地區」為鍵（analyze_cli.cache_key），存 parse_* 產出的最終 dict。
+- 每筆有自己的到期時間（expires_at）
+- 帶 parser 版本；版本不同的舊資料視同未命中
+- 命中時完全不需要抓網頁或建 BeautifulSoup
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".result_cache.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    identity   TEXT PRIMARY KEY,
+    version    TEXT NOT NULL,
+    url        TEXT,
+    result     TEXT NOT NULL,
+    stored_at  REAL NOT NULL,
+    expires_at REAL NOT NULL
+)
+"""
+
+class ResultCache:
+    def __init__(self, path: str = DEFAULT_PATH, version: str = "", ttl: float = 86400):
+        self.version = version
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(_SCHEMA)
+
+    def get(self, identity: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM results WHERE identity = ? AND version = ? AND expires_at > ?",
+                (identity, self.version, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, identity: str, result: dict, url: str | None = None, ttl: float | None = None):
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (identity, self.version, url, json.dumps(result, ensure_ascii=False), now, now + ttl),
+            )
+
+    def entries(self):
+        """目前 parser 版本的所有項目 (鍵, url, result)，包含已過期的（給型號索引用；鍵帶地區）"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT identity, url, result FROM results WHERE version = ?", (self.version,)
+            ).fetchall()
+        for identity, url, result in rows:
+            yield identity, url, json.loads(result)
+
+    def invalidate(self, identity: str) -> int:
+        """刪掉該鍵；鍵沒有帶地區（"thorlabs:LA1951-A"）時，所有地區的項目一起刪"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM results WHERE identity = ? OR (instr(?, '@') = 0 AND substr(identity, 1, length(?) + 1) = ? || '@')",
+                (identity, identity, identity, identity),
+            ).rowcount
+
+    def clear(self) -> int:
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM results").rowcount
+
+    def purge(self) -> int:
+        """刪掉過期或 parser 版本不符的項目"""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM results WHERE expires_at <= ? OR version != ?", (time.time(), self.version)
+            ).rowcount
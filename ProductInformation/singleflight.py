@@ -0,0 +1,222 @@
+# ProductInformation/singleflight.py
+"""
+跨行程的單一飛行（single-flight）：同一個鍵（正規化網址）同時只有一個行程在抓取/解析，
+其他行程（或同一行程的其他執行緒）等它做完、直接讀它寫出的結果。
+
+- 協調用 OS 檔案鎖（POSIX flock / Windows msvcrt.locking），鎖綁在開啟的檔案上：
+  領頭的行程當掉或被 SIGKILL 時鎖由作業系統自動釋放，不會留下卡死的鎖
+- 領頭者做完後把結果原子地寫到 <key>.json（暫存檔 + os.replace）才放鎖
+- 跟隨者拿到鎖後，結果檔是在它開始等待之後寫的就直接用；否則代表領頭者中途死掉，
+  改由自己領頭重做
+- 只分享可以分享的結果（share(result) 為真，例如非錯誤、非部分結果）；不能分享時寫一個標記，
+  等待中的跟隨者看到標記就各自執行，不會沿用一次暫時性的失敗，也不必排隊輪流重試
+- 舊的結果檔與鎖檔定期清掉；鎖檔要能以非阻塞方式鎖到（沒有人在用）才刪，
+  正被持有的鎖檔不動（刪除正被別人鎖住的檔案會讓兩邊各鎖各的）。
+  清理前就已開啟鎖檔的行程仍可能鎖到被刪掉的舊檔，所以拿到鎖後要確認鎖的還是
+  目前那個路徑上的檔案，不是就重新開啟
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".inflight")
+
+# 等領頭者的上限（秒）：要比呼叫端（route.ts）的 30 秒逾時短，超過就自己做
+DEFAULT_WAIT = 25.0
+POLL_INTERVAL = 0.05
+# 結果檔、鎖檔比這個舊就刪掉（只在領頭寫檔時順便清，每個行程最多一次/分鐘）
+RESULT_TTL = 600.0
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(fd) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd):
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+def _is_current(fd, path: str) -> bool:
+    """fd 是否仍是 path 上的那個檔案（沒有在開啟後被刪除或換掉）"""
+    try:
+        return os.path.samestat(os.fstat(fd), os.stat(path))
+    except OSError:
+        return False
+
+class SingleFlight:
+    """
+    directory：鎖檔與結果檔的目錄
+    wait：跟隨者最多等幾秒；逾時就不再等，自己執行
+    """
+    def __init__(self, directory: str = DEFAULT_DIR, wait: float = DEFAULT_WAIT):
+        self.directory = directory
+        self.wait = wait
+        os.makedirs(directory, exist_ok=True)
+        self._purged_at = 0.0
+        self._purge_lock = threading.Lock()
+
+    def _paths(self, key: str):
+        h = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        base = os.path.join(self.directory, h)
+        return base + ".lock", base + ".json"
+
+    def do(self, key: str, fn, wait: float | None = None, share=None):
+        """
+        回傳 (result, role)；role 為 "leader"（自己執行 fn）、"follower"（沿用別人的結果）、
+        "timeout"（等太久，自己執行）或 "unshared"（領頭者的結果不能分享，自己執行）。
+        fn 的回傳值必須可以 JSON 序列化。
+        wait：這次最多等幾秒（預設 self.wait；有查詢時限時由呼叫端縮短）
+        share：share(result) 為假的結果不分享給跟隨者（預設全部分享）
+        """
+        lock_path, result_path = self._paths(key)
+        started = time.time()
+        deadline = time.monotonic() + (self.wait if wait is None else min(self.wait, wait))
+        fd, waited = self._acquire(lock_path, deadline)
+        if fd is None:
+            return fn(), "timeout"
+        try:
+            if not waited:
+                return self._lead(fd, lock_path, result_path, fn, share), "leader"
+
+            found, shared = self._read_result(result_path, since=started)
+            if found == "unshared":
+                _unlock(fd)
+                return fn(), "unshared"
+            if found == "result":
+                _unlock(fd)
+                return shared, "follower"
+            # 領頭者沒留下結果就放掉鎖（當掉、被砍）：換自己領頭
+            return self._lead(fd, lock_path, result_path, fn, share), "leader"
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _acquire(lock_path: str, deadline: float):
+        """
+        鎖住 lock_path，回傳 (fd, 是否等過別人)；到 deadline 還拿不到回傳 (None, True)。
+        鎖到的檔案已被清理刪掉（別人可能正在新建的同名檔上領頭）就放掉、重新開啟再鎖。
+        """
+        waited = False
+        while True:
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            locked = False
+            try:
+                while not _try_lock(fd):
+                    if time.monotonic() >= deadline:
+                        return None, True
+                    waited = True
+                    time.sleep(POLL_INTERVAL)
+                locked = True
+                if _is_current(fd, lock_path):
+                    return fd, waited
+                _unlock(fd)
+                locked = False
+            finally:
+                if not locked:
+                    os.close(fd)
+
+    def _lead(self, fd, lock_path: str, result_path: str, fn, share=None):
+        """已持有鎖：執行 fn、寫出結果（或不分享的標記）後放鎖（fn 丟例外也一定放鎖）"""
+        try:
+            # 更新鎖檔時間：清理時只看得到很久沒人領頭的鎖檔
+            os.utime(lock_path)
+        except OSError:
+            pass
+        try:
+            result = fn()
+            if share is None or share(result):
+                self._write_result(result_path, {"result": result})
+            else:
+                self._write_result(result_path, {"shared": False})
+            return result
+        finally:
+            _unlock(fd)
+
+    def _write_result(self, path: str, payload: dict):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"written_at": time.time(), **payload}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._maybe_purge()
+
+    @staticmethod
+    def _read_result(path: str, since: float):
+        """回傳 (狀態, result)；狀態為 "result"、"unshared" 或 None（沒有這一輪的結果）"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        # 開始等待之前就寫好的是上一輪的結果，不算
+        if not isinstance(data, dict) or data.get("written_at", 0) < since - 1.0:
+            return None, None
+        if data.get("shared") is False:
+            return "unshared", None
+        if "result" not in data:
+            return None, None
+        return "result", data["result"]
+
+    def _maybe_purge(self):
+        now = time.time()
+        with self._purge_lock:
+            if now - self._purged_at < 60:
+                return
+            self._purged_at = now
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for e in entries:
+            try:
+                if now - e.stat().st_mtime <= RESULT_TTL:
+                    continue
+                if e.name.endswith((".json", ".tmp")):
+                    os.remove(e.path)
+                elif e.name.endswith(".lock"):
+                    self._remove_idle_lock(e.path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove_idle_lock(path: str):
+        """
+        鎖得到（沒有人持有）才刪；刪除時仍持有鎖。之前就開啟了這個檔案的行程之後仍鎖得到
+        已刪除的舊檔，由 _acquire 檢查後改開新檔
+        """
+        fd = os.open(path, os.O_RDWR)
+        try:
+            if not _try_lock(fd):
+                return
+            try:
+                os.remove(path)
+            finally:
+                _unlock(fd)
+        finally:
+            os.close(fd)
@@ -0,0 +1,6 @@
+# ProductInformation/tests/conftest.py
+# 模組之間用扁平 import（與 analyze_cli.py 直接執行時相同），測試時把 ProductInformation 放進 sys.path
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
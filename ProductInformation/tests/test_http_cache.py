@@ -0,0 +1,35 @@
+# ProductInformation/tests/test_http_cache.py
+from http_cache import HttpCache
+
+URL = "https://example.com/p/1"
+
+class _Resp:
+    def __init__(self, status_code=200, headers=None, content=b"<html>ok</html>"):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = content
+        self.encoding = "utf-8"
+
+def test_stores_only_responses_with_validators(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert not cache.store(URL, _Resp())
+    assert not cache.store(URL, _Resp(headers={"ETag": '"a"', "Cache-Control": "no-store"}))
+    assert not cache.store(URL, _Resp(status_code=404, headers={"ETag": '"a"'}))
+    assert cache.lookup(URL) is None
+
+def test_round_trip_and_invalidate(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.store(URL, _Resp(headers={"ETag": '"a"', "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+    entry = cache.lookup(URL)
+    assert entry.conditional_headers() == {
+        "If-None-Match": '"a"',
+        "If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT",
+    }
+    assert cache.read_body(entry) == b"<html>ok</html>"
+    cache.invalidate(URL)
+    assert cache.lookup(URL) is None
+
+def test_expired_entries_are_dropped(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=-1)
+    cache.store(URL, _Resp(headers={"ETag": '"a"'}))
+    assert cache.lookup(URL) is None
@@ -0,0 +1,92 @@
+# ProductInformation/tests/test_politeness.py
+import threading
+import time
+
+import pytest
+
+from politeness import CircuitOpenError, HostScheduler, host_of, parse_retry_after
+
+URL = "https://example.com/p/1"
+
+def test_slot_without_timeout_waits_for_a_free_slot():
+    """名額都被佔住時，沒給 timeout 的呼叫端要排隊等，而不是立刻失敗"""
+    sched = HostScheduler(concurrency=1, rate=0)
+    entered = threading.Event()
+    errors = []
+
+    def waiter():
+        try:
+            with sched.slot(URL):
+                entered.set()
+        except Exception as e:  # 不應該發生
+            errors.append(e)
+
+    with sched.slot(URL):
+        t = threading.Thread(target=waiter)
+        t.start()
+        time.sleep(0.2)
+        assert not entered.is_set()
+        assert not errors
+    t.join(2)
+    assert entered.is_set()
+    assert not errors
+
+def test_slot_with_timeout_gives_up_when_host_is_full():
+    sched = HostScheduler(concurrency=1, rate=0)
+    with sched.slot(URL):
+        t0 = time.monotonic()
+        with pytest.raises(TimeoutError):
+            with sched.slot(URL, timeout=0.1):
+                pass
+        assert time.monotonic() - t0 < 1.0
+    # 名額釋放後就拿得到
+    with sched.slot(URL, timeout=0.1):
+        pass
+
+def test_slots_are_per_host():
+    sched = HostScheduler(concurrency=1, rate=0)
+    with sched.slot(URL):
+        with sched.slot("https://other.example.org/x", timeout=0):
+            pass
+
+def test_breaker_opens_after_failures_and_recovers_after_cooldown():
+    sched = HostScheduler(concurrency=2, rate=0, failures=2, cooldown=0.2)
+    host = host_of(URL)
+    sched.record(host, ok=False)
+    with sched.slot(URL):
+        pass
+    sched.record(host, ok=False)
+    with pytest.raises(CircuitOpenError):
+        with sched.slot(URL):
+            pass
+    assert sched.snapshot()[host]["failures"] == 2
+
+    time.sleep(0.25)
+    with sched.slot(URL):
+        pass
+    sched.record(host, ok=True)
+    assert sched.snapshot()[host] == {"failures": 0, "open_for_s": 0.0}
+
+def test_long_retry_after_opens_the_breaker():
+    sched = HostScheduler(rate=0, max_wait=1.0)
+    sched.pause(host_of(URL), 30)
+    with pytest.raises(CircuitOpenError):
+        with sched.slot(URL):
+            pass
+
+def test_wait_turn_over_limit_refunds_the_token():
+    sched = HostScheduler(rate=1.0, burst=1.0)
+    host = host_of(URL)
+    assert sched.wait_turn(host) == 0
+    with pytest.raises(TimeoutError):
+        sched.wait_turn(host, limit=0.1)
+    # 沒有被預約掉的 token：下一個人只需要等約一秒，不是兩秒
+    t0 = time.monotonic()
+    sched.wait_turn(host)
+    assert time.monotonic() - t0 < 1.5
+
+def test_parse_retry_after():
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
@@ -0,0 +1,37 @@
+# ProductInformation/tests/test_result_cache.py
+import time
+
+from analyze_cli import PARSER_VERSION, _open_result_cache
+from result_cache import ResultCache
+
+RESULT = {"name": "Plano-Convex Lens", "model": "LA1951"}
+
+def test_parser_version_change_invalidates_entries(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    old = ResultCache(path, version="old")
+    old.put("thorlabs:LA1951@us", RESULT, url="https://www.thorlabs.com/thorproduct.cfm?partnumber=LA1951")
+    assert old.get("thorlabs:LA1951@us") == RESULT
+
+    new = ResultCache(path, version="new")
+    assert new.get("thorlabs:LA1951@us") is None
+    assert list(new.entries()) == []
+    assert new.purge() == 1
+    assert old.get("thorlabs:LA1951@us") is None
+
+def test_analyzer_cache_is_keyed_by_parser_version(tmp_path):
+    assert _open_result_cache(str(tmp_path / "results.sqlite")).version == PARSER_VERSION
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), version="v")
+    cache.put("k@us", RESULT, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("k@us") is None
+    assert cache.purge() == 1
+
+def test_invalidate_without_region_drops_every_region(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), version="v")
+    for key in ("thorlabs:LA1951@us", "thorlabs:LA1951@de", "thorlabs:LA1951-A@us"):
+        cache.put(key, RESULT)
+    assert cache.invalidate("thorlabs:LA1951") == 2
+    assert cache.get("thorlabs:LA1951-A@us") == RESULT
+    assert cache.invalidate("thorlabs:LA1951-A@us") == 1
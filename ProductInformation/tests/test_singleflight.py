@@ -0,0 +1,125 @@
+# ProductInformation/tests/test_singleflight.py
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import singleflight
+from singleflight import SingleFlight
+
+def test_lock_on_a_purged_file_is_not_taken_as_leadership(tmp_path, monkeypatch):
+    """
+    先開了鎖檔、還沒鎖之前檔案被清理刪掉，新來的行程建了新檔並領頭：
+    鎖到舊檔的一方不能也當領頭者，要改鎖新檔、排在新領頭者後面
+    """
+    sf = SingleFlight(str(tmp_path), wait=0.3)
+    lock_path, _ = sf._paths("k")
+    real_try_lock = singleflight._try_lock
+    newcomer = []
+
+    def racing_try_lock(fd):
+        if not newcomer:
+            os.remove(lock_path)
+            other = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+            assert real_try_lock(other)
+            newcomer.append(other)
+        return real_try_lock(fd)
+
+    monkeypatch.setattr(singleflight, "_try_lock", racing_try_lock)
+    try:
+        result, role = sf.do("k", lambda: "mine")
+    finally:
+        for fd in newcomer:
+            singleflight._unlock(fd)
+            os.close(fd)
+    assert (result, role) == ("mine", "timeout")
+
+# 在另一個行程領頭，印出 "leading" 後卡住，等著被砍
+_HANGING_LEADER = """
+import sys, time
+sys.path.insert(0, sys.argv[1])
+from singleflight import SingleFlight
+
+def hang():
+    print("leading", flush=True)
+    time.sleep(60)
+
+SingleFlight(sys.argv[2]).do("k", hang)
+"""
+
+def test_follower_takes_over_when_the_leader_is_killed(tmp_path):
+    leader = subprocess.Popen(
+        [sys.executable, "-c", _HANGING_LEADER, os.path.dirname(singleflight.__file__), str(tmp_path)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert leader.stdout.readline().strip() == "leading"
+        box = {}
+        follower = threading.Thread(
+            target=lambda: box.update(out=SingleFlight(str(tmp_path), wait=10).do("k", lambda: "mine"))
+        )
+        follower.start()
+        time.sleep(0.2)
+        assert follower.is_alive()
+        leader.kill()
+        follower.join(5)
+    finally:
+        leader.kill()
+        leader.wait()
+    assert box["out"] == ("mine", "leader")
+
+def test_followers_reuse_a_shared_result(tmp_path):
+    sf = SingleFlight(str(tmp_path), wait=5)
+    release = threading.Event()
+    out = {}
+
+    def slow():
+        release.wait(5)
+        return {"model": "LA1951"}
+
+    leader = threading.Thread(target=lambda: out.update(leader=sf.do("k", slow)))
+    leader.start()
+    time.sleep(0.1)
+    follower = threading.Thread(target=lambda: out.update(follower=sf.do("k", lambda: {"model": "again"})))
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert out["leader"] == ({"model": "LA1951"}, "leader")
+    assert out["follower"] == ({"model": "LA1951"}, "follower")
+
+def test_unshareable_results_are_not_reused(tmp_path):
+    sf = SingleFlight(str(tmp_path), wait=5)
+    release = threading.Event()
+    out = {}
+
+    def failing():
+        release.wait(5)
+        return {"error": "timeout"}
+
+    def share(result):
+        return "error" not in result
+
+    leader = threading.Thread(target=lambda: out.update(leader=sf.do("k", failing, share=share)))
+    leader.start()
+    time.sleep(0.1)
+    follower = threading.Thread(target=lambda: out.update(follower=sf.do("k", lambda: {"model": "LA1951"}, share=share)))
+    follower.start()
+    time.sleep(0.1)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert out["follower"] == ({"model": "LA1951"}, "unshared")
+
+def test_follower_times_out_and_runs_itself(tmp_path):
+    sf = SingleFlight(str(tmp_path), wait=5)
+    lock_path, _ = sf._paths("k")
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        assert singleflight._try_lock(fd)
+        assert sf.do("k", lambda: "mine", wait=0.1) == ("mine", "timeout")
+    finally:
+        singleflight._unlock(fd)
+        os.close(fd)
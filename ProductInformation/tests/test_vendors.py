@@ -0,0 +1,21 @@
+# ProductInformation/tests/test_vendors.py
+import pytest
+from bs4 import BeautifulSoup
+
+from page_index import PageIndex
+from vendors import thorlabs
+
+def _page(html: str = "<html><head><title>x</title></head></html>") -> PageIndex:
+    return PageIndex(BeautifulSoup(html, "html.parser"))
+
+@pytest.mark.parametrize("query, model", [
+    ("partnumber=LA1951", "LA1951"),
+    ("PartNumber=LA1951", "LA1951"),
+    ("PN=LA1951", "LA1951"),
+    ("pn=LA1951&partnumber=LA1509", "LA1509"),
+])
+def test_thorlabs_parser_and_identity_agree(query, model):
+    """快取鍵（canonical_identity）與解析出的型號要取同一個參數"""
+    url = f"https://www.thorlabs.com/thorproduct.cfm?{query}"
+    assert thorlabs.parse_thorlabs(url, _page())["model"] == model
+    assert thorlabs.canonical_identity(url) == f"thorlabs:{model}"
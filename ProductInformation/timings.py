@@ -0,0 +1,79 @@
+# ProductInformation/timings.py
+"""
+可選的逐階段計時。recording() 期間（以執行緒為單位）：
+- span(name)：量一段程式碼，累加到 stages[name]
+- @stage(name)：同上，套在函式上（擷取器用）
+- current()：取得目前的 Timings，沒在記錄時回傳 None（呼叫端可直接略過）
+沒有在記錄時，@stage 只多一次 thread-local 查詢，不影響正常路徑。
+"""
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+class Timings:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.fetch = {}
+        self.stages = {}
+
+    def add(self, name: str, ms: float):
+        s = self.stages.setdefault(name, {"ms": 0.0, "calls": 0})
+        s["ms"] += ms
+        s["calls"] += 1
+
+    def merge(self, other: "Timings"):
+        """併入另一個執行緒記錄的階段耗時（例如有時限、在背景執行緒跑的擷取）"""
+        for name, s in other.stages.items():
+            mine = self.stages.setdefault(name, {"ms": 0.0, "calls": 0})
+            mine["ms"] += s["ms"]
+            mine["calls"] += s["calls"]
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.t0) * 1000, 3),
+            "fetch": self.fetch,
+            "stages": {k: {"ms": round(v["ms"], 3), "calls": v["calls"]} for k, v in self.stages.items()},
+        }
+
+def current() -> Timings | None:
+    return getattr(_local, "timings", None)
+
+@contextmanager
+def recording():
+    prev = current()
+    t = Timings()
+    _local.timings = t
+    try:
+        yield t
+    finally:
+        _local.timings = prev
+
+@contextmanager
+def span(name: str):
+    t = current()
+    if t is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        t.add(name, (time.perf_counter() - t0) * 1000)
+
+def stage(name: str):
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            t = current()
+            if t is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                t.add(name, (time.perf_counter() - t0) * 1000)
+        return wrapper
+    return deco
@@ -0,0 +1,111 @@
+# ProductInformation/vendors/__init__.py
+"""
+廠商解析器註冊表：可註冊網域（去掉 TLD 的那一段，例如 thorlabs.com / thorlabs.de 都是 "thorlabs"）
+對應到廠商模組。每個網址只做一次 dict 查表；模組在第一次遇到該 host 時才 import。
+
+新增廠商：在 vendors/ 底下放一個模組，提供
+    parse(url, page) -> dict | None
+    canonical_identity(url) -> str | None
+    BRAND  （選用；品牌名稱，解析結果的 brand，時限內沒解析完時也用它填部分結果）
+    normalize_model(model) -> str  （選用；型號正規化，canonical_identity 與型號索引共用）
+    classify_link(url) -> "product" | "group" | "listing" | None
+        （選用；給 crawl 判斷連結：產品頁、列出多個料號的群組頁、只用來展開的分類/導覽頁）
+    image_candidates(url, page, result) -> list  （選用；給 --verify-images 驗證的主圖候選，由好到壞）
+    is_group_page(url) -> bool、parse_group(url, page) -> list | None
+        （選用；一頁列出多個料號的群組頁，給 --group-parts 一次取出所有料號）
+再把它加進 REGISTRY 即可。
+"""
+import importlib
+import re
+import threading
+from urllib.parse import urlparse
+
+REGISTRY = {
+    "thorlabs": "vendors.thorlabs",
+    "minicircuits": "vendors.minicircuits",
+}
+
+_loaded = {}
+_load_lock = threading.Lock()
+
+def registrable_key(host: str) -> str | None:
+    parts = (host or "").lower().rstrip(".").split(".")
+    return parts[-2] if len(parts) >= 2 else None
+
+def region(url: str) -> str | None:
+    """網址的地區（可註冊網域之後那一段，例如 thorlabs.de -> "de"）；同一料號在不同地區站的價格/幣別不同"""
+    try:
+        parts = (urlparse(url.strip()).hostname or "").lower().rstrip(".").split(".")
+    except Exception:
+        return None
+    return parts[-1] if len(parts) >= 2 else None
+
+def resolve(url: str):
+    """回傳負責該網址的廠商模組；沒有對應廠商時回傳 None"""
+    try:
+        host = urlparse(url.strip()).hostname
+    except Exception:
+        return None
+    key = registrable_key(host)
+    mod_name = REGISTRY.get(key) if key else None
+    return _module(mod_name) if mod_name else None
+
+def _module(mod_name: str):
+    mod = _loaded.get(mod_name)
+    if mod is None:
+        with _load_lock:
+            mod = _loaded.get(mod_name)
+            if mod is None:
+                mod = importlib.import_module(mod_name)
+                _loaded[mod_name] = mod
+    return mod
+
+def parse(url: str, page) -> dict | None:
+    mod = resolve(url)
+    return mod.parse(url, page) if mod else None
+
+def canonical_identity(url: str) -> str | None:
+    mod = resolve(url)
+    return mod.canonical_identity(url) if mod else None
+
+def brand(url: str) -> str | None:
+    """負責該網址的廠商品牌名稱（模組的 BRAND）；沒有對應廠商時回傳 None"""
+    mod = resolve(url)
+    return getattr(mod, "BRAND", None) if mod else None
+
+def classify_link(url: str) -> str | None:
+    mod = resolve(url)
+    fn = getattr(mod, "classify_link", None) if mod else None
+    return fn(url) if fn else None
+
+def vendor_key(brand: str) -> str | None:
+    """品牌名稱 -> 註冊表的鍵（"Mini-Circuits" -> "minicircuits"）；不在註冊表的品牌同樣正規化"""
+    key = re.sub(r"[^a-z0-9]", "", (brand or "").lower())
+    return key or None
+
+def identity_for(brand: str, model: str) -> str | None:
+    """由品牌 + 型號（例如匯出的產品資料）組出與 canonical_identity 相同格式的鍵"""
+    key = vendor_key(brand)
+    model = " ".join(str(model or "").split())
+    if not key or not model:
+        return None
+    mod_name = REGISTRY.get(key)
+    fn = getattr(_module(mod_name), "normalize_model", None) if mod_name else None
+    return f"{key}:{fn(model) if fn else model.upper()}"
+
+def image_candidates(url: str, page, result: dict) -> list | None:
+    """廠商自己的主圖候選清單；沒有對應廠商或廠商沒提供時回傳 None"""
+    mod = resolve(url)
+    fn = getattr(mod, "image_candidates", None) if mod else None
+    return fn(url, page, result) if fn else None
+
+def is_group_page(url: str) -> bool:
+    mod = resolve(url)
+    fn = getattr(mod, "is_group_page", None) if mod else None
+    return bool(fn and fn(url))
+
+def parse_group(url: str, page) -> list | None:
+    """群組頁上所有料號的清單；沒有對應廠商、廠商不支援或不是群組頁時回傳 None"""
+    mod = resolve(url)
+    fn = getattr(mod, "parse_group", None) if mod else None
+    return fn(url, page) if fn else None
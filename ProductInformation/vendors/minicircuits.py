@@ -0,0 +1,236 @@
+# ProductInformation/vendors/minicircuits.py
+import re
+from urllib.parse import urlparse, urljoin, unquote
+
+from extractors import (
+    clean_text, normalize_for_output, find_price, find_image_generic, image_candidates_generic,
+    _meta_images, _raw_query_param, _https_url,
+)
+from page_index import PageIndex
+from timings import stage
+
+BRAND = "Mini-Circuits"
+
+# ---------- Mini-Circuits 解析（修正版） ----------
+def _host_is_minicircuits(host: str) -> bool:
+    parts = host.lower().split(".")
+    return len(parts) >= 2 and parts[-2] == "minicircuits"
+
+# ---------- 規格表（label -> value，一次走訪） ----------
+def _label_key(label: str) -> str:
+    return re.sub(r"\s+", " ", label).strip(" :：").lower()
+
+def _looks_like_label(text: str) -> bool:
+    # 「0 MHz」這類資料列的第一格不是標籤
+    return bool(text) and not text[0].isdigit() and len(text) <= 80
+
+def _class_has(tag, word: str) -> bool:
+    return any(word in c.lower() for c in tag.get("class", ()))
+
+@stage("minicircuits.specs")
+def spec_map(page: PageIndex) -> dict:
+    """
+    一次走訪規格表與 label/value 區塊，回傳 {標籤: 值}（文件順序，同一標籤只留第一個）：
+    - <tr><th|td>Label</th><td>Value</td></tr>：只收兩格的列（或 th + 一排 td，取第一個有內容的 td），
+      多欄的量測資料表（Frequency / Attenuation / VSWR ...）不會被誤當成 label/value
+    - <div class="label">Label</div><div class="value">Value</div>、<dt>/<dd>：取下一個兄弟節點
+    """
+    page = PageIndex.of(page)
+    specs = {}
+    seen = set()
+
+    def add(label, value):
+        label = (label or "").rstrip(" :：")
+        key = _label_key(label)
+        if value and _looks_like_label(label) and key not in seen:
+            seen.add(key)
+            specs[label] = normalize_for_output(value)
+
+    for tag in page.tags("tr", "dt", "div", "span"):
+        if tag.name == "tr":
+            cells = tag.find_all(["th", "td"], recursive=False)
+            # 先看結構：超過兩格又不是「th + 一排 td」的是量測資料列，不必取文字
+            if len(cells) < 2 or (len(cells) > 2 and (cells[0].name != "th" or
+                                                      any(c.name != "td" for c in cells[1:]))):
+                continue
+            label = clean_text(cells[0].get_text(" ", strip=True))
+            value = next((t for t in (clean_text(c.get_text(" ", strip=True)) for c in cells[1:]) if t), None)
+            add(label, value)
+        elif tag.name == "dt" or (tag.get("class") and _class_has(tag, "label")):
+            sib = tag.find_next_sibling()
+            if sib:
+                add(clean_text(tag.get_text(" ", strip=True)), clean_text(sib.get_text(" ", strip=True)))
+    return specs
+
+def _spec_lookup(specs: dict, *labels: str) -> str | None:
+    """依序找第一個存在的標籤（大小寫、空白、冒號不拘）"""
+    index = {_label_key(k): v for k, v in specs.items()}
+    for label in labels:
+        v = index.get(_label_key(label))
+        if v:
+            return v
+    return None
+
+def _iter_minicircuits_images(page: PageIndex, base_url: str):
+    # 1) 優先 /images/case_style/*.png
+    for tag in page.tags("img", "source", "a", "link", "meta"):
+        for attr in ("src", "data-src", "href", "data-original", "content"):
+            v = tag.get(attr)
+            if not v:
+                continue
+            v = v.strip()
+            if "/images/case_style/" in v and v.lower().endswith((".png", ".jpg", ".jpeg", ".webp")):
+                yield urljoin(base_url, v)
+
+    # 2) OpenGraph / Twitter
+    yield from _meta_images(page, base_url)
+
+    # 3) Heuristic
+    for img in page.tags("img"):
+        src = img.get("src") or img.get("data-src") or img.get("data-original")
+        if not src:
+            continue
+        cls = " ".join(img.get("class", [])).lower()
+        iid = (img.get("id") or "").lower()
+        if any(k in (cls + " " + iid) for k in ["product", "main", "detail", "primary"]):
+            yield urljoin(base_url, src.strip())
+
+@stage("minicircuits.image")
+def _minicircuits_pick_image(page: PageIndex, base_url: str) -> str | None:
+    return next(_iter_minicircuits_images(PageIndex.of(page), base_url), None)
+
+@stage("minicircuits.parse")
+def parse_minicircuits(url: str, page: PageIndex):
+    page = PageIndex.of(page)
+    host = urlparse(url).netloc
+    if not _host_is_minicircuits(host):
+        return None
+
+    brand = BRAND
+
+    # ---- 模型（型號）優先用 URL query 的 model（保留 +，與 canonical_identity 相同的解碼）----
+    model = _query_model(url)
+    # 從 <title> 右側的「| 型號」作為備援/修正（保留 +）
+    if True:
+        _title = clean_text(page.title_text) or ""
+        # 例：「15 dB Fixed Attenuator, DC - 12000 MHz, 50Ω | FW-15A+」
+        m = re.search(r"\|\s*([A-Z0-9][A-Z0-9+\-]+)\s*$", _title, re.I)
+        if m:
+            title_model = m.group(1).strip()
+            # 若 URL 沒帶 + 或不一致，偏好 title 的版本（常含 +）
+            if not model or (len(title_model) >= len(model) and "+" in title_model and "+" not in (model or "")):
+                model = title_model
+
+    # ---- 名稱與規格：先把「| 型號」切掉，再用逗號拆 name/spec ----
+    title_text = clean_text(page.title_text)
+    if not title_text:
+        title_text = clean_text(page.meta.get(("property", "og:title")))
+
+    specs = spec_map(page)
+
+    name = None
+    spec = None
+    if title_text:
+        # 切掉站名與型號尾巴
+        t = re.sub(r"\s*\|\s*Mini[-\s]?Circuits\s*$", "", title_text, flags=re.I)
+        t = re.sub(r"\s*\|\s*[A-Z0-9][A-Z0-9+\-]+\s*$", "", t, flags=re.I)  # 去掉「| FW-15A+」
+        # 現在 t 應該像「15 dB Fixed Attenuator, DC - 12000 MHz, 50Ω」
+        parts = [p.strip(" -–—,:") for p in t.split(",") if p.strip()]
+        if parts:
+            name = parts[0] or None
+            if len(parts) > 1:
+                # 其餘合併為 spec（通常包含頻寬與阻抗）
+                spec = ", ".join(parts[1:])
+
+    # 若還沒拿到頻寬/阻抗，補抓一遍（避免把 VSWR 當阻抗）
+    # 頻寬
+    if not spec or "MHz" not in spec:
+        freq = _spec_lookup(specs, "Frequency Range", "Frequency Band")
+        if not freq:
+            m = re.search(r"\bDC\s*-\s*[\d,]+(?:\.\d+)?\s*MHz\b", page.text, re.I)
+            if m:
+                freq = m.group(0).replace(",", "")
+    else:
+        # 從 spec 裡切出第一段 MHz 片段
+        m = re.search(r"\b(?:DC|[\d\.]+)\s*-\s*[\d,]+(?:\.\d+)?\s*MHz\b", spec, re.I)
+        freq = m.group(0).replace(",", "") if m else None
+
+    # 阻抗（只接受含 ohm/Ω 字樣的數字，避免抓到 VSWR 1.4）
+    imp = None
+    # 先試表格的「Impedance」
+    imp_raw = _spec_lookup(specs, "Impedance")
+    txt_pool = [imp_raw or "", spec or "", page.text]
+    for blob in txt_pool:
+        m = re.search(r"\b(\d+(?:\.\d+)?)\s*(?:ohms?|Ω|Ω)\b", blob, re.I)
+        if m:
+            imp = f"{m.group(1)}Ω"
+            break
+    if not imp:
+        # 常見 50 ohm
+        if re.search(r"\b50\s*(?:ohms?|Ω|Ω)\b", page.text, re.I):
+            imp = "50Ω"
+
+    # 重建 spec：freq 與 imp 有就用這兩個，否則保留前面拆到的 spec
+    if freq or imp:
+        spec = ", ".join([x for x in [freq, imp] if x])
+    spec = normalize_for_output(spec)
+
+    # 主圖
+    imagelink = _minicircuits_pick_image(page, url)
+    if not imagelink:
+        imagelink = find_image_generic(page, url)
+
+    # 價格：單次掃描，「Price」標籤後的金額與靠近型號的金額優先
+    best = find_price(page, model, name)
+    price = best["amount"] if best else None
+    currency = best["currency"] if best else None
+
+    # URL 正規化
+    return {
+        "name": normalize_for_output(name),
+        "brand": normalize_for_output(brand),
+        "model": normalize_for_output(model),   # 會保留 '+'
+        "price": price,
+        "currency": currency,
+        "spec": spec,
+        "specs": specs,
+        "imagelink": _https_url(url, imagelink),
+    }
+
+# ---------- 圖片候選（給 image_probe 驗證用） ----------
+def image_candidates(url: str, page: PageIndex, result: dict) -> list:
+    page = PageIndex.of(page)
+    return list(dict.fromkeys([*_iter_minicircuits_images(page, url), *image_candidates_generic(page, url)]))
+
+# ---------- 產品識別 ----------
+def classify_link(url: str) -> str | None:
+    """WebStore/dashboard.html?model= 是產品頁；其他 WebStore/*.html 與 navigation 頁是分類清單"""
+    u = urlparse(url.strip())
+    if not _host_is_minicircuits(u.hostname or ""):
+        return None
+    path = u.path.lower()
+    if path.endswith("/dashboard.html"):
+        return "product" if canonical_identity(url) else None
+    if ("/webstore/" in path and path.endswith(".html")) or "navigation" in path:
+        return "listing"
+    return None
+
+def normalize_model(model: str) -> str:
+    return " ".join(str(model).split()).upper()
+
+def _query_model(url: str) -> str | None:
+    """
+    網址 query 的 model（解析器與 canonical_identity 共用）。字面 '+' 是型號的一部分（FW-15A+），
+    %2B 也解回 '+'，所以用 unquote 而非 parse_qs / unquote_plus（那會把 '+' 變成空白）
+    """
+    model = _raw_query_param(urlparse(url.strip()).query, "model")
+    return (unquote(model).strip() or None) if model else None
+
+def canonical_identity(url: str) -> str | None:
+    u = urlparse(url.strip())
+    if not _host_is_minicircuits(u.hostname or ""):
+        return None
+    model = _query_model(url)
+    return f"minicircuits:{normalize_model(model)}" if model else None
+
+parse = parse_minicircuits
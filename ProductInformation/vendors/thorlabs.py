@@ -0,0 +1,321 @@
+# ProductInformation/vendors/thorlabs.py
+import re
+from urllib.parse import urlparse, urljoin, unquote_plus
+
+from extractors import (
+    clean_text, normalize_for_output, find_price, find_image_generic, image_candidates_generic,
+    scan_text_prices, _meta_images, _raw_query_param, _https_url,
+)
+from lazy_re import lazy_compile
+from page_index import PageIndex
+from timings import stage
+
+BRAND = "Thorlabs"
+
+# ---------- Thorlabs 圖片 ----------
+LOGO_BLOCKLIST = {
+    "https://www.thorlabs.com/images/thorlabs-logo.png"
+}
+
+def _is_good_img_url(u: str) -> bool:
+    if not u:
+        return False
+    s = u.lower().strip()
+    if s in (x.lower() for x in LOGO_BLOCKLIST):
+        return False
+    bad = ("logo", "sprite", "icon", "banner", "social", "favicon")
+    return (not any(b in s for b in bad)) and s.endswith((".jpg", ".jpeg", ".png", ".webp"))
+
+def _to_large_from_small(u: str) -> str:
+    # small/tabimages -> large，且 -sml/-small -> -lrg
+    v = u
+    v = re.sub(r"/images/small/", "/images/large/", v, flags=re.IGNORECASE)
+    v = re.sub(r"/images/tabimages/", "/images/large/", v, flags=re.IGNORECASE)
+    v = re.sub(r"[-_](?:sml|small)(\.(?:jpe?g|png|webp))$", r"-lrg\1", v, flags=re.IGNORECASE)
+    return v
+
+def _host_is_thorlabs(host: str) -> bool:
+    # 支援 thorlabs.com / .us / .de / .cn / .jp / .uk / .fr / .it / .es 等
+    parts = host.lower().split(".")
+    return len(parts) >= 2 and parts[-2] == "thorlabs"
+
+# 大圖網址（先偏好 -lrg，其次任何 /images/(large|highres)/*.{jpg,png,webp}）
+_LRG_ABS = lazy_compile(r"https?://[^\"'\s>]+/images/(?:large|highres)/[^\"'\s>]*?[-_]lrg\.(?:jpe?g|png|webp)", re.I)
+_LRG_REL = lazy_compile(r"/images/(?:large|highres)/[^\"'\s>]*?[-_]lrg\.(?:jpe?g|png|webp)", re.I)
+_ANY_ABS = lazy_compile(r"https?://[^\"'\s>]+/images/(?:large|highres)/[^\"'\s>]+\.(?:jpe?g|png|webp)", re.I)
+_ANY_REL = lazy_compile(r"/images/(?:large|highres)/[^\"'\s>]+\.(?:jpe?g|png|webp)", re.I)
+
+def _iter_thorlabs_images(page: PageIndex, base_url: str, model: str | None = None):
+    """
+    依字串規則由好到壞產生產品大圖候選（可能重複）。惰性產生：只要第一個時，
+    -lrg 命中就不必再收集、排序其餘候選。
+    """
+    html_text = page.html
+
+    # A) 直接 regex 掃大圖
+    m = _LRG_ABS.search(html_text)
+    if m and _is_good_img_url(m.group(0)):
+        yield m.group(0)
+    m = _LRG_REL.search(html_text)
+    if m and _is_good_img_url(m.group(0)):
+        yield urljoin(base_url, m.group(0))
+
+    # 沒有 -lrg 就抓 large/highres 任意圖
+    candidates = []
+    for pat in (_ANY_ABS, _ANY_REL):
+        for m in pat.finditer(html_text):
+            u = m.group(0)
+            u = urljoin(base_url, u)
+            if _is_good_img_url(u):
+                candidates.append(u)
+
+    # B) 從屬性收集候選（含 data-*），並將 small/tabimages 轉 large
+    attrs = ("href","src","data-src","data-original","data-large","data-zoom-image","data-image","data-full")
+    for tag in page.tags("a", "img", "source", "link"):
+        for a in attrs:
+            val = tag.get(a)
+            if not val:
+                continue
+            val = val.strip()
+            if not val or val.startswith("data:"):
+                continue
+            low = val.lower()
+            if "/images/large/" in low or "/images/highres/" in low:
+                absu = urljoin(base_url, val)
+                if _is_good_img_url(absu):
+                    candidates.append(absu)
+            if "/images/small/" in low or "/images/tabimages/" in low:
+                absu = urljoin(base_url, _to_large_from_small(val))
+                if _is_good_img_url(absu):
+                    candidates.append(absu)
+
+    # C) 「Zoom / Click to Enlarge」連結
+    zoom = None
+    for t in page.tags("a"):
+        label = t.get_text(strip=True)
+        if label and re.search(r"\b(zoom|click to enlarge)\b", label, re.I):
+            zoom = t
+            break
+    if zoom and zoom.get("href"):
+        u = urljoin(base_url, zoom["href"].strip())
+        if _is_good_img_url(u):
+            candidates.append(u)
+
+    # 排序
+    def rank(u: str):
+        ul = u.lower()
+        is_lrg = 0 if re.search(r"[-_]lrg\.(?:jpe?g|png|webp)$", ul) else 1
+        in_large = 0 if "/images/large/" in ul else (1 if "/images/highres/" in ul else 2)
+        has_model = 0
+        if model:
+            fn = ul.rsplit("/", 1)[-1]
+            if re.search(re.escape(model.lower()), fn):
+                has_model = -1
+        return (is_lrg, in_large, has_model, len(ul))
+
+    yield from sorted(dict.fromkeys(candidates), key=rank)
+
+    # D) 備援 meta
+    for u in _meta_images(page, base_url):
+        if _is_good_img_url(u):
+            yield u
+
+@stage("thorlabs.image")
+def find_image_thorlabs(page: PageIndex, base_url: str, model: str | None = None) -> str | None:
+    return next(_iter_thorlabs_images(PageIndex.of(page), base_url, model), None)
+
+def image_candidates_thorlabs(page: PageIndex, base_url: str, model: str | None = None) -> list:
+    """
+    所有看起來像產品大圖的網址，由好到壞排序（第一個就是 find_image_thorlabs 的結果）。
+    只看網址字串；實際能不能下載、尺寸多大交給 image_probe 驗證。
+    """
+    return list(dict.fromkeys(_iter_thorlabs_images(PageIndex.of(page), base_url, model)))
+
+# ---------- Thorlabs 解析 ----------
+@stage("thorlabs.parse")
+def parse_thorlabs(url, page: PageIndex):
+    page = PageIndex.of(page)
+    host = urlparse(url).netloc
+    if not _host_is_thorlabs(host):
+        return None
+
+    path = urlparse(url).path.lower()
+    if not (("thorproduct.cfm" in path) or ("newgrouppage" in path)):
+        # 只針對產品/群組頁
+        return None
+
+    brand = BRAND
+    model = _query_partnumber(url)
+
+    # Title → name/spec
+    title_text = clean_text(page.title_text)
+    if not title_text:
+        title_text = clean_text(page.meta.get(("property", "og:title")))
+
+    name = None
+    spec = None
+    if title_text:
+        title_text = re.sub(r"^\s*Thorlabs\s*-\s*", "", title_text, flags=re.IGNORECASE).strip()
+        tail = title_text
+        if model and title_text.upper().startswith(model.upper()):
+            tail = title_text[len(model):].strip()
+            tail = re.sub(r'^[\s\-–—:,]+', '', tail)
+        if not model:
+            m = re.search(r"\b([A-Z0-9]{1,10}(?:-[A-Z0-9]+)*)\b", title_text)
+            if m:
+                model = m.group(1)
+                tail = re.sub(rf"\b{re.escape(model)}\b", "", title_text).strip()
+                tail = re.sub(r'^[\s\-–—:,]+', '', tail)
+        parts = [p.strip() for p in tail.split(",")]
+        if parts:
+            name = parts[0] or None
+            spec = ", ".join(parts[1:]) if len(parts) > 1 else None
+
+    best = find_price(page, model, name)
+    price = best["amount"] if best else None
+    currency = best["currency"] if best else None
+
+    # 主圖（先 Thorlabs 專用，再通用）
+    imagelink = find_image_thorlabs(page, url, model=model)
+    if not imagelink:
+        imagelink = find_image_generic(page, url)
+
+    return {
+        "name": normalize_for_output(name),
+        "brand": normalize_for_output(brand),
+        "model": normalize_for_output(model),
+        "price": price,
+        "currency": currency,
+        "spec": normalize_for_output(spec),
+        "imagelink": _https_url(url, imagelink),
+    }
+
+# ---------- Thorlabs 群組頁（一頁列出整個系列的料號） ----------
+# 料號表（SO_table 之類）的表頭：料號、價格、描述；數量/庫存/購物車等欄位不算規格
+_GROUP_MODEL_HEAD = lazy_compile(r"^(?:item|part)\s*(?:#|no\.?|number)", re.I)
+_GROUP_PRICE_HEAD = lazy_compile(r"\bprice\b", re.I)
+_GROUP_NAME_HEAD = lazy_compile(r"^(?:description|name|product)\b", re.I)
+_GROUP_SKIP_HEAD = lazy_compile(r"\b(?:qty|quantity|available|availability|stock|cart|ship|rohs)\b", re.I)
+
+def is_group_page(url: str) -> bool:
+    u = urlparse(url.strip())
+    return _host_is_thorlabs(u.hostname or "") and "newgrouppage" in u.path.lower()
+
+def _cell_text(td) -> str:
+    return clean_text(td.get_text(" ", strip=True)) or ""
+
+def _group_columns(headers: list) -> dict | None:
+    """表頭 -> {"model": i, "price": i, "name": i, "spec": [(i, 表頭), ...]}；沒有料號欄就不是料號表"""
+    cols = {"model": None, "price": None, "name": None, "spec": []}
+    for i, h in enumerate(headers):
+        if cols["model"] is None and _GROUP_MODEL_HEAD.search(h):
+            cols["model"] = i
+        elif cols["price"] is None and _GROUP_PRICE_HEAD.search(h):
+            cols["price"] = i
+        elif cols["name"] is None and _GROUP_NAME_HEAD.search(h):
+            cols["name"] = i
+        elif h and not _GROUP_SKIP_HEAD.search(h):
+            cols["spec"].append((i, h))
+    return cols if cols["model"] is not None else None
+
+def _row_image(row, url: str) -> str | None:
+    for img in row.find_all("img"):
+        src = (img.get("src") or img.get("data-src") or "").strip()
+        if src and not src.startswith("data:"):
+            u = urljoin(url, _to_large_from_small(src))
+            if _is_good_img_url(u):
+                return u
+    return None
+
+@stage("thorlabs.group")
+def parse_group_thorlabs(url, page: PageIndex) -> list | None:
+    """
+    群組頁（newgrouppage）一次解析所有料號表，每個料號一筆
+    {model, name, spec, price, currency, imagelink, url}；不是群組頁時回傳 None。
+    name：描述欄，沒有描述欄時用表格前最近的標題；spec：其餘欄位「表頭: 值」。
+    同一料號出現在多張表時只留第一筆。
+    """
+    if not is_group_page(url):
+        return None
+    page = PageIndex.of(page)
+    group_image = None
+    parts = {}
+    for table in page.tags("table"):
+        rows = table.find_all("tr")
+        if len(rows) < 2:
+            continue
+        cols = _group_columns([_cell_text(c) for c in rows[0].find_all(["th", "td"])])
+        if cols is None:
+            continue
+        heading = table.find_previous(["h1", "h2", "h3", "h4"])
+        heading = clean_text(heading.get_text(" ", strip=True)) if heading else None
+
+        for row in rows[1:]:
+            cells = row.find_all(["td", "th"])
+            if len(cells) <= cols["model"]:
+                continue
+            model = _cell_text(cells[cols["model"]])
+            if not model or model.upper() in parts:
+                continue
+
+            def cell(i):
+                return _cell_text(cells[i]) if i is not None and i < len(cells) else ""
+
+            prices = scan_text_prices(cell(cols["price"]))
+            spec = ", ".join(f"{h}: {cell(i)}" for i, h in cols["spec"] if cell(i))
+            link = cells[cols["model"]].find("a", href=True)
+            imagelink = _row_image(row, url)
+            if imagelink is None:
+                if group_image is None:
+                    group_image = find_image_thorlabs(page, url) or find_image_generic(page, url) or ""
+                imagelink = group_image or None
+            parts[model.upper()] = {
+                "model": normalize_for_output(model),
+                "name": normalize_for_output(cell(cols["name"]) or heading),
+                "spec": normalize_for_output(spec) or None,
+                "price": prices[0]["amount"] if prices else None,
+                "currency": prices[0]["currency"] if prices else None,
+                "imagelink": _https_url(url, imagelink),
+                "url": _https_url(url, link["href"]) if link else None,
+            }
+    return list(parts.values())
+
+# ---------- 圖片候選（給 image_probe 驗證用） ----------
+def image_candidates(url: str, page: PageIndex, result: dict) -> list:
+    page = PageIndex.of(page)
+    return [*image_candidates_thorlabs(page, url, model=result.get("model")),
+            *image_candidates_generic(page, url)]
+
+# ---------- 產品識別 ----------
+def classify_link(url: str) -> str | None:
+    """thorproduct.cfm（帶料號）是產品頁、newgrouppage 是群組頁、navigation.cfm 是導覽頁"""
+    u = urlparse(url.strip())
+    if not _host_is_thorlabs(u.hostname or ""):
+        return None
+    path = u.path.lower()
+    if "thorproduct.cfm" in path:
+        return "product" if canonical_identity(url) else None
+    if "newgrouppage" in path:
+        return "group"
+    if "navigation.cfm" in path:
+        return "listing"
+    return None
+
+def normalize_model(model: str) -> str:
+    return " ".join(str(model).split()).upper()
+
+def _query_partnumber(url: str) -> str | None:
+    """網址 query 的 part number：partnumber= 優先，其次 pn=；參數名不分大小寫（解析器與 canonical_identity 共用）"""
+    pn = _raw_query_param(urlparse(url.strip()).query, "partnumber", "pn")
+    return (unquote_plus(pn).strip() or None) if pn else None
+
+def canonical_identity(url: str) -> str | None:
+    u = urlparse(url.strip())
+    path = u.path.lower()
+    if not (_host_is_thorlabs(u.hostname or "") and ("thorproduct.cfm" in path or "newgrouppage" in path)):
+        return None
+    pn = _query_partnumber(url)
+    return f"thorlabs:{normalize_model(pn)}" if pn else None
+
+parse = parse_thorlabs
+parse_group = parse_group_thorlabs
@@ -117,6 +117,9 @@ export async function saveUploadedProductImage(productId: string, file: Blob, fi
 
 export async function removeLocalImageIfExists(localImageRel?: string | null) {
   if (!localImageRel) return;
+  // blobs/ 底下是以內容雜湊去重的共用檔案（analyze_cli.py images），可能還有其他產品在用；
+  // 由下次重建時的 --gc 清理
+  if (/^[/\\]*product_images[/\\]blobs[/\\]/.test(localImageRel)) return;
   try {
     // 移除開頭斜線，避免把 PUBLIC_DIR 吃掉
     const rel = localImageRel.replace(/^[/\\]+/, "");
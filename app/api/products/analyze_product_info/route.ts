@@ -1,5 +1,5 @@
 // app\api\products\analyze_product_info\route.ts
-import { spawn } from "node:child_process";
+import { spawn, type ChildProcessWithoutNullStreams } from "node:child_process";
 import path from "node:path";
 import { NextRequest, NextResponse } from "next/server";
 
@@ -9,76 +9,250 @@ export const dynamic = "force-dynamic"; // 避免被靜態化或快取
 const PYTHON_BIN =
   process.env.PYTHON || (process.platform === "win32" ? "python" : "python3");
 
-export async function POST(req: NextRequest): Promise<Response> {
-  try {
-    const body = await req.json().catch(() => ({}));
-    const url: unknown = (body as any)?.url;
+// Python script 路徑（依你的專案結構調整）
+const SCRIPT_PATH = path.resolve(process.cwd(), "ProductInformation", "analyze_cli.py");
 
-    if (typeof url !== "string" || !url.trim()) {
-      return NextResponse.json({ error: "Missing 'url' in request body" }, { status: 400 });
+const TIMEOUT_MS = 30_000;
+
+// 分析器自己的時間預算（秒）：比 TIMEOUT_MS 短，時間到時回傳已取得的欄位（_partial）而不是 504；
+// ANALYZER_DEADLINE=0 關閉
+const DEADLINE_S = Number(process.env.ANALYZER_DEADLINE ?? 25);
+
+// ANALYZER_DAEMON=0 可退回「每次查詢 spawn 一個行程」的舊行為
+const USE_DAEMON = process.env.ANALYZER_DAEMON !== "0";
+
+// 額外傳給 analyze_cli.py 的旗標，例如 ANALYZER_FLAGS="--http-cache"
+// 預設加上 --single-flight：多個請求（或多個行程）同時查同一網址時只抓一次；ANALYZER_SINGLE_FLIGHT=0 關閉
+const EXTRA_FLAGS = [
+  ...(process.env.ANALYZER_SINGLE_FLIGHT !== "0" ? ["--single-flight"] : []),
+  ...(DEADLINE_S > 0 ? ["--deadline", String(DEADLINE_S)] : []),
+  ...(process.env.ANALYZER_FLAGS || "").split(/\s+/).filter(Boolean),
+];
+
+// 連續這麼多筆逾時就視為常駐行程卡死，砍掉讓下一筆重新 spawn
+const MAX_CONSECUTIVE_TIMEOUTS = 3;
+
+// 保留 stderr 最後這麼多字元，放進錯誤的 details
+const STDERR_TAIL = 4_000;
+
+type Pending = { resolve: (r: any) => void; reject: (e: Error) => void };
+
+/**
+ * 常駐的 analyze_cli.py serve 行程：
+ * 每行寫入 {"id","url"}，每行讀回 {"id","result"}；同一行程保留暖機的連線池，
+ * 避免每次查詢都付出直譯器啟動、import 與 TLS 握手的成本。
+ */
+class AnalyzerDaemon {
+  private proc: ChildProcessWithoutNullStreams;
+  private pending = new Map<number, Pending>();
+  private nextId = 1;
+  private buf = "";
+  private stderrTail = "";
+  private timeouts = 0;
+  alive = true;
+
+  constructor() {
+    this.proc = spawn(PYTHON_BIN, [SCRIPT_PATH, "serve", ...EXTRA_FLAGS], {
+      cwd: path.dirname(SCRIPT_PATH),
+      env: { ...process.env, PYTHONUTF8: "1" },
+      windowsHide: true,
+    });
+    this.proc.stdout.on("data", (d) => this.onData(d.toString()));
+    // 一定要讀掉 stderr（不然緩衝塞滿會卡住行程）；只保留最後一段供錯誤訊息使用
+    this.proc.stderr.on("data", (d) => {
+      this.stderrTail = (this.stderrTail + d.toString()).slice(-STDERR_TAIL);
+    });
+    // 行程已死時寫入會得到 EPIPE / ERR_STREAM_DESTROYED；沒人接的 error 事件會拖垮整個 server
+    this.proc.stdin.on("error", (err) => this.shutdown(err));
+    this.proc.on("error", (err) => this.shutdown(err));
+    this.proc.on("close", (code) =>
+      this.shutdown(new Error(`Analyzer daemon exited with code ${code}`))
+    );
+  }
+
+  private onData(chunk: string) {
+    this.buf += chunk;
+    let nl: number;
+    while ((nl = this.buf.indexOf("\n")) >= 0) {
+      const line = this.buf.slice(0, nl).trim();
+      this.buf = this.buf.slice(nl + 1);
+      if (!line) continue;
+      try {
+        const msg = JSON.parse(line);
+        const p = this.pending.get(msg?.id);
+        if (p) {
+          this.pending.delete(msg.id);
+          this.timeouts = 0;
+          p.resolve(msg.result);
+        }
+      } catch {
+        /* ignore malformed line */
+      }
     }
+  }
 
-    // Python script 路徑（依你的專案結構調整）
-    const scriptPath = path.resolve(process.cwd(), "ProductInformation", "analyze_cli.py");
+  get stderr(): string {
+    return this.stderrTail;
+  }
 
-    // 以 Promise<Response> 形式包裝 spawn
-    return new Promise<Response>((resolve) => {
-      const py = spawn(PYTHON_BIN, [scriptPath, url.trim()], {
-        cwd: path.dirname(scriptPath),
-        env: { ...process.env, PYTHONUTF8: "1" },
-        windowsHide: true,
-      });
+  private shutdown(err: Error) {
+    if (!this.alive) return;
+    this.alive = false;
+    for (const p of this.pending.values()) p.reject(err);
+    this.pending.clear();
+    try { this.proc.kill(); } catch {}
+  }
 
-      let stdout = "";
-      let stderr = "";
+  /** 回傳 id（逾時時用來 abandon）與結果的 Promise */
+  analyze(url: string): { id: number; result: Promise<any> } {
+    const id = this.nextId++;
+    const result = new Promise<any>((resolve, reject) => {
+      if (!this.alive) return reject(new Error("Analyzer daemon is not running"));
+      this.pending.set(id, { resolve, reject });
+      this.proc.stdin.write(JSON.stringify({ id, url }) + "\n");
+    });
+    return { id, result };
+  }
 
-      const timeoutMs = 30_000;
-      const killer = setTimeout(() => {
-        try { py.kill("SIGKILL"); } catch {}
-        resolve(
-          NextResponse.json({ error: "Analyzer timed out" }, { status: 504 })
-        );
-      }, timeoutMs);
+  /** 放棄逾時的查詢（晚到的回應會被忽略）；連續逾時太多次就砍掉行程 */
+  abandon(id: number) {
+    this.pending.delete(id);
+    if (++this.timeouts >= MAX_CONSECUTIVE_TIMEOUTS) {
+      this.shutdown(new Error(`Analyzer daemon unresponsive after ${this.timeouts} consecutive timeouts`));
+    }
+  }
+}
+
+const globalForAnalyzer = globalThis as unknown as { analyzerDaemon?: AnalyzerDaemon };
+
+function getDaemon(): AnalyzerDaemon {
+  const d = globalForAnalyzer.analyzerDaemon;
+  if (d && d.alive) return d;
+  const fresh = new AnalyzerDaemon();
+  globalForAnalyzer.analyzerDaemon = fresh;
+  return fresh;
+}
+
+function analyzeViaDaemon(url: string): Promise<Response> {
+  return new Promise<Response>((resolve) => {
+    let daemon: AnalyzerDaemon;
+    try {
+      daemon = getDaemon();
+    } catch (err) {
+      return resolve(
+        NextResponse.json(
+          { error: "Failed to spawn Python", details: String(err) },
+          { status: 500 }
+        )
+      );
+    }
+
+    const { id, result } = daemon.analyze(url);
 
-      py.stdout.on("data", (d) => (stdout += d.toString()));
-      py.stderr.on("data", (d) => (stderr += d.toString()));
+    // 逾時只放棄這一筆，不砍掉常駐行程（其他查詢仍在進行；晚到的回應會被忽略），
+    // 但連續逾時代表行程卡死，由 abandon() 砍掉、下一筆重新 spawn
+    const killer = setTimeout(() => {
+      daemon.abandon(id);
+      resolve(
+        NextResponse.json(
+          { error: "Analyzer timed out", details: daemon.stderr || null },
+          { status: 504 }
+        )
+      );
+    }, TIMEOUT_MS);
 
-      py.on("error", (err) => {
+    result.then(
+      (r) => {
+        clearTimeout(killer);
+        resolve(NextResponse.json(r ?? { error: "Empty analyzer result" }, { status: 200 }));
+      },
+      (err) => {
         clearTimeout(killer);
         resolve(
           NextResponse.json(
-            { error: "Failed to spawn Python", details: String(err) },
+            { error: "Analyzer daemon failed", details: [String(err), daemon.stderr].filter(Boolean).join("\n") },
             { status: 500 }
           )
         );
-      });
+      }
+    );
+  });
+}
 
-      py.on("close", (code) => {
-        clearTimeout(killer);
-        if (code !== 0) {
-          return resolve(
-            NextResponse.json(
-              {
-                error: `Python script exited with code ${code}`,
-                details: stderr || stdout || null,
-              },
-              { status: 500 }
-            )
-          );
-        }
-        try {
-          const parsed = JSON.parse(stdout);
-          return resolve(NextResponse.json(parsed, { status: 200 }));
-        } catch {
-          return resolve(
-            NextResponse.json(
-              { error: "Failed to parse Python output", raw: stdout },
-              { status: 502 }
-            )
-          );
-        }
-      });
+function analyzeViaSpawn(url: string): Promise<Response> {
+  // 以 Promise<Response> 形式包裝 spawn
+  return new Promise<Response>((resolve) => {
+    // "--" 之後一律當成網址，不會被當成子命令（serve、images…）或旗標
+    const py = spawn(PYTHON_BIN, [SCRIPT_PATH, ...EXTRA_FLAGS, "--", url], {
+      cwd: path.dirname(SCRIPT_PATH),
+      env: { ...process.env, PYTHONUTF8: "1" },
+      windowsHide: true,
+    });
+
+    let stdout = "";
+    let stderr = "";
+
+    const killer = setTimeout(() => {
+      try { py.kill("SIGKILL"); } catch {}
+      resolve(
+        NextResponse.json({ error: "Analyzer timed out" }, { status: 504 })
+      );
+    }, TIMEOUT_MS);
+
+    py.stdout.on("data", (d) => (stdout += d.toString()));
+    py.stderr.on("data", (d) => (stderr += d.toString()));
+
+    py.on("error", (err) => {
+      clearTimeout(killer);
+      resolve(
+        NextResponse.json(
+          { error: "Failed to spawn Python", details: String(err) },
+          { status: 500 }
+        )
+      );
+    });
+
+    py.on("close", (code) => {
+      clearTimeout(killer);
+      if (code !== 0) {
+        return resolve(
+          NextResponse.json(
+            {
+              error: `Python script exited with code ${code}`,
+              details: stderr || stdout || null,
+            },
+            { status: 500 }
+          )
+        );
+      }
+      try {
+        const parsed = JSON.parse(stdout);
+        return resolve(NextResponse.json(parsed, { status: 200 }));
+      } catch {
+        return resolve(
+          NextResponse.json(
+            { error: "Failed to parse Python output", raw: stdout },
+            { status: 502 }
+          )
+        );
+      }
     });
+  });
+}
+
+export async function POST(req: NextRequest): Promise<Response> {
+  try {
+    const body = await req.json().catch(() => ({}));
+    const url: unknown = (body as any)?.url;
+
+    if (typeof url !== "string" || !url.trim()) {
+      return NextResponse.json({ error: "Missing 'url' in request body" }, { status: 400 });
+    }
+    if (!/^https?:\/\//i.test(url.trim())) {
+      return NextResponse.json({ error: "'url' must start with http:// or https://" }, { status: 400 });
+    }
+
+    return USE_DAEMON ? analyzeViaDaemon(url.trim()) : analyzeViaSpawn(url.trim());
   } catch (err) {
     return NextResponse.json(
       { error: "Internal server error", details: String(err) },
@@ -4,6 +4,7 @@ import { prisma } from "@/lib/prisma";
 import { downloadAndSaveProductImage } from "@/app/api/products/_image";
 import fs from "fs";
 import path from "path";
+import { spawn } from "node:child_process";
 
 export const dynamic = "force-dynamic";
 export const runtime = "nodejs";
@@ -11,8 +12,141 @@ export const runtime = "nodejs";
 const PUBLIC_DIR = path.join(process.cwd(), "public");
 const PRODUCT_DIR = path.join(PUBLIC_DIR, "product_images");
 
-export async function POST() {
+const PYTHON_BIN =
+  process.env.PYTHON || (process.platform === "win32" ? "python" : "python3");
+const SCRIPT_PATH = path.resolve(process.cwd(), "ProductInformation", "analyze_cli.py");
+
+// IMAGE_BULK=0 可退回「逐一下載、每次都從頭重建」的舊行為
+const USE_BULK = process.env.IMAGE_BULK !== "0";
+
+type BulkRecord = {
+  id: string;
+  url: string;
+  localImage?: string | null;
+  error?: string;
+  unsupported?: boolean;
+};
+
+/**
+ * 交給 analyze_cli.py images：併發下載、內容雜湊去重（同圖共用 blobs/ 底下同一個檔案）、
+ * 產生縮圖。預設沿用 manifest，中斷後重按會接續；fresh 時帶 --fresh 重新抓所有網址
+ * （廠商換圖才會更新）。--gc 只在整批沒有失敗時清掉不再引用的 blob。每完成一個產品就讀回一行結果。
+ */
+function runBulkImages(
+  jobs: { id: string; url: string }[],
+  fresh: boolean,
+  onRecord: (r: BulkRecord) => Promise<void>
+): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const args = [SCRIPT_PATH, "images", "-", "--out", PRODUCT_DIR, "--gc"];
+    if (fresh) args.push("--fresh");
+    const py = spawn(PYTHON_BIN, args, {
+      cwd: path.dirname(SCRIPT_PATH),
+      env: { ...process.env, PYTHONUTF8: "1" },
+      windowsHide: true,
+    });
+
+    let buf = "";
+    let stderr = "";
+    let chain = Promise.resolve();
+
+    py.stdout.on("data", (d) => {
+      buf += d.toString();
+      let nl: number;
+      while ((nl = buf.indexOf("\n")) >= 0) {
+        const line = buf.slice(0, nl).trim();
+        buf = buf.slice(nl + 1);
+        if (!line) continue;
+        try {
+          const rec = JSON.parse(line) as BulkRecord;
+          chain = chain.then(() => onRecord(rec));
+        } catch {
+          /* ignore malformed line */
+        }
+      }
+    });
+    py.stderr.on("data", (d) => (stderr += d.toString()));
+    py.on("error", reject);
+    py.on("close", (code) => {
+      // 0 = 全部成功、2 = 有失敗項目（已逐筆回報）；其他代表行程本身出錯
+      chain.then(() => {
+        if (code === 0 || code === 2) resolve();
+        else reject(new Error(`images exited with code ${code}: ${stderr}`));
+      }, reject);
+    });
+
+    for (const j of jobs) py.stdin.write(JSON.stringify(j) + "\n");
+    py.stdin.end();
+  });
+}
+
+async function rebuildWithBulk(fresh: boolean) {
+  await fs.promises.mkdir(PRODUCT_DIR, { recursive: true });
+
+  const products = await prisma.product.findMany({
+    select: { id: true, imageLink: true, localImage: true },
+    orderBy: { createdAt: "asc" },
+  });
+
+  let total = 0, tried = 0, downloaded = 0, failed = 0;
+  const jobs: { id: string; url: string }[] = [];
+  const previous = new Map<string, string | null>();
+
+  for (const p of products) {
+    total++;
+    tried++;
+    const url = (p.imageLink || "").trim();
+    if (!/^https?:\/\//i.test(url)) {
+      await prisma.product.update({ where: { id: p.id }, data: { localImage: null } });
+      continue;
+    }
+    jobs.push({ id: p.id, url });
+    previous.set(p.id, p.localImage);
+  }
+
+  const referenced = new Set<string>();
+  await runBulkImages(jobs, fresh, async (r) => {
+    let localImage: string | null = r.localImage ?? null;
+    if (!localImage && r.unsupported) {
+      // HEIC / AVIF / TIFF 之類需要轉檔的，交回原本的 sharp 流程
+      try {
+        ({ localImageRel: localImage } = await downloadAndSaveProductImage(r.id, r.url));
+      } catch {
+        localImage = null;
+      }
+    }
+    if (localImage) {
+      downloaded++;
+    } else {
+      // 暫時性失敗不要把原本的圖清掉，保留上一次的路徑（也不算進要清掉的舊檔）
+      failed++;
+      localImage = previous.get(r.id) ?? null;
+    }
+    if (localImage !== previous.get(r.id)) {
+      await prisma.product.update({ where: { id: r.id }, data: { localImage } });
+    }
+    if (localImage) referenced.add(path.basename(localImage));
+  });
+
+  // 舊版逐產品存放的檔案（product_images/ 底下的一般檔案）已不再被引用，清掉
+  for (const ent of await fs.promises.readdir(PRODUCT_DIR, { withFileTypes: true })) {
+    if (ent.isFile() && !referenced.has(ent.name)) {
+      await fs.promises.rm(path.join(PRODUCT_DIR, ent.name), { force: true });
+    }
+  }
+
+  return { total, tried, downloaded, failed };
+}
+
+// POST ?fresh=1：忽略上次的進度，所有網址重新下載
+export async function POST(req: NextRequest) {
   try {
+    if (USE_BULK) {
+      const fresh = new URL(req.url).searchParams.get("fresh") === "1";
+      const images = await rebuildWithBulk(fresh);
+      return NextResponse.json({ ok: true, images });
+    }
+
     await fs.promises.rm(PRODUCT_DIR, { recursive: true, force: true });
     await fs.promises.mkdir(PRODUCT_DIR, { recursive: true });
 
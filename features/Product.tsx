@@ -74,6 +74,7 @@ type AnalyzerResult = {
   model?: string | null;
   spec?: string | null;
   price?: number | null;
+  currency?: string | null;
   imagelink?: string | null;
 };
 
@@ -477,7 +478,10 @@ export default function AdminProductsPage() {
             <KV k="Brand" v={aResult.brand ?? ""} />
             <KV k="Model" v={aResult.model ?? ""} />
             <KV k="Spec" v={aResult.spec ?? ""} />
-            <KV k="Price" v={String(safeNum(aResult.price, 0))} />
+            <KV
+              k="Price"
+              v={`${safeNum(aResult.price, 0)}${aResult.currency ? ` ${aResult.currency}` : ""}`}
+            />
             <KV k="Image" v={aResult.imagelink ?? ""} />
           </div>
           {aResult.imagelink ? (